@@ -1,19 +1,29 @@
-﻿import tkinter as tk
+﻿import sys
+import tkinter as tk
 from tkinter import ttk, messagebox, PhotoImage
-from api_test_ui import ApiTestFrame
-from dbconnector import DBConnector
-from db_mapping_ui import DBFormApp
 from auth_config import AuthConfigUI
-import psycopg2
+from db_pool import ConnectionPool
+import metrics
+import profiling
+# Tab modules (and the HTTP and database libraries behind them) are
+# imported when their tab is first opened; see startup_benchmark.py
 
 class HackzillaApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Unified UI")
         self.root.geometry("1200x600")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.profile_path = profiling.start_from_env()
+        self.stop_metrics = metrics.start_from_env()
 
         self.connection = None
         self.db_connector = None
+        self.pool_max_size = 8
+        self.api_frame = None
+        self.load_frame = None
+        self.history_frame = None
+        self._tab_builders = {}
 
         # Create Notebook for tabbed layout
         self.notebook = ttk.Notebook(self.root)
@@ -30,17 +40,43 @@ class HackzillaApp:
         self.auth_ui = AuthConfigUI(self.api_key_tab)
         self.auth_ui.frame.pack(fill="x", padx=10, pady=10)
 
-        # --- Tab 3: Raw API Tester ---
-        self.api_tab = ttk.Frame(self.notebook)
-        self.notebook.add(self.api_tab, text="Raw API Tester")
+        # --- Tabs 3-5 are built the first time they are selected ---
+        self.api_tab = self._add_lazy_tab("Raw API Tester", self.build_api_tab)
+        self.load_tab = self._add_lazy_tab("Load Test", self.build_load_tab)
+        self.history_tab = self._add_lazy_tab("History", self.build_history_tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+    def _add_lazy_tab(self, text, builder):
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text=text)
+        self._tab_builders[str(tab)] = builder
+        return tab
+
+    def _on_tab_changed(self, event=None):
+        builder = self._tab_builders.pop(self.notebook.select(), None)
+        if builder is not None:
+            builder()
+
+    def build_api_tab(self):
+        from api_test_ui import ApiTestFrame
         self.api_frame = ApiTestFrame(self.api_tab)
         self.api_frame.pack(fill="both", expand=True)
 
+    def build_load_tab(self):
+        from load_test_ui import LoadTestFrame
+        self.load_frame = LoadTestFrame(self.load_tab, auth=self.auth_ui.auth)
+        self.load_frame.pack(fill="both", expand=True)
+
+    def build_history_tab(self):
+        from history_ui import HistoryBrowserFrame
+        self.history_frame = HistoryBrowserFrame(self.history_tab)
+        self.history_frame.pack(fill="both", expand=True)
+
     def build_db_panel(self, parent):
         tk.Label(parent, text="Database Type:").pack(pady=5)
         self.db_type_var = tk.StringVar()
         db_type_dropdown = ttk.Combobox(parent, textvariable=self.db_type_var, state="readonly")
-        db_type_dropdown['values'] = ("MySQL", "PostgreSQL", "SQLite", "SQL Server", "Oracle")
+        db_type_dropdown['values'] = ("MySQL", "PostgreSQL", "SQLite")
         db_type_dropdown.current(1)
         db_type_dropdown.pack(pady=(0, 10))
         db_type_dropdown.bind("<<ComboboxSelected>>", self.on_db_select)
@@ -88,6 +124,7 @@ class HackzillaApp:
         return entry
 
     def on_db_select(self, event=None):
+        from dbconnector import DBConnector
         selected_db = self.db_type_var.get()
         try:
             self.db_connector = DBConnector(selected_db)
@@ -103,14 +140,17 @@ class HackzillaApp:
         dbname = self.db_name_entry.get().strip()
 
         try:
-            conn = psycopg2.connect(
-                dbname=dbname or "patientdb",
-                user=user or "admin",
-                password=password or "yourpassword",
-                host=host,
-                port=port
+            # Driver is picked from the dropdown; the pool lets background
+            # workers and bulk jobs run queries in parallel
+            pool = ConnectionPool(
+                db_type,
+                dict(host=host, port=port, user=user, password=password, database=dbname),
+                min_size=1,
+                max_size=self.pool_max_size,
             )
-            self.connection = conn
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = pool
             messagebox.showinfo("Success", "Connected to the database!")
             self.load_db_ui()
         except Exception as e:
@@ -122,9 +162,29 @@ class HackzillaApp:
             widget.destroy()
 
         # Load DBFormApp into Tab 1
+        from db_mapping_ui import DBFormApp
         self.db_ui_frame = DBFormApp(self.db_tab, self.db_type_var.get(), self.connection, auth=self.auth_ui.auth)
         self.db_ui_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
+    def on_close(self):
+        # Close pooled HTTP and DB connections before the window goes away;
+        # if nothing imported the engine, there is nothing to shut down
+        http_engine = sys.modules.get("http_engine")
+        if http_engine is not None:
+            http_engine.shutdown_engine()
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+        self.stop_metrics()
+        if self.profile_path:
+            try:
+                profiling.profiler.write(self.profile_path)
+            except OSError as e:
+                print(f"Profile not written: {e}")
+        self.root.destroy()
+
 # --- Launch ---
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,11 +1,31 @@
 ﻿import tkinter as tk
 from tkinter import ttk, scrolledtext
-import requests
+import threading
 import json
+import time
+from ui_worker import BackgroundRunner
+from response_viewer import ResponseBody, ResponseViewer
+from http_engine import format_timing
+from metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+from profiling import span, traced
+
+METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+BODY_METHODS = ("POST", "PUT", "PATCH")
+
+
+class RequestCancelled(Exception):
+    pass
+
 
 class ApiTestFrame(tk.Frame):
-    def __init__(self, parent):
+    def __init__(self, parent, timeout=30):
         super().__init__(parent, borderwidth=1, relief="groove", padx=10, pady=10)
+        self.timeout = timeout
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.runner = BackgroundRunner(self, max_workers=2, name="hackzilla-api")
+        self._cancel_event = None
+        self.bind("<Destroy>", self._on_destroy)
         self.build_ui()
 
     def build_ui(self):
@@ -19,54 +39,191 @@ class ApiTestFrame(tk.Frame):
         # HTTP Method
         tk.Label(self, text="HTTP Method:", font=('Segoe UI', 10)).pack(anchor='w', padx=10)
         self.method_var = tk.StringVar(value="GET")
-        self.method_menu = ttk.Combobox(self, textvariable=self.method_var, values=["GET", "POST", "PUT", "DELETE"], state="readonly", width=10)
+        self.method_menu = ttk.Combobox(self, textvariable=self.method_var, values=METHODS, state="readonly", width=10)
         self.method_menu.pack(padx=10, pady=5)
 
+        # Custom headers
+        tk.Label(self, text="Headers (one per line, Name: value):", font=('Segoe UI', 10)).pack(anchor='w', padx=10)
+        self.headers_text = scrolledtext.ScrolledText(self, font=('Consolas', 10), wrap='none', width=85, height=4)
+        self.headers_text.pack(padx=10, pady=5)
+
         # Request Body
         tk.Label(self, text="Request Body (JSON):", font=('Segoe UI', 10)).pack(anchor='w', padx=10)
         self.body_text = scrolledtext.ScrolledText(self, font=('Consolas', 10), wrap='word', width=85, height=10)
         self.body_text.pack(padx=10, pady=5)
 
-        # Send Button
-        send_btn = tk.Button(self, text="Send Request", command=self.send_request, font=('Segoe UI', 10))
-        send_btn.pack(pady=10)
+        # Send / Cancel Buttons
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=10)
+        self.send_btn = tk.Button(button_frame, text="Send Request", command=self.send_request, font=('Segoe UI', 10))
+        self.send_btn.pack(side=tk.LEFT, padx=5)
+        self.cancel_btn = tk.Button(button_frame, text="Cancel", command=self.cancel_request,
+                                    font=('Segoe UI', 10), state="disabled")
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
 
         # Response Display
         tk.Label(self, text="Response:", font=('Segoe UI', 10)).pack(anchor='w', padx=10)
-        self.response_text = scrolledtext.ScrolledText(self, font=('Consolas', 10), wrap='word', width=85, height=15)
-        self.response_text.pack(padx=10, pady=5)
+        self.response_view = ResponseViewer(self, width=85, height=15)
+        self.response_view.text.config(font=('Consolas', 10))
+        self.response_view.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.cancel_request()
+            self.runner.shutdown()
+            if self._session is not None:
+                self._session.close()
+
+    @property
+    def session(self):
+        # One session for the frame's lifetime: connections to the same host
+        # are kept alive and reused between sends. requests is imported on
+        # first use so building the tab stays cheap.
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _show(self, text):
+        self.response_view.set_text(text)
+
+    def parse_headers(self):
+        headers = {'Content-Type': 'application/json'}
+        for line in self.headers_text.get("1.0", tk.END).splitlines():
+            if not line.strip():
+                continue
+            name, sep, value = line.partition(":")
+            if not sep or not name.strip():
+                raise ValueError(f"Invalid header line: {line.strip()}")
+            headers[name.strip()] = value.strip()
+        return headers
 
+    @traced("ui.send_request", "ui")
     def send_request(self):
         url = self.url_entry.get().strip()
         method = self.method_var.get()
         body = self.body_text.get("1.0", tk.END).strip()
-        headers = {'Content-Type': 'application/json'}
 
+        if method not in METHODS:
+            self._show("Unsupported method\n")
+            return
         try:
-            if method == "GET":
-                response = requests.get(url, headers=headers)
-            elif method in ["POST", "PUT"]:
-                try:
-                    json_body = json.loads(body)
-                except json.JSONDecodeError:
-                    self.response_text.delete(1.0, tk.END)
-                    self.response_text.insert(tk.END, "❌ Invalid JSON format in request body.\n")
-                    return
-                if method == "POST":
-                    response = requests.post(url, json=json_body, headers=headers)
-                else:
-                    response = requests.put(url, json=json_body, headers=headers)
-            elif method == "DELETE":
-                response = requests.delete(url, headers=headers)
-            else:
-                self.response_text.insert(tk.END, "Unsupported method\n")
+            headers = self.parse_headers()
+        except ValueError as e:
+            self._show(f"❌ {e}\n")
+            return
+
+        json_body = None
+        if method in BODY_METHODS:
+            try:
+                json_body = json.loads(body)
+            except json.JSONDecodeError:
+                self._show("❌ Invalid JSON format in request body.\n")
                 return
 
-            self.response_text.delete(1.0, tk.END)
-            self.response_text.insert(tk.END, f"✅ Status Code: {response.status_code}\n")
-            self.response_text.insert(tk.END, f"⏱ Response Time: {response.elapsed.total_seconds()}s\n\n")
-            self.response_text.insert(tk.END, response.text)
+        # A new send abandons the one still in flight
+        self.cancel_request()
+        cancel_event = threading.Event()
+        self._cancel_event = cancel_event
+        self._show(f"⏳ {method} {url} …\n")
+        self.cancel_btn.config(state="normal")
+        self.runner.submit("send", self._execute, self._on_response, self._on_error,
+                           method, url, headers, json_body, cancel_event, self.session)
+
+    def cancel_request(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+            self.runner.cancel("send")
+            # requests can't interrupt a connect or a wait for headers, so
+            # the abandoned request keeps its session (and closes it when it
+            # returns); the next send gets a fresh one rather than sharing a
+            # Session across threads
+            with self._session_lock:
+                self._session = None
+            self._show("⛔ Request cancelled.\n")
+        self.cancel_btn.config(state="disabled")
 
+    @traced("http.request", "http")
+    def _execute(self, method, url, headers, json_body, cancel_event, session):
+        # Runs on a worker thread; never touches Tk
+        HTTP_IN_FLIGHT.inc(("api_test",))
+        try:
+            result = self._fetch(session, method, url, headers, json_body, cancel_event)
         except Exception as e:
-            self.response_text.delete(1.0, tk.END)
-            self.response_text.insert(tk.END, f"❌ Error: {str(e)}")
+            HTTP_REQUESTS.inc(("api_test", method, e.__class__.__name__))
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec(("api_test",))
+            if cancel_event.is_set():
+                # Detached by cancel_request(); nothing else uses it now
+                session.close()
+        HTTP_REQUESTS.inc(("api_test", method, str(result["status"])))
+        HTTP_LATENCY.observe(result["timing"]["total"] / 1000, ("api_test",))
+        return result
+
+    def _fetch(self, session, method, url, headers, json_body, cancel_event):
+        # The body goes to a spooled temp file, so its size doesn't matter
+        with span("http.send", "http", method=method, url=url):
+            response = session.request(method, url, json=json_body, headers=headers,
+                                       timeout=self.timeout, stream=True)
+        if cancel_event.is_set():
+            response.close()
+            raise RequestCancelled()
+        # requests has no connection-level hooks: `elapsed` runs up to the
+        # response headers (connect, send and server time), the rest is download
+        headers_at = time.perf_counter()
+        body = ResponseBody((response.headers or {}).get("Content-Type", ""), response.encoding)
+        try:
+            with span("http.download", "http"):
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if cancel_event.is_set():
+                        raise RequestCancelled()
+                    body.write(chunk)
+        except BaseException:
+            body.close()
+            raise
+        finally:
+            response.close()
+        wait = response.elapsed.total_seconds()
+        download = time.perf_counter() - headers_at
+        return {
+            "method": method,
+            "status": response.status_code,
+            "elapsed": wait,
+            "timing": {"wait": round(wait * 1000, 2), "download": round(download * 1000, 2),
+                       "total": round((wait + download) * 1000, 2)},
+            "headers": dict(response.headers or {}),
+            "body": body,
+        }
+
+    def _finish(self):
+        self._cancel_event = None
+        self.cancel_btn.config(state="disabled")
+
+    @traced("ui.render_response", "ui")
+    def _on_response(self, result):
+        self._finish()
+        lines = [f"✅ Status Code: {result['status']}", f"⏱ Response Time: {result['timing']['total']} ms",
+                 f"   {format_timing(result['timing'])}", ""]
+        if result["method"] in ("HEAD", "OPTIONS"):
+            lines += [f"{name}: {value}" for name, value in result["headers"].items()] + [""]
+        body = result["body"]
+        self.response_view.show(body)
+        self.runner.submit("format", body.finish, self._on_formatted, None, "\n".join(lines) + "\n")
+
+    def _on_formatted(self, body):
+        if body is self.response_view.body:
+            self.response_view.refresh()
+
+    def _on_error(self, e):
+        self._finish()
+        if isinstance(e, RequestCancelled):
+            return
+        self._show(f"❌ Error: {str(e)}")
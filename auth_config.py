@@ -1,13 +1,270 @@
 # auth_config.py
+import json
+import threading
+import time
+import urllib.parse
+from collections import namedtuple
+from types import MappingProxyType
 import tkinter as tk
 from tkinter import ttk, messagebox
+from profiling import traced
+
+
+class OAuth2Error(Exception):
+    pass
+
+
+class OAuth2Token:
+    def __init__(self, access_token, expires_at, refresh_token=None, token_type="Bearer", refresh_at=None):
+        self.access_token = access_token
+        # On the provider's clock; float("inf") when the server gave no expiry
+        self.expires_at = expires_at
+        self.refresh_at = expires_at if refresh_at is None else refresh_at
+        self.refresh_token = refresh_token
+        self.token_type = token_type
+
+
+class OAuth2TokenProvider:
+    """
+    Fetches OAuth2 access tokens with the client-credentials grant, or the
+    refresh-token grant when `refresh_token` is given, and caches them
+    until shortly before they expire.
+
+    Concurrent callers share one in-flight fetch, so a burst of requests
+    hits the token endpoint once. After the first fetch a daemon thread
+    renews the token `refresh_margin` seconds (or a third of its lifetime,
+    if shorter) before it lapses, so senders normally never wait on it.
+    The endpoint is called with urllib; `close()` stops the refresher.
+    """
+    def __init__(self, token_url, client_id, client_secret=None, scope=None, refresh_token=None,
+                 client_auth="basic", refresh_margin=60.0, expiry_skew=5.0, timeout=10.0,
+                 background=True, clock=time.monotonic):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.client_auth = client_auth
+        self.refresh_margin = refresh_margin
+        self.expiry_skew = expiry_skew
+        self.timeout = timeout
+        self.background = background
+        self.clock = clock
+        self.fetches = 0
+
+        self._refresh_token = refresh_token
+        self._token = None
+        self._error = None
+        self._refreshing = False
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def grant_type(self):
+        return "refresh_token" if self._refresh_token else "client_credentials"
+
+    def _usable(self, token):
+        return token is not None and self.clock() < token.expires_at - self.expiry_skew
+
+    def token(self):
+        """A valid access token, fetching one only if the cached one is (nearly) expired."""
+        with self._cond:
+            token = self._token
+            if self._usable(token):
+                return token.access_token
+        return self.refresh(stale=token).access_token
+
+    def refresh(self, stale=None):
+        """
+        Fetch a new token, or wait for the fetch already in flight and share
+        its outcome. With `stale`, a token that has replaced it meanwhile is
+        returned as is.
+        """
+        with self._cond:
+            waited = False
+            while self._refreshing:
+                waited = True
+                self._cond.wait()
+            if self._token is not stale and self._usable(self._token):
+                return self._token
+            if waited and self._error is not None:
+                # The fetch we waited on failed; don't stampede with retries
+                raise self._error
+            self._refreshing = True
+        token, error = None, None
+        try:
+            token = self._fetch()
+        except Exception as e:
+            error = e
+        with self._cond:
+            self._refreshing = False
+            self._error = error
+            if token is not None:
+                self._token = token
+                if token.refresh_token:
+                    self._refresh_token = token.refresh_token
+            self._cond.notify_all()
+        if error is not None:
+            raise error
+        if self.background:
+            self._start_refresher()
+        return token
+
+    def invalidate(self, access_token=None):
+        """Drop the cached token (e.g. after a 401), if it is still `access_token`."""
+        with self._cond:
+            if self._token is not None and access_token in (None, self._token.access_token):
+                self._token = None
+
+    @traced("auth.oauth_fetch", "auth")
+    def _fetch(self):
+        import urllib.request
+        import urllib.error
+        form = {"grant_type": self.grant_type}
+        if self._refresh_token:
+            form["refresh_token"] = self._refresh_token
+        if self.scope:
+            form["scope"] = self.scope
+        headers = {"Content-Type": "application/x-www-form-urlencoded", "Accept": "application/json"}
+        if self.client_auth == "basic" and self.client_secret is not None:
+            import base64
+            credentials = f"{urllib.parse.quote(self.client_id)}:{urllib.parse.quote(self.client_secret)}"
+            headers["Authorization"] = "Basic " + base64.b64encode(credentials.encode()).decode()
+        else:
+            form["client_id"] = self.client_id
+            if self.client_secret is not None:
+                form["client_secret"] = self.client_secret
+        request = urllib.request.Request(self.token_url, data=urllib.parse.urlencode(form).encode(),
+                                         headers=headers, method="POST")
+        self.fetches += 1
+        requested_at = self.clock()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.loads(e.read().decode("utf-8"))
+                reason = detail.get("error_description") or detail.get("error") or e.reason
+            except ValueError:
+                reason = e.reason
+            raise OAuth2Error(f"Token request failed ({e.code}): {reason}")
+        except urllib.error.URLError as e:
+            raise OAuth2Error(f"Token endpoint unreachable: {e.reason}")
+        access_token = payload.get("access_token")
+        if not access_token:
+            raise OAuth2Error("Token response has no access_token")
+        expires_in = float(payload.get("expires_in") or 0)
+        if not expires_in:
+            return OAuth2Token(access_token, float("inf"), payload.get("refresh_token"),
+                               payload.get("token_type") or "Bearer")
+        # Measured from when the request went out, so a slow reply errs early
+        expires_at = requested_at + expires_in
+        return OAuth2Token(access_token, expires_at, payload.get("refresh_token"),
+                           payload.get("token_type") or "Bearer",
+                           refresh_at=expires_at - min(self.refresh_margin, expires_in / 3))
+
+    def _start_refresher(self):
+        with self._cond:
+            if self._thread is not None or self._stop.is_set():
+                return
+            self._thread = threading.Thread(target=self._refresh_loop, name="hackzilla-oauth", daemon=True)
+            self._thread.start()
+
+    def _refresh_due_in(self):
+        with self._cond:
+            token = self._token
+        if token is None or token.expires_at == float("inf"):
+            return None
+        return token.refresh_at - self.clock()
+
+    def _refresh_loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            delay = self._refresh_due_in()
+            if delay is None:
+                # Nothing to renew until someone fetches a token that expires
+                with self._cond:
+                    if self._refresh_due_in() is None:
+                        self._thread = None
+                        return
+                continue
+            if failures:
+                delay = 2 ** min(failures, 5)
+            if self._stop.wait(max(delay, 0.05)):
+                return
+            due = self._refresh_due_in()
+            if due is None or (due > 0 and not failures):
+                continue
+            with self._cond:
+                current = self._token
+            try:
+                self.refresh(stale=current)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"OAuth2 token refresh failed: {e}")
+
+    def auth(self):
+        """An `auth=` value for httpx or requests that sets the Bearer header per request."""
+        return OAuth2Auth(self)
+
+    def close(self):
+        self._stop.set()
+        with self._cond:
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1)
+
+
+class OAuth2Auth:
+    """
+    Per-request auth callable: httpx and requests both call it with the
+    outgoing request, and it sets `Authorization` from the provider's cache.
+    """
+    def __init__(self, provider):
+        self.provider = provider
+
+    def __call__(self, request):
+        request.headers["Authorization"] = f"Bearer {self.provider.token()}"
+        return request
+
+
+# What request loops read: `headers` is a read-only mapping, `auth` the
+# ready-made `auth=` value (OAuth2 callable, basic-auth tuple or None)
+AuthSnapshot = namedtuple("AuthSnapshot", ["version", "headers", "auth", "basic_auth", "oauth"])
+
 
 class ApiAuth:
-    def __init__(self, token_var=None, api_key_var=None, username_var=None, password_var=None):
+    """
+    Request credentials taken from Tk variables (or plain values).
+
+    The variables are only read on the Tk thread, when they change: each
+    write rebuilds an immutable `AuthSnapshot` with a new version number,
+    and `snapshot()` hands out the current one. Workers, the engine loop
+    and bulk runs can call `snapshot()` (and the `build_*` methods, which
+    read from it) from any thread without a Tcl round trip.
+    """
+    def __init__(self, token_var=None, api_key_var=None, username_var=None, password_var=None,
+                 oauth_url_var=None, client_id_var=None, client_secret_var=None, scope_var=None,
+                 refresh_token_var=None):
         self.token_var = token_var
         self.api_key_var = api_key_var
         self.username_var = username_var
         self.password_var = password_var    
+        self.oauth_url_var = oauth_url_var
+        self.client_id_var = client_id_var
+        self.client_secret_var = client_secret_var
+        self.scope_var = scope_var
+        self.refresh_token_var = refresh_token_var
+        self._oauth = None
+        self._oauth_key = None
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.refresh()
+        for var in (token_var, api_key_var, username_var, password_var, oauth_url_var,
+                    client_id_var, client_secret_var, scope_var, refresh_token_var):
+            if isinstance(var, tk.Variable):
+                var.trace_add("write", lambda *args: self.refresh())
 
     def _get(self, v):
         if v is None:
@@ -17,7 +274,12 @@ class ApiAuth:
         except Exception:
             return str(v).strip()
 
-    def build_headers(self):
+    @traced("auth.snapshot", "auth")
+    def refresh(self):
+        """
+        Re-read the variables and publish a new snapshot. Runs on the Tk
+        thread; called automatically when a Tk variable is written.
+        """
         headers = {}
         token = self._get(self.token_var)
         api_key = self._get(self.api_key_var)
@@ -25,12 +287,49 @@ class ApiAuth:
             headers["Authorization"] = f"Bearer {token}"
         if api_key:
             headers["x-api-key"] = api_key
-        return headers
-
-    def build_basic_auth(self):
         user = self._get(self.username_var)
         pwd = self._get(self.password_var)
-        return (user, pwd) if user and pwd else None
+        basic_auth = (user, pwd) if user and pwd else None
+        oauth = self._oauth_for(tuple(self._get(v) for v in (
+            self.oauth_url_var, self.client_id_var, self.client_secret_var, self.scope_var,
+            self.refresh_token_var)))
+        with self._lock:
+            version = self._snapshot.version + 1 if self._snapshot is not None else 1
+            self._snapshot = AuthSnapshot(version, MappingProxyType(headers),
+                                          oauth.auth() if oauth is not None else basic_auth, basic_auth, oauth)
+        return self._snapshot
+
+    def _oauth_for(self, key):
+        # The provider, and its cached token, survives until the settings change
+        if key != self._oauth_key:
+            if self._oauth is not None:
+                self._oauth.close()
+            url, client_id, secret, scope, refresh_token = key
+            self._oauth = OAuth2TokenProvider(url, client_id, secret or None, scope or None,
+                                              refresh_token or None) if url and client_id else None
+            self._oauth_key = key
+        return self._oauth
+
+    def snapshot(self):
+        """The current `AuthSnapshot`; safe to call from any thread."""
+        return self._snapshot
+
+    def build_headers(self):
+        return dict(self._snapshot.headers)
+
+    def build_basic_auth(self):
+        return self._snapshot.basic_auth
+
+    def oauth_provider(self):
+        """The OAuth2 token provider for the current settings, or None when no token URL and client ID are set."""
+        return self._snapshot.oauth
+
+    def build_auth(self):
+        """
+        The `auth=` value for a request: OAuth2 when configured, otherwise
+        basic auth (or None).
+        """
+        return self._snapshot.auth
 
     def as_dict(self):
         return {
@@ -48,12 +347,22 @@ class AuthConfigUI:
         self.api_key_var = tk.StringVar()
         self.username_var = tk.StringVar()
         self.password_var = tk.StringVar()
+        self.oauth_url_var = tk.StringVar()
+        self.client_id_var = tk.StringVar()
+        self.client_secret_var = tk.StringVar()
+        self.scope_var = tk.StringVar()
+        self.refresh_token_var = tk.StringVar()
 
         self.auth = ApiAuth(
             token_var=self.token_var,
             api_key_var=self.api_key_var,
             username_var=self.username_var,
-            password_var=self.password_var
+            password_var=self.password_var,
+            oauth_url_var=self.oauth_url_var,
+            client_id_var=self.client_id_var,
+            client_secret_var=self.client_secret_var,
+            scope_var=self.scope_var,
+            refresh_token_var=self.refresh_token_var,
         )
 
         self.build_ui()
@@ -71,7 +380,17 @@ class AuthConfigUI:
         tk.Label(self.frame, text="Password:").grid(row=3, column=0, sticky="w", padx=10, pady=5)
         tk.Entry(self.frame, textvariable=self.password_var, show="*", width=40).grid(row=3, column=1, sticky="w", padx=10, pady=5)
 
-        tk.Button(self.frame, text="Preview Auth", command=self.preview_auth).grid(row=4, column=1, sticky="w", padx=10, pady=10)
+        # OAuth2: client credentials, or the refresh-token grant when a refresh token is given
+        oauth_fields = [("OAuth2 Token URL:", self.oauth_url_var, None),
+                        ("Client ID:", self.client_id_var, None),
+                        ("Client Secret:", self.client_secret_var, "*"),
+                        ("Scope:", self.scope_var, None),
+                        ("Refresh Token:", self.refresh_token_var, "*")]
+        for row, (label, var, show) in enumerate(oauth_fields, start=4):
+            tk.Label(self.frame, text=label).grid(row=row, column=0, sticky="w", padx=10, pady=5)
+            tk.Entry(self.frame, textvariable=var, width=40, show=show or "").grid(row=row, column=1, sticky="w", padx=10, pady=5)
+
+        tk.Button(self.frame, text="Preview Auth", command=self.preview_auth).grid(row=9, column=1, sticky="w", padx=10, pady=10)
 
     def preview_auth(self):
         messagebox.showinfo("Auth Preview", f"{self.auth.as_dict()}")
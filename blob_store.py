@@ -0,0 +1,125 @@
+# blob_store.py
+import hashlib
+import lzma
+import zlib
+from collections import OrderedDict
+
+CODECS = {
+    "raw": (lambda data: data, lambda data: data),
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+
+class BlobStore:
+    """
+    Content-addressed store for response bodies, kept in a `blobs` table on
+    an existing SQLite connection.
+
+    Each distinct body is stored once under its SHA-256 and compressed with
+    `codec` (zlib or lzma) when that makes it smaller; records elsewhere
+    hold only the hash. Recently read bodies are kept decompressed in a
+    small LRU cache. The owner of the connection serializes access.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, conn, codec="zlib", min_compress_size=64, cache_size=256):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.conn = conn
+        self.codec = codec
+        self.min_compress_size = min_compress_size
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def digest(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _bytes(data):
+        return data.encode("utf-8") if isinstance(data, str) else bytes(data)
+
+    def _remember(self, key, data):
+        self._cache[key] = data
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, data):
+        """Store `data` (str or bytes) if it is new; return its hash. None stays None."""
+        if data is None:
+            return None
+        data = self._bytes(data)
+        key = self.digest(data)
+        # Always ask the table, never the cache: a rolled-back transaction
+        # can drop a row whose key is still cached. Compression only runs
+        # when the row is missing.
+        exists = self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (key,)).fetchone()
+        if not exists:
+            codec, stored = "raw", data
+            if len(data) >= self.min_compress_size:
+                compressed = CODECS[self.codec][0](data)
+                if len(compressed) < len(data):
+                    codec, stored = self.codec, compressed
+            self.conn.execute("INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+                              (key, codec, len(data), stored))
+        self._remember(key, data)
+        return key
+
+    def get(self, key):
+        """Return the original bytes for `key`, or None if it is unknown."""
+        if key is None:
+            return None
+        data = self._cache.get(key)
+        if data is not None:
+            self._cache.move_to_end(key)
+            return data
+        row = self.conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        codec, stored = row
+        data = CODECS[codec][1](stored)
+        self._remember(key, data)
+        return data
+
+    def text(self, key):
+        data = self.get(key)
+        return None if data is None else data.decode("utf-8", errors="replace")
+
+    def collect_garbage(self, references, candidates=None):
+        """
+        Delete blobs that no (table, column) pair in `references` points to.
+        With `candidates` (e.g. the hashes of rows just deleted) only those
+        are checked; otherwise every blob is. The referencing columns should
+        be indexed.
+        """
+        used = " OR ".join(f"EXISTS (SELECT 1 FROM {table} WHERE {column} = blobs.hash)"
+                           for table, column in references)
+        if candidates is None:
+            removed = self.conn.execute(f"DELETE FROM blobs WHERE NOT ({used})").rowcount
+            self._cache.clear()
+            return removed
+        candidates = list(candidates)
+        removed = 0
+        for start in range(0, len(candidates), 500):
+            chunk = candidates[start:start + 500]
+            marks = ", ".join("?" * len(chunk))
+            removed += self.conn.execute(
+                f"DELETE FROM blobs WHERE hash IN ({marks}) AND NOT ({used})", chunk).rowcount
+        for key in candidates:
+            self._cache.pop(key, None)
+        return removed
+
+    def stats(self):
+        count, raw, stored = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {"blobs": count, "raw_bytes": raw, "stored_bytes": stored}
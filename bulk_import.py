@@ -0,0 +1,302 @@
+# bulk_import.py
+import csv
+import datetime
+import io
+import os
+import re
+import threading
+import time
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+class ImportProgress:
+    """Counters the Tk side polls while an import is running."""
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.done = False
+        self.started_at = time.perf_counter()
+
+    def as_text(self):
+        elapsed = time.perf_counter() - self.started_at
+        rate = self.read / elapsed if elapsed > 0 else 0
+        state = "Done" if self.done else "Importing"
+        return (f"{state}: {self.read:,} read, {self.inserted:,} inserted, "
+                f"{self.rejected:,} rejected ({rate:,.0f} rows/s)")
+
+
+class ImportResult:
+    def __init__(self, inserted, rejected, mapping, unmapped, report_path):
+        self.inserted = inserted
+        self.rejected = rejected
+        # [(file column, table column)] in load order
+        self.mapping = mapping
+        self.unmapped = unmapped
+        self.report_path = report_path
+
+    def as_text(self):
+        text = f"Imported {self.inserted:,} rows, rejected {self.rejected:,}."
+        if self.unmapped:
+            text += f" Ignored columns: {', '.join(self.unmapped)}."
+        if self.report_path:
+            text += f" Rejected rows: {self.report_path}"
+        return text
+
+
+def _normalize(name):
+    return re.sub(r"[\s\-]+", "_", str(name).strip().lower())
+
+
+def map_columns(file_columns, table_columns):
+    """
+    Match file headers to table columns by name, ignoring case, surrounding
+    spaces and space/hyphen vs underscore. Returns ([(file index, table
+    column)], [unmapped file headers]).
+    """
+    by_name = {_normalize(c): c for c in table_columns}
+    mapping, unmapped, used = [], [], set()
+    for index, header in enumerate(file_columns):
+        column = by_name.get(_normalize(header))
+        if column is None or column in used:
+            unmapped.append(str(header))
+        else:
+            used.add(column)
+            mapping.append((index, column))
+    return mapping, unmapped
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def read_rows(path, batch_size=5000):
+    """
+    (header, batches) for a CSV or XLSX file; batches are lists of lists of
+    strings, read lazily so only one batch is in memory at a time.
+    """
+    if os.path.splitext(path)[1].lower() == ".xlsx":
+        try:
+            import openpyxl
+        except ImportError:
+            raise ImportError("XLSX import requires the optional 'openpyxl' package.")
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_cell_text(v) for v in next(rows, ())]
+
+        def batches():
+            try:
+                batch = []
+                for row in rows:
+                    batch.append([_cell_text(v) for v in row])
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+            finally:
+                workbook.close()
+        return header, batches()
+
+    f = open(path, "r", encoding="utf-8-sig", newline="")
+    reader = csv.reader(f)
+    header = next(reader, [])
+
+    def batches():
+        try:
+            batch = []
+            for row in reader:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            f.close()
+    return header, batches()
+
+
+class BulkImporter:
+    """
+    Loads CSV/XLSX rows into one table, `batch_size` rows at a time.
+
+    File headers are mapped onto `DBConnector.get_table_columns()`; each
+    batch is converted column by column with the table's compiled
+    validator (`DBConnector.get_validator()`), rows that fail are set aside, and
+    the rest are loaded with the fastest path the backend has: COPY FROM
+    STDIN on Postgres, batched executemany on MySQL, prepared inserts on
+    SQLite. The whole import is one transaction. A batch the database
+    rejects (e.g. a constraint violation) is retried row by row under
+    savepoints so only the offending rows are rejected. Rejected rows are
+    written, with the reason, to `<file>.rejected.csv`.
+    """
+    def __init__(self, connector, table, batch_size=5000):
+        self.connector = connector
+        self.table = table
+        self.batch_size = max(1, int(batch_size))
+        self.progress = ImportProgress()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _table_columns(self):
+        return [name for name, _ in self.connector.get_table_columns(self.table)]
+
+    def run(self, path, report_path=None):
+        columns = self._table_columns()
+        validator = self.connector.get_validator(self.table)
+        header, batches = read_rows(path, self.batch_size)
+        mapping, unmapped = map_columns(header, columns)
+        if not mapping:
+            batches.close()
+            raise ValueError("No file columns match the columns of " + self.table)
+        targets = [column for _, column in mapping]
+        converters = [(index, validator.checkers.get(column, str), column in validator.required, column)
+                      for index, column in mapping]
+        report_path = report_path or os.path.splitext(path)[0] + ".rejected.csv"
+        report = None
+        self.progress = ImportProgress()
+        line = 1
+
+        try:
+            with self.connector.connection() as conn:
+                cursor = conn.cursor()
+                if self.connector.db_type == "sqlite" and not conn.in_transaction:
+                    # Otherwise releasing the first savepoint would commit
+                    cursor.execute("BEGIN")
+                try:
+                    for batch in batches:
+                        if self._cancel.is_set():
+                            raise ImportCancelled()
+                        good, bad = self._convert(batch, converters, line)
+                        line += len(batch)
+                        self.progress.read += len(batch)
+                        bad += self._load(conn, cursor, targets, good)
+                        if bad:
+                            if report is None:
+                                report = self._open_report(report_path, header)
+                            report[1].writerows(sorted(bad, key=lambda r: r[0]))
+                            self.progress.rejected += len(bad)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                finally:
+                    cursor.close()
+        finally:
+            batches.close()
+            if report is not None:
+                report[0].close()
+        self.progress.done = True
+        return ImportResult(self.progress.inserted, self.progress.rejected, list(zip(
+            [header[i] for i, _ in mapping], targets)), unmapped, report_path if report else None)
+
+    @staticmethod
+    def _open_report(path, header):
+        f = open(path, "w", encoding="utf-8", newline="")
+        writer = csv.writer(f)
+        writer.writerow(["line", "error"] + list(header))
+        return f, writer
+
+    @staticmethod
+    def _convert(batch, converters, first_line):
+        """
+        Convert a batch column by column. Returns ([(line, raw row, values)],
+        [report rows]).
+        """
+        width = len(converters)
+        values = [[None] * width for _ in batch]
+        errors = {}
+        for position, (index, convert, required, column) in enumerate(converters):
+            for r, row in enumerate(batch):
+                text = row[index].strip() if index < len(row) else ""
+                if not text:
+                    if required:
+                        errors.setdefault(r, f"{column}: is required")
+                    continue
+                try:
+                    values[r][position] = convert(text)
+                except (ValueError, TypeError) as e:
+                    errors.setdefault(r, f"{column}: {e}")
+        good, bad = [], []
+        for r, row in enumerate(batch):
+            line = first_line + r + 1
+            if r in errors:
+                bad.append([line, errors[r]] + row)
+            else:
+                good.append((line, row, values[r]))
+        return good, bad
+
+    def _load(self, conn, cursor, targets, rows):
+        """Insert converted rows; returns report rows for those the database refused."""
+        if not rows:
+            return []
+        cursor.execute("SAVEPOINT hackzilla_batch")
+        try:
+            self._insert_many(cursor, targets, [values for _, _, values in rows])
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT hackzilla_batch")
+            return self._load_one_by_one(cursor, targets, rows)
+        cursor.execute("RELEASE SAVEPOINT hackzilla_batch")
+        self.progress.inserted += len(rows)
+        return []
+
+    def _load_one_by_one(self, cursor, targets, rows):
+        bad = []
+        sql = self._insert_sql(targets)
+        for line, raw, values in rows:
+            cursor.execute("SAVEPOINT hackzilla_row")
+            try:
+                cursor.execute(sql, values)
+            except Exception as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT hackzilla_row")
+                bad.append([line, str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__] + raw)
+                continue
+            cursor.execute("RELEASE SAVEPOINT hackzilla_row")
+            self.progress.inserted += 1
+        return bad
+
+    def _insert_sql(self, targets):
+        quote = self.connector.quote_identifier
+        mark = "?" if self.connector.db_type == "sqlite" else "%s"
+        return (f"INSERT INTO {quote(self.table)} ({', '.join(quote(c) for c in targets)}) "
+                f"VALUES ({', '.join([mark] * len(targets))})")
+
+    def _insert_many(self, cursor, targets, rows):
+        if self.connector.db_type in ("postgresql", "postgres"):
+            quote = self.connector.quote_identifier
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # Unquoted empty fields are NULL in COPY's CSV format
+            writer.writerows([["" if v is None else _copy_text(v) for v in row] for row in rows])
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {quote(self.table)} ({', '.join(quote(c) for c in targets)}) "
+                f"FROM STDIN WITH (FORMAT csv)", buffer)
+        else:
+            # mysql-connector rewrites a batched INSERT into one multi-row
+            # statement; sqlite3 reuses one prepared statement for all rows
+            cursor.executemany(self._insert_sql(targets), rows)
+
+
+def _copy_text(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value)
@@ -0,0 +1,300 @@
+# bulk_runner.py
+import asyncio
+import datetime
+import decimal
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from blob_store import BlobStore
+from dbconnector import DBConnector
+from metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+from profiling import traced
+
+
+def _json_value(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def row_to_request(method, url, row):
+    """
+    Map one table row onto a request the same way `DBFormApp._perform_request()`
+    maps the form: audit columns are dropped, as the form never shows them,
+    then GET/DELETE send the non-empty columns as query params and POST/PUT
+    send the rest as the JSON payload. `{column}` placeholders in the URL
+    are filled from the whole row.
+    """
+    if "{" in url:
+        url = url.format_map({k: "" if v is None else v for k, v in row.items()})
+    fields = {col: row[col] for col in DBConnector.filter_audit_columns(list(row))}
+    if method in ("GET", "DELETE"):
+        params = {}
+        for col, value in fields.items():
+            text = "" if value is None else str(_json_value(value)).strip()
+            if text:
+                params[col] = text
+        return {"method": method, "url": url, "params": params}
+    if method in ("POST", "PUT"):
+        return {"method": method, "url": url, "json": {col: _json_value(v) for col, v in fields.items()}}
+    raise ValueError("Unsupported method")
+
+
+class BulkResultsStore:
+    """
+    Per-row outcome of bulk runs (status, latency, error), kept in SQLite.
+    Response bodies go to a content-addressed `BlobStore` in the same file,
+    so a run answering the same body for every row stores it once.
+
+    `record()` only buffers; it returns True once `flush_every` rows are
+    waiting, and the caller decides where `flush()` runs (`BulkRunner`
+    uses a writer thread, keeping hashing, compression and SQLite off the
+    event loop). The buffer has its own lock, so recording never waits on
+    a flush in progress.
+    """
+    def __init__(self, path=":memory:", flush_every=500, codec="zlib"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS bulk_results (
+                run_id TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                status INTEGER,
+                latency_ms REAL,
+                error TEXT,
+                response_hash TEXT
+            )""")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(bulk_results)")]
+        if "response_hash" not in columns:
+            self.conn.execute("ALTER TABLE bulk_results ADD COLUMN response_hash TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bulk_results_run ON bulk_results (run_id, status)")
+        self.blobs = BlobStore(self.conn, codec=codec)
+        self.conn.commit()
+        self.flush_every = flush_every
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        # Serializes use of the connection
+        self._lock = threading.Lock()
+
+    def record(self, run_id, row_index, status, latency_ms, error=None, body=None):
+        with self._buffer_lock:
+            self._buffer.append((run_id, row_index, status, latency_ms, error, body))
+            return len(self._buffer) >= self.flush_every
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        with self._buffer_lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        try:
+            with self.conn:
+                rows = [entry[:5] + (self.blobs.put(entry[5]),) for entry in entries]
+                self.conn.executemany(
+                    "INSERT INTO bulk_results (run_id, row_index, status, latency_ms, error, response_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        except BaseException:
+            # Rolled back; keep the rows for the next flush
+            with self._buffer_lock:
+                self._buffer[:0] = entries
+            raise
+
+    def summary(self, run_id):
+        self.flush()
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT status, COUNT(*), AVG(latency_ms) FROM bulk_results
+                WHERE run_id = ? GROUP BY status ORDER BY status""", (run_id,)).fetchall()
+        return {status: {"count": count, "avg_ms": round(avg or 0, 2)} for status, count, avg in rows}
+
+    def results(self, run_id):
+        self.flush()
+        with self._lock:
+            return self.conn.execute("""
+                SELECT row_index, status, latency_ms, error FROM bulk_results
+                WHERE run_id = ? ORDER BY row_index""", (run_id,)).fetchall()
+
+    def body(self, run_id, row_index):
+        """The response body recorded for one row, as bytes (None if there was none)."""
+        self.flush()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response_hash FROM bulk_results WHERE run_id = ? AND row_index = ?",
+                (run_id, row_index)).fetchone()
+            return self.blobs.get(row[0]) if row else None
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+class BulkProgress:
+    """Counters the Tk side polls while a run is in progress."""
+    def __init__(self):
+        self.sent = 0
+        self.ok = 0
+        self.failed = 0
+        self.done = False
+        self.started_at = time.perf_counter()
+
+    def as_text(self):
+        elapsed = time.perf_counter() - self.started_at
+        rate = self.sent / elapsed if elapsed > 0 else 0
+        state = "Done" if self.done else "Running"
+        return f"{state}: {self.sent} sent, {self.ok} ok, {self.failed} failed ({rate:.0f} req/s)"
+
+
+async def prepare_auth(auth):
+    """
+    Fetch (or refresh) an OAuth2 token on a worker thread before sending,
+    so the per-request auth callable only reads the cache and never blocks
+    the event loop. Other auth values are left alone.
+    """
+    provider = getattr(auth, "provider", None)
+    if provider is not None:
+        await asyncio.get_running_loop().run_in_executor(None, provider.token)
+
+
+class BulkRunner:
+    """
+    Streams row batches from a blocking iterator (e.g.
+    `DBConnector.iter_row_batches()`) and fires one request per row through a
+    shared async client, with at most `concurrency` requests in flight.
+
+    With `auth_source` (an `ApiAuth`), each request takes its headers and
+    auth from the source's current snapshot instead of `headers`/`auth`,
+    so credential changes apply mid-run without locking per request.
+    """
+    def __init__(self, client, store, concurrency=20, headers=None, auth=None, keep_bodies=True,
+                 auth_source=None):
+        self.client = client
+        self.store = store
+        self.concurrency = concurrency
+        self.keep_bodies = keep_bodies
+        self.headers = headers or {}
+        self.auth = auth
+        self.auth_source = auth_source
+        self.progress = BulkProgress()
+        self.run_id = uuid.uuid4().hex
+        self._cancel = threading.Event()
+        self._writer = None
+        self._flushing = None
+
+    def cancel(self):
+        self._cancel.set()
+
+    async def run(self, batches, method, url):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        # Later token refreshes happen in the provider's background thread
+        await prepare_auth(self.auth_source.snapshot().auth if self.auth_source is not None else self.auth)
+        # Row batches come from a DB cursor; pull them on one dedicated
+        # thread so the cursor is always used from the same thread
+        reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hackzilla-bulk-reader")
+        # Results are written on another, so a flush never stalls the loop
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hackzilla-bulk-writer")
+        self._flushing = None
+        self.progress = BulkProgress()
+
+        async def produce():
+            iterator = iter(batches)
+            index = 0
+            try:
+                while not self._cancel.is_set():
+                    batch = await loop.run_in_executor(reader, next, iterator, None)
+                    if batch is None:
+                        break
+                    for row in batch:
+                        await queue.put((index, row))
+                        index += 1
+            finally:
+                # Also runs when the task is cancelled, releasing the cursor
+                # and its pooled connection
+                closer = getattr(iterator, "close", None)
+                if closer is not None:
+                    await loop.run_in_executor(reader, closer)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                if self._cancel.is_set():
+                    continue
+                index, row = item
+                await self._send(index, method, url, row)
+
+        tasks = [asyncio.ensure_future(produce())]
+        tasks += [asyncio.ensure_future(consume()) for _ in range(self.concurrency)]
+        try:
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # If one task failed the others would wait on the queue forever
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                reader.shutdown(wait=False)
+                await loop.run_in_executor(self._writer, self.store.flush)
+            return await loop.run_in_executor(self._writer, self.store.summary, self.run_id)
+        finally:
+            self._writer.shutdown(wait=False)
+            self.progress.done = True
+
+    def _schedule_flush(self):
+        # One flush at a time; it takes every row buffered when it starts. A
+        # failed flush keeps its rows, and the final flush raises the error.
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.get_running_loop().run_in_executor(self._writer, self.store.flush)
+            self._flushing.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    @traced("bulk.request", "http")
+    async def _send(self, index, method, url, row):
+        status, error, body = None, None, None
+        headers, auth = self.headers, self.auth
+        if self.auth_source is not None:
+            snapshot = self.auth_source.snapshot()
+            headers, auth = snapshot.headers, snapshot.auth
+        HTTP_IN_FLIGHT.inc(("bulk",))
+        t0 = time.perf_counter()
+        try:
+            request = row_to_request(method, url, row)
+            response = await self.client.request(
+                request["method"], request["url"],
+                params=request.get("params"), json=request.get("json"),
+                headers=headers, auth=auth,
+            )
+            status = response.status_code
+            if self.keep_bodies:
+                body = response.content
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            outcome = e.__class__.__name__
+        else:
+            outcome = str(status)
+        finally:
+            HTTP_IN_FLIGHT.dec(("bulk",))
+        latency = time.perf_counter() - t0
+        HTTP_REQUESTS.inc(("bulk", method, outcome))
+        HTTP_LATENCY.observe(latency, ("bulk",))
+        latency_ms = round(latency * 1000, 2)
+
+        self.progress.sent += 1
+        if status is not None and status < 400:
+            self.progress.ok += 1
+        else:
+            self.progress.failed += 1
+        if self.store.record(self.run_id, index, status, latency_ms, error, body):
+            self._schedule_flush()
@@ -3,29 +3,68 @@ from tkinter import ttk, messagebox, PhotoImage, filedialog
 import auth_config
 from dbconnector import DBConnector
 from auth_config import ApiAuth
-import httpx
-import asyncio
-import re
+from ui_worker import BackgroundRunner
+from http_engine import RequestTiming, format_timing, get_engine
+from metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+from profiling import profiler, span, traced
+from bulk_runner import BulkRunner, BulkResultsStore, prepare_auth
+from history_store import HistoryStore, DEFAULT_HISTORY_PATH
+from response_viewer import ResponseBody, ResponseViewer
+from exporters import (ExportCancelled, ExportProgress, export_json_records, export_raw, export_rows,
+                       format_for_path)
+from bulk_import import BulkImporter, ImportCancelled
+from validators import TableValidator
+from form_view import FieldForm
 import os
 import json
-import time
+import threading
 
 class DBFormApp(tk.Frame):
-    def __init__(self, parent, db_type, db_handler, auth):
+    HISTORY_BODY_LIMIT = 1024 * 1024
+
+    def __init__(self, parent, db_type, db_handler, auth, schema=None, http_engine=None):
         super().__init__(parent)
         self.root = parent
         self.dbtype = db_type
-        self.dbconnector = DBConnector(db_type, db_handler)
+        self.schema = schema
+        self.dbconnector = DBConnector(db_type, db_handler, schema=schema)
         self.auth = auth  # ✅ Use the passed-in ApiAuth
+        self._http_engine = http_engine
 
         self.method_var = tk.StringVar(value="GET")
         self.api_path_var = tk.StringVar()
         self.table_var = tk.StringVar()
+        self.status_var = tk.StringVar()
 
-        self.fields_frame = None
         self.inputs = {}
-        self.error_labels = {}
-        self.history_file = "request_history.json"
+        self.columns_table = None
+        self.column_types = {}
+        self.validator = None
+
+        # All DB I/O runs here; results come back on the Tk thread
+        self.runner = BackgroundRunner(self)
+        self.bind("<Destroy>", self._on_destroy)
+        self.history_file = "request_history.json"  # legacy format, imported once
+        self.history_db = DEFAULT_HISTORY_PATH
+        self._history = None
+        self._history_lock = threading.Lock()
+        self.bulk_results_file = "bulk_results.db"
+        self.bulk_store = None
+        self.bulk_runner = None
+        self.bulk_query_var = tk.StringVar()
+        self.bulk_concurrency_var = tk.StringVar(value="20")
+        self.bulk_status_var = tk.StringVar()
+        self.bulk_profile_var = tk.BooleanVar(value=False)
+        self._bulk_profiling = False
+        self.export_status_var = tk.StringVar()
+        self.export_progress = None
+        self._export_cancel = None
+        self.table_export_status_var = tk.StringVar()
+        self.table_export_progress = None
+        self._table_export_cancel = None
+        self.import_batch_var = tk.StringVar(value="5000")
+        self.import_status_var = tk.StringVar()
+        self.importer = None
 
         icon_path = os.path.join("resources", "export.png")
         self.export_icon = PhotoImage(file=icon_path)
@@ -45,6 +84,18 @@ class DBFormApp(tk.Frame):
         ttk.Entry(path_frame, textvariable=self.api_path_var, width=30).pack(side=tk.LEFT)
         ttk.Button(path_frame, text="Send", command=self.send_request).pack(side=tk.LEFT, padx=(5, 0))
 
+        # Bulk mode: one request per row of the selected table (or SQL query)
+        bulk_frame = ttk.Frame(self.root)
+        bulk_frame.pack(pady=5, fill=tk.X)
+        ttk.Label(bulk_frame, text="Bulk SQL (optional):").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Entry(bulk_frame, textvariable=self.bulk_query_var, width=30).pack(side=tk.LEFT)
+        ttk.Label(bulk_frame, text="Concurrency:").pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Spinbox(bulk_frame, from_=1, to=500, textvariable=self.bulk_concurrency_var, width=5).pack(side=tk.LEFT)
+        ttk.Button(bulk_frame, text="Bulk Run", command=self.start_bulk_run).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(bulk_frame, text="Cancel", command=self.cancel_bulk_run).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Checkbutton(bulk_frame, text="Profile", variable=self.bulk_profile_var).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(bulk_frame, textvariable=self.bulk_status_var).pack(side=tk.LEFT, padx=(5, 0))
+
         
         table_frame = ttk.Frame(self.root)
         table_frame.pack(pady=5, fill=tk.X)
@@ -52,24 +103,28 @@ class DBFormApp(tk.Frame):
         self.table_dropdown = ttk.Combobox(table_frame, textvariable=self.table_var, state="readonly")
         self.table_dropdown.pack()
         self.table_dropdown.bind("<<ComboboxSelected>>", self.load_columns)
-         # Scrollable input frame
-        container = ttk.Frame(self)
-        container.pack(fill="both", expand=True, padx=10, pady=10)
-
-        self.canvas = tk.Canvas(container)
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.canvas.yview)
-        self.fields_frame = ttk.Frame(self.canvas)  # This is your scrollable content
-
-        self.fields_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
-
-        self.canvas.create_window((0, 0), window=self.fields_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        ttk.Button(table_frame, text="Refresh Schema", command=self.refresh_schema).pack(pady=(5, 0))
+        table_export_frame = ttk.Frame(table_frame)
+        table_export_frame.pack(pady=(5, 0))
+        ttk.Button(table_export_frame, text="Export Table…", command=self.export_table).pack(side=tk.LEFT)
+        self.table_export_cancel_btn = ttk.Button(table_export_frame, text="Cancel",
+                                                  command=self.cancel_table_export, state="disabled")
+        self.table_export_cancel_btn.pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(table_export_frame, textvariable=self.table_export_status_var).pack(side=tk.LEFT, padx=(5, 0))
+        import_frame = ttk.Frame(table_frame)
+        import_frame.pack(pady=(5, 0))
+        ttk.Button(import_frame, text="Import File…", command=self.import_file).pack(side=tk.LEFT)
+        ttk.Label(import_frame, text="Batch:").pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Spinbox(import_frame, from_=100, to=100000, increment=1000, textvariable=self.import_batch_var,
+                    width=7).pack(side=tk.LEFT)
+        self.import_cancel_btn = ttk.Button(import_frame, text="Cancel", command=self.cancel_import,
+                                            state="disabled")
+        self.import_cancel_btn.pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(import_frame, textvariable=self.import_status_var).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(table_frame, textvariable=self.status_var, foreground="gray").pack()
+        # Only the rows in view are built; wide tables reuse the same widgets
+        self.form = FieldForm(self)
+        self.form.pack(fill="both", expand=True, padx=10, pady=10)
 
         response_frame = ttk.Frame(self.root)
         response_frame.pack(pady=(10, 0), fill=tk.BOTH, expand=True)
@@ -77,37 +132,73 @@ class DBFormApp(tk.Frame):
         header_frame = ttk.Frame(response_frame)
         header_frame.pack(fill=tk.X)
         ttk.Label(header_frame, text="Response:").pack(side=tk.LEFT, padx=5)
+        self.response_info_var = tk.StringVar()
+        ttk.Label(header_frame, textvariable=self.response_info_var).pack(side=tk.LEFT, padx=5)
         self.export_btn = ttk.Button(header_frame, image=self.export_icon, command=self.export_response, state="disabled")
         self.export_btn.pack(side=tk.RIGHT, padx=5)
+        self.export_cancel_btn = ttk.Button(header_frame, text="Cancel Export", command=self.cancel_export,
+                                            state="disabled")
+        self.export_cancel_btn.pack(side=tk.RIGHT)
+        ttk.Label(header_frame, textvariable=self.export_status_var).pack(side=tk.RIGHT, padx=5)
 
-        response_scroll = ttk.Scrollbar(response_frame)
-        response_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.response_text = tk.Text(response_frame, height=10, width=50, yscrollcommand=response_scroll.set)
-        self.response_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.response_text.config(state=tk.DISABLED)
-        response_scroll.config(command=self.response_text.yview)
+        # Only the visible lines of the response are ever in the widget
+        self.response_view = ResponseViewer(response_frame, height=10, width=50)
+        self.response_view.pack(fill=tk.BOTH, expand=True)
 
         self.load_tables()
 
     def set_connection(self, conn):
-        self.dbconnector = DBConnector(self.dbtype, conn)
+        self.dbconnector = DBConnector(self.dbtype, conn, schema=self.schema)
         self.load_tables()
 
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.cancel_bulk_run()
+            self.cancel_export()
+            self.cancel_table_export()
+            self.cancel_import()
+            self.runner.shutdown()
+
+    def _set_loading(self, message):
+        self.status_var.set(message)
+        self.config(cursor="watch" if message else "")
+
     def load_tables(self):
         if not self.dbconnector.get_connection():
             self.table_dropdown['values'] = []
             return
-        try:
-            tables = self.dbconnector.get_table_names()
-        except Exception as e:
-            messagebox.showerror("DB Error", f"Failed to load tables:\n{e}")
-            tables = []
+        self._set_loading("Loading tables…")
+        self.runner.submit("tables", self._fetch_tables, self._on_tables_loaded, self._on_tables_failed)
+
+    def _fetch_tables(self):
+        # Runs on a worker thread
+        self._prefetch_schema()
+        return self.dbconnector.get_table_names()
+
+    def _on_tables_loaded(self, tables):
+        self._set_loading("")
         self.table_dropdown['values'] = tables
         if tables:
             self.table_var.set(tables[0])
             self.load_columns()
 
+    def _on_tables_failed(self, e):
+        self._set_loading("")
+        messagebox.showerror("DB Error", f"Failed to load tables:\n{e}")
+        self.table_dropdown['values'] = []
+
+    def _prefetch_schema(self):
+        # One bulk catalog query; table and column lookups are then answered from it
+        try:
+            self.dbconnector.get_schema()
+        except Exception as e:
+            print(f"Schema prefetch failed: {e}")
+
+    def refresh_schema(self):
+        # Drop cached catalog metadata and reload from the database
+        self.dbconnector.refresh_schema()
+        self.load_tables()
+
     def on_method_change(self, event=None):
         if self.table_var.get():
             self.load_columns()
@@ -117,71 +208,57 @@ class DBFormApp(tk.Frame):
         method = self.method_var.get()
         if not self.dbconnector.get_connection():
             return
-        try:
-            columns = self.dbconnector.get_table_columns(table) or []
-        except Exception as e:
-            messagebox.showerror("DB Error", f"Failed to load columns for {table}:\n{e}")
-            columns = []
+        self._set_loading(f"Loading columns for {table}…")
+        # Re-submitting under the same key drops the result of a stale lookup
+        # when the user switches tables quickly
+        self.runner.submit(
+            "columns",
+            self._load_table_meta,
+            lambda meta: self._on_columns_loaded(table, method, meta[0] or [], meta[1]),
+            lambda e: self._on_columns_failed(table, method, e),
+            table,
+        )
+
+    def _load_table_meta(self, table):
+        # Worker thread: the column list plus the table's compiled validator
+        columns = self.dbconnector.get_table_columns(table)
+        return columns, self.dbconnector.get_validator(table)
+
+    def _on_columns_failed(self, table, method, e):
+        messagebox.showerror("DB Error", f"Failed to load columns for {table}:\n{e}")
+        self._on_columns_loaded(table, method, [])
+
+    def _on_columns_loaded(self, table, method, columns, validator=None):
+        self._set_loading("")
+        self.columns_table = table
+        self.column_types = dict(columns)
+        self.validator = validator or TableValidator.from_pairs(columns)
 
         if method in ["POST", "PUT"]:
             audit_keywords = ['created', 'updated', 'modified', 'timestamp', 'status', 'deleted']
             columns = [(name, dtype) for name, dtype in columns
                        if not any(keyword in (name or "").lower() for keyword in audit_keywords)]
 
-        # Clear previous field frame from canvas
-        for widget in self.fields_frame.winfo_children():
-            widget.destroy()
-
-        self.fields_frame = ttk.Frame(self.canvas)
-        self.canvas.create_window((0, 0), window=self.fields_frame, anchor="nw")
-
-
-        self.inputs = {}
-        self.error_labels = {}
-
-        for col_name, col_type in columns:
-            ttk.Label(self.fields_frame, text=f"{col_name} ({col_type})").pack()
-            entry = ttk.Entry(self.fields_frame)
-            entry.pack()
-            self.inputs[col_name] = entry
-            error_label = ttk.Label(self.fields_frame, text="", foreground="red")
-            error_label.pack()
-            self.error_labels[col_name] = error_label
-        
-        # Ensure canvas scrollregion updates
-        self.fields_frame.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.inputs = self.form.set_fields([(name, f"{name} ({dtype})") for name, dtype in columns])
 
+    @traced("ui.validate_inputs", "ui")
     def validate_inputs(self):
         errors = []
         table = self.table_var.get()
-        for label in self.error_labels.values():
-            label.config(text="")
-        try:
-            columns = self.dbconnector.get_table_columns(table)
-        except:
-            return ["Unable to fetch column types for validation."]
-        for col_name, entry in self.inputs.items():
-            value = entry.get().strip()
-            if not value:
-                continue
-            col_type = next((dtype for name, dtype in columns if name == col_name), None)
-            if not col_type:
-                continue
-            error_msg = ""
-            if "int" in col_type.lower() and not value.isdigit():
-                error_msg = f"{col_name} must be an integer."
-            elif "float" in col_type.lower() or "double" in col_type.lower():
-                try:
-                    float(value)
-                except ValueError:
-                    error_msg = f"{col_name} must be a float."
-            elif "date" in col_type.lower():
-                if not re.match(r"\d{4}-\d{2}-\d{2}", value):
-                    error_msg = f"{col_name} must be YYYY-MM-DD."
-            if error_msg:
-                self.error_labels[col_name].config(text=error_msg)
-                errors.append(error_msg)
+        self.form.clear_errors()
+        # The validator comes from the last load_columns(); no catalog query on Send
+        if self.columns_table != table:
+            message = "Column types are still loading; try again."
+            self.status_var.set(message)
+            return [message]
+        values = {col_name: var.get().strip() for col_name, var in self.inputs.items()}
+        invalid = self.validator.validate(values, require=self.method_var.get() == "POST")
+        for col_name, reason in invalid.items():
+            error_msg = f"{col_name} {reason}."
+            self.form.set_error(col_name, error_msg)
+            errors.append(error_msg)
+        if invalid:
+            self.form.show_field(next(iter(invalid)))
         return errors
 
     # Delegate to ApiAuth instance
@@ -191,102 +268,367 @@ class DBFormApp(tk.Frame):
     def build_basic_auth(self):
         return self.auth.build_basic_auth()
 
+    @property
+    def http_engine(self):
+        # Shared app-wide engine, started on first use
+        if self._http_engine is None:
+            self._http_engine = get_engine()
+        return self._http_engine
+
+    @traced("ui.send_request", "ui")
     def send_request(self):
-        self.response_text.config(state=tk.NORMAL)
-        self.response_text.delete("1.0", tk.END)
-        self.response_text.config(state=tk.DISABLED)
+        self.response_view.set_text("")
+        self.response_info_var.set("")
         self.export_btn.config(state="disabled")
         if self.validate_inputs():
             return
-        asyncio.run(self._perform_request())
+        request = self._collect_request()
+        if request["method"] == "GET" and not request["params"]:
+            self._update_response("Error: At least one search parameter is required.\n")
+            return
+        self._update_response("Sending…")
+        # Runs on the engine loop; a second Send cancels the one in flight
+        future = self.http_engine.submit(self._perform_request(request))
+        self.runner.watch("send", future, self._on_response, lambda e: self._update_response(f"Error: {str(e)}"))
+
+    @traced("ui.collect_request", "ui")
+    def _collect_request(self):
+        # Tk variables and widgets are only read here, on the Tk thread
+        return {
+            "method": self.method_var.get(),
+            "url": self.api_path_var.get().strip(),
+            "payload": {col: var.get() for col, var in self.inputs.items()},
+            "params": {col: var.get().strip() for col, var in self.inputs.items() if var.get().strip()},
+            "headers": self.auth.build_headers(),
+            "auth": self.auth.build_auth(),
+        }
 
-    async def _perform_request(self):
-        method = self.method_var.get()
-        url = self.api_path_var.get().strip()
-        payload = {col: entry.get() for col, entry in self.inputs.items()}
-        params = {col: entry.get().strip() for col, entry in self.inputs.items() if entry.get().strip()}
-        headers = self.auth.build_headers()
-        auth = self.auth.build_basic_auth()
-        print("Headers:", headers)
-        print("Auth:", auth)
+    @traced("http.request", "http")
+    async def _perform_request(self, request):
+        method = request["method"]
+        url = request["url"]
+        payload = request["payload"]
+        params = request["params"]
+        headers = request["headers"]
+        auth = request["auth"]
+        client = self.http_engine.client
+
+        if method in ("GET", "DELETE"):
+            http_request = client.build_request(method, url, params=params, headers=headers)
+        elif method in ("POST", "PUT"):
+            http_request = client.build_request(method, url, json=payload, headers=headers)
+        else:
+            raise ValueError("Unsupported method")
+
+        with span("auth.prepare", "auth"):
+            await prepare_auth(auth)
+        timing = RequestTiming()
+        http_request.extensions["trace"] = timing.atrace
+        # Stream the body to a spooled temp file instead of holding it in memory
+        HTTP_IN_FLIGHT.inc(("send",))
         try:
-            async with httpx.AsyncClient() as client:
-                t0 = time.perf_counter()
-                if method == "GET":
-                    if not params:
-                        self._update_response("Error: At least one search parameter is required.\n")
-                        return
-                    response = await client.get(url, params=params, headers=headers, auth=auth, timeout=10)
-                elif method == "POST":
-                    response = await client.post(url, json=payload, headers=headers, auth=auth, timeout=10)
-                elif method == "PUT":
-                    response = await client.put(url, json=payload, headers=headers, auth=auth, timeout=10)
-                elif method == "DELETE":
-                    response = await client.delete(url, params=params, headers=headers, auth=auth, timeout=10)
-                else:
-                    raise ValueError("Unsupported method")
-                t1 = time.perf_counter()
-
-                try:
-                    parsed = response.json()
-                    formatted = json.dumps(parsed, indent=2)
-                    result = formatted
-                except:
-                    result = response.text[:1000] + "\n\n[Truncated]" if len(response.text) > 1000 else response.text
-                t2 = time.perf_counter()
-
-                duration_ms = round((t1 - t0) * 1000, 2)
-                parse_ms = round((t2 - t1) * 1000, 2)
-
-                self._update_response(f"Status: {response.status_code}\nTime: {duration_ms} ms\nParse: {parse_ms} ms\n\n{result}")
-                self.response_text.after(0, lambda: self.export_btn.config(state="normal"))
-                self.save_history(method, url, payload, result)
-
+            with span("http.send", "http", method=method, url=url):
+                response = await client.send(http_request, auth=auth, stream=True)
+            body = ResponseBody(response.headers.get("content-type", ""), response.charset_encoding)
+            try:
+                with span("http.download", "http"):
+                    async for chunk in response.aiter_bytes():
+                        body.write(chunk)
+            except BaseException:
+                body.close()
+                raise
+            finally:
+                await response.aclose()
         except Exception as e:
-            self._update_response(f"Error: {str(e)}")
+            HTTP_REQUESTS.inc(("send", method, e.__class__.__name__))
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec(("send",))
+        timing = timing.finish().as_dict()
+        HTTP_REQUESTS.inc(("send", method, str(response.status_code)))
+        HTTP_LATENCY.observe(timing["total"] / 1000, ("send",))
+
+        return {
+            "request": request,
+            "status": response.status_code,
+            "duration_ms": timing["total"],
+            "timing": timing,
+            "body": body,
+            "text": f"Status: {response.status_code}   Time: {timing['total']} ms   Size: {body.size:,} bytes\n"
+                    f"{format_timing(timing)}",
+        }
+
+    @traced("ui.render_response", "ui")
+    def _on_response(self, outcome):
+        request = outcome["request"]
+        body = outcome["body"]
+        self.response_info_var.set(outcome["text"])
+        # History keeps the raw body, up to HISTORY_BODY_LIMIT bytes
+        response_text = body.head_text(self.HISTORY_BODY_LIMIT)
+        self.response_view.show(body)
+        # Formatting runs off the Tk thread; the viewer fills in as lines arrive
+        self.runner.submit("format", body.finish, self._on_response_formatted, self._on_format_failed)
+        self.runner.submit(None, self.save_history, lambda _: None, None,
+                           request["method"], request["url"], request["payload"], response_text,
+                           outcome["status"], outcome["duration_ms"], outcome["timing"])
+
+    def _on_response_formatted(self, body):
+        if body is self.response_view.body:
+            self.response_view.refresh()
+            self.export_btn.config(state="normal")
+
+    def _on_format_failed(self, e):
+        if not self.response_view.body.closed:
+            self.response_info_var.set(f"{self.response_info_var.get()}   (display failed: {e})")
+
+    def start_bulk_run(self):
+        if self.bulk_runner is not None:
+            return
+        request = self._collect_request()
+        table = self.table_var.get()
+        query = self.bulk_query_var.get().strip() or None
+        if not request["url"] or not (table or query):
+            self.bulk_status_var.set("API path and a table or query are required.")
+            return
+        try:
+            concurrency = max(1, int(self.bulk_concurrency_var.get()))
+        except ValueError:
+            self.bulk_status_var.set("Concurrency must be an integer.")
+            return
+        if self.bulk_store is None:
+            self.bulk_store = BulkResultsStore(self.bulk_results_file)
+
+        engine = self.http_engine
+        self.bulk_runner = BulkRunner(engine.client, self.bulk_store, concurrency=concurrency,
+                                      headers=request["headers"], auth=request["auth"],
+                                      auth_source=self.auth)
+        # The generator only touches the database once the runner starts pulling from it
+        batches = self.dbconnector.iter_row_batches(table_name=None if query else table, query=query)
+        # A session-wide profile (HACKZILLA_PROFILE) already covers the run
+        self._bulk_profiling = self.bulk_profile_var.get() and not profiler.enabled
+        if self._bulk_profiling:
+            profiler.start()
+        future = engine.submit(self.bulk_runner.run(batches, request["method"], request["url"]))
+        self.runner.watch("bulk", future, self._on_bulk_done, self._on_bulk_failed)
+        self._poll_bulk()
+
+    def cancel_bulk_run(self):
+        if self.bulk_runner is not None:
+            self.bulk_runner.cancel()
+
+    def _poll_bulk(self):
+        runner = self.bulk_runner
+        if runner is None:
+            return
+        self.bulk_status_var.set(runner.progress.as_text())
+        self.after(250, self._poll_bulk)
+
+    def _on_bulk_done(self, summary):
+        runner, self.bulk_runner = self.bulk_runner, None
+        by_status = ", ".join(f"{status or 'error'}: {s['count']} (avg {s['avg_ms']} ms)"
+                              for status, s in summary.items())
+        self.bulk_status_var.set(f"{runner.progress.as_text()} — {by_status}")
+        self._write_bulk_profile(runner)
+
+    def _on_bulk_failed(self, e):
+        runner, self.bulk_runner = self.bulk_runner, None
+        self.bulk_status_var.set(f"Bulk run failed: {e}")
+        self._write_bulk_profile(runner)
+
+    def _write_bulk_profile(self, runner):
+        if not self._bulk_profiling:
+            return
+        self._bulk_profiling = False
+        profiler.stop()
+        status = self.bulk_status_var.get()
+        # Serializing a long run's spans takes a while; keep it off the Tk thread
+        self.runner.submit(None, profiler.write,
+                           lambda path: self.bulk_status_var.set(f"{status} — profile: {path}"),
+                           lambda e: self.bulk_status_var.set(f"{status} — profile not saved: {e}"),
+                           f"bulk_profile_{runner.run_id}.json")
 
     def _update_response(self, text):
-        def update():
-            self.response_text.config(state=tk.NORMAL)
-            self.response_text.delete("1.0", tk.END)
-            self.response_text.insert(tk.END, text)
-            self.response_text.config(state=tk.DISABLED)
-        self.response_text.after(0, update)
+        self.response_view.after(0, self.response_view.set_text, text)
 
     def export_response(self):
+        body = self.response_view.body
+        if body is None or self.export_progress is not None:
+            return
         file_path = filedialog.asksaveasfilename(
-            defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("JSON files", "*.json"), ("All files", "*.*")],
+            defaultextension=".json",
+            filetypes=[("Raw response", "*.json *.txt"), ("CSV (JSON array)", "*.csv"),
+                       ("NDJSON (JSON array)", "*.ndjson *.jsonl"), ("Excel (JSON array)", "*.xlsx"),
+                       ("All files", "*.*")],
             title="Save Response As"
         )
+        if not file_path:
+            return
+        fmt = format_for_path(file_path)
+        if fmt and body.head(4096).lstrip(b" \t\r\n\xef\xbb\xbf")[:1] != b"[":
+            messagebox.showerror("Export Failed", "Only a JSON array response can be exported as records.")
+            return
 
-        if file_path:
-            try:
-                content = self.response_text.get("1.0", tk.END).strip()
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                messagebox.showinfo("Export Successful", f"Response saved to:\n{file_path}")
-            except Exception as e:
-                messagebox.showerror("Export Failed", f"Could not save file:\n{e}")
-
-    def save_history(self, method, url, payload, response_text):
-        entry = {
-            "method": method,
-            "url": url,
-            "payload": payload,
-            "response": response_text,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
+        self.export_progress = ExportProgress()
+        self._export_cancel = threading.Event()
+        self.export_cancel_btn.config(state="normal")
+        self.runner.submit("export", self._export_body, self._on_export_done, self._on_export_failed,
+                           body, file_path, fmt, self.export_progress, self._export_cancel)
+        self._poll_export()
+
+    def _export_body(self, body, file_path, fmt, progress, cancel):
+        # Runs on a worker thread, reading the stored body rather than the widget
+        if fmt:
+            export_json_records(body.iter_raw, file_path, fmt, progress, cancel)
+        else:
+            export_raw(body.iter_raw(), file_path, progress, cancel)
+        if body.closed:
+            os.remove(file_path)
+            raise ValueError("The response was replaced before the export finished.")
+        return file_path
+
+    def cancel_export(self):
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+
+    def _poll_export(self):
+        progress = self.export_progress
+        if progress is None:
+            return
+        self.export_status_var.set(progress.as_text())
+        self.after(250, self._poll_export)
+
+    def _end_export(self, message):
+        self.export_progress = None
+        self._export_cancel = None
+        self.export_cancel_btn.config(state="disabled")
+        self.export_status_var.set(message)
+
+    def _on_export_done(self, file_path):
+        self._end_export("")
+        messagebox.showinfo("Export Successful", f"Response saved to:\n{file_path}")
+
+    def _on_export_failed(self, e):
+        if isinstance(e, ExportCancelled):
+            self._end_export("Export cancelled.")
+            return
+        self._end_export("")
+        messagebox.showerror("Export Failed", f"Could not save file:\n{e}")
+
+    def export_table(self):
+        table = self.table_var.get()
+        if not table or self.table_export_progress is not None:
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv", initialfile=f"{table}.csv",
+            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("NDJSON files", "*.ndjson *.jsonl")],
+            title="Export Table As"
+        )
+        if not file_path:
+            return
+        self.table_export_progress = ExportProgress()
+        self._table_export_cancel = threading.Event()
+        self.table_export_cancel_btn.config(state="normal")
+        self.runner.submit("table_export", self._export_table_rows, self._on_table_export_done,
+                           self._on_table_export_failed, table, file_path,
+                           format_for_path(file_path) or "csv", self.table_export_progress,
+                           self._table_export_cancel)
+        self._poll_table_export()
+
+    def _export_table_rows(self, table, file_path, fmt, progress, cancel):
+        # Runs on a worker thread; the cursor is created and drained here
+        try:
+            progress.total = self.dbconnector.estimate_row_count(table)
+        except Exception:
+            progress.total = None
+        try:
+            # The header when there are no rows to take it from
+            columns = [name for name, _ in self.dbconnector.get_schema().columns(table)]
+        except Exception:
+            columns = None
+        batches = self.dbconnector.iter_row_batches(table_name=table, batch_size=5000)
+        return export_rows(batches, file_path, fmt, progress, cancel, columns=columns)
+
+    def cancel_table_export(self):
+        if self._table_export_cancel is not None:
+            self._table_export_cancel.set()
+
+    def _poll_table_export(self):
+        progress = self.table_export_progress
+        if progress is None:
+            return
+        self.table_export_status_var.set(progress.as_text())
+        self.after(250, self._poll_table_export)
+
+    def _end_table_export(self, message):
+        self.table_export_progress = None
+        self._table_export_cancel = None
+        self.table_export_cancel_btn.config(state="disabled")
+        self.table_export_status_var.set(message)
+
+    def _on_table_export_done(self, count):
+        self._end_table_export(f"Exported {count:,} rows.")
+
+    def _on_table_export_failed(self, e):
+        self._end_table_export("Export cancelled." if isinstance(e, ExportCancelled) else f"Export failed: {e}")
+
+    def import_file(self):
+        table = self.table_var.get()
+        if not table or self.importer is not None:
+            return
+        file_path = filedialog.askopenfilename(
+            filetypes=[("CSV or Excel files", "*.csv *.xlsx"), ("All files", "*.*")],
+            title=f"Import into {table}"
+        )
+        if not file_path:
+            return
+        try:
+            batch_size = int(self.import_batch_var.get())
+        except ValueError:
+            batch_size = 5000
+        self.importer = BulkImporter(self.dbconnector, table, batch_size=batch_size)
+        self.import_cancel_btn.config(state="normal")
+        self.runner.submit("table_import", self.importer.run, self._on_import_done,
+                           self._on_import_failed, file_path)
+        self._poll_import()
+
+    def cancel_import(self):
+        if self.importer is not None:
+            self.importer.cancel()
+
+    def _poll_import(self):
+        if self.importer is None:
+            return
+        self.import_status_var.set(self.importer.progress.as_text())
+        self.after(250, self._poll_import)
+
+    def _end_import(self, message):
+        self.importer = None
+        self.import_cancel_btn.config(state="disabled")
+        self.import_status_var.set(message)
+
+    def _on_import_done(self, result):
+        self._end_import(result.as_text())
+
+    def _on_import_failed(self, e):
+        self._end_import("Import cancelled, nothing was written." if isinstance(e, ImportCancelled)
+                         else f"Import failed: {e}")
+
+    @property
+    def history(self):
+        # Opened on first use, from whichever worker thread saves first
+        with self._history_lock:
+            if self._history is None:
+                store = HistoryStore(self.history_db)
+                if store.count() == 0:
+                    store.import_json(self.history_file)
+                self._history = store
+            return self._history
+
+    @traced("history.save", "history")
+    def save_history(self, method, url, payload, response_text, status=None, duration_ms=None, timing=None):
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, "r", encoding="utf-8") as f:
-                    history = json.load(f)
-            else:
-                history = []
-
-            history.append(entry)
-            with open(self.history_file, "w", encoding="utf-8") as f:
-                json.dump(history[-50:], f, indent=2)  # Keep last 50 entries
+            self.history.append(method, url, payload=payload, response=response_text,
+                                status=status, duration_ms=duration_ms, timing=timing)
         except Exception as e:
             print(f"History save failed: {e}")
 
@@ -0,0 +1,218 @@
+# db_pool.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class Driver:
+    """
+    A database driver plugin: knows how to open a connection from the
+    generic connection fields (host, port, user, password, database) and
+    how to check that an open connection is still usable.
+    """
+    def __init__(self, name, connect, ping_query="SELECT 1", aliases=()):
+        self.name = name
+        self._connect = connect
+        self.ping_query = ping_query
+        self.aliases = tuple(aliases)
+
+    def connect(self, **params):
+        return self._connect(**params)
+
+    def ping(self, conn):
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.ping_query)
+            cursor.fetchall()
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def reset(self, conn):
+        # End whatever transaction the borrower left open (catalog reads
+        # start one implicitly on psycopg2 and mysql-connector)
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+
+
+_DRIVERS = {}
+
+
+def register_driver(driver):
+    _DRIVERS[driver.name] = driver
+    for alias in driver.aliases:
+        _DRIVERS[alias] = driver
+    return driver
+
+
+def get_driver(name):
+    try:
+        return _DRIVERS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported database type: {name}")
+
+
+def available_drivers():
+    return sorted({d.name for d in _DRIVERS.values()})
+
+
+def _clean(params):
+    return {k: v for k, v in params.items() if v not in (None, "")}
+
+
+def _connect_postgresql(host=None, port=None, user=None, password=None, database=None):
+    import psycopg2
+    return psycopg2.connect(**_clean(dict(host=host, port=port, user=user,
+                                          password=password, dbname=database)))
+
+
+def _connect_mysql(host=None, port=None, user=None, password=None, database=None):
+    import mysql.connector
+    return mysql.connector.connect(**_clean(dict(host=host, port=int(port) if port else None,
+                                                 user=user, password=password, database=database)))
+
+
+def _connect_sqlite(host=None, port=None, user=None, password=None, database=None):
+    import sqlite3
+    # Pooled connections are handed to worker threads
+    return sqlite3.connect(database or ":memory:", check_same_thread=False)
+
+
+register_driver(Driver("postgresql", _connect_postgresql, aliases=("postgres",)))
+register_driver(Driver("mysql", _connect_mysql))
+register_driver(Driver("sqlite", _connect_sqlite))
+# Other backends plug in with register_driver() once DBConnector has
+# catalog queries for them
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections for one driver.
+
+    `min_size` connections are opened up front (so a bad configuration fails
+    immediately); up to `max_size` are opened on demand. Connections that
+    sat idle for longer than `health_check_interval` seconds are pinged on
+    checkout and transparently replaced if they are dead.
+    """
+    def __init__(self, driver, params=None, min_size=1, max_size=5, timeout=30,
+                 health_check_interval=5.0):
+        if isinstance(driver, str):
+            driver = get_driver(driver)
+        if min_size > max_size:
+            raise ValueError("min_size cannot exceed max_size")
+        self.driver = driver
+        self.params = dict(params or {})
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()  # (conn, returned_at)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        for _ in range(min_size):
+            self._idle.append((self._open(), time.monotonic()))
+
+    @property
+    def db_type(self):
+        return self.driver.name
+
+    def _open(self):
+        conn = self.driver.connect(**self.params)
+        with self._cond:
+            self._size += 1
+        return conn
+
+    def _discard(self, conn):
+        self._size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, returned_at):
+        if self.health_check_interval is None:
+            return True
+        if time.monotonic() - returned_at < self.health_check_interval:
+            return True
+        try:
+            self.driver.ping(conn)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    if self._idle:
+                        conn, returned_at = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Reserve the slot, then connect without holding the lock
+                        self._size += 1
+                        conn = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No connection available within {timeout}s")
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                try:
+                    return self.driver.connect(**self.params)
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            # Ping outside the lock too; a dead connection frees its slot
+            if self._healthy(conn, returned_at):
+                return conn
+            with self._cond:
+                self._discard(conn)
+                self._cond.notify()
+
+    def release(self, conn):
+        self.driver.reset(conn)
+        with self._cond:
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "max_size": self.max_size}
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
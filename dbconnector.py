@@ -1,34 +1,377 @@
-import psycopg2
-import mysql.connector
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from db_pool import ConnectionPool
+from metrics import DB_QUERY_SECONDS
+from profiling import span, traced
+from schema_model import Schema
+from validators import TableValidator
+
+
+class SchemaCache:
+    """
+    TTL + LRU cache for catalog metadata (table lists, column lists).
+    Entries expire after `ttl` seconds; the least recently used entry is
+    evicted once `max_entries` is exceeded. Thread-safe.
+    """
+    def __init__(self, ttl=300, max_entries=256, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader):
+        """
+        Return the cached value for `key`, calling `loader()` on a miss or
+        when the entry has expired.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if self.ttl is None or now < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            expires_at = now + self.ttl if self.ttl is not None else None
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """Return a live cached value without loading or touching the counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                return None
+            return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when `key` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
 
 class DBConnector:
-    def __init__(self, db_type, connection):
+    # One catalog query per backend; each returns normalized rows of
+    # (table, column, data_type, nullable, max_length, precision, scale,
+    #  is_primary_key, fk_table, fk_column) ordered by table and position.
+    # Server-side queries take the target schema as their only parameter and
+    # fall back to current_schema() / DATABASE() when it is NULL.
+    SCHEMA_QUERIES = {
+        "sqlite": """
+            SELECT m.name, p.name, p.type, p."notnull" = 0,
+                   NULL, NULL, NULL, p.pk > 0, f."table", f."to"
+            FROM sqlite_master m
+            JOIN pragma_table_info(m.name) p
+            LEFT JOIN pragma_foreign_key_list(m.name) f ON f."from" = p.name
+            WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+            ORDER BY m.name, p.cid;""",
+        "postgresql": """
+            SELECT c.table_name, c.column_name, c.data_type, c.is_nullable = 'YES',
+                   c.character_maximum_length, c.numeric_precision, c.numeric_scale,
+                   tc.constraint_type = 'PRIMARY KEY', ccu.table_name, ccu.column_name
+            FROM information_schema.columns c
+            LEFT JOIN information_schema.key_column_usage kcu
+              ON kcu.table_schema = c.table_schema AND kcu.table_name = c.table_name
+             AND kcu.column_name = c.column_name
+            LEFT JOIN information_schema.table_constraints tc
+              ON tc.constraint_schema = kcu.constraint_schema
+             AND tc.constraint_name = kcu.constraint_name
+             AND tc.constraint_type IN ('PRIMARY KEY', 'FOREIGN KEY')
+            LEFT JOIN information_schema.constraint_column_usage ccu
+              ON tc.constraint_type = 'FOREIGN KEY'
+             AND ccu.constraint_schema = tc.constraint_schema
+             AND ccu.constraint_name = tc.constraint_name
+            WHERE c.table_schema = COALESCE(%s, current_schema())
+            ORDER BY c.table_name, c.ordinal_position;""",
+        "pg_catalog": """
+            SELECT c.relname, a.attname, pg_catalog.format_type(a.atttypid, NULL), NOT a.attnotnull,
+                   CASE WHEN a.atttypid IN (1042, 1043) AND a.atttypmod > 4 THEN a.atttypmod - 4 END,
+                   CASE WHEN a.atttypid = 1700 AND a.atttypmod > 4 THEN ((a.atttypmod - 4) >> 16) & 65535 END,
+                   CASE WHEN a.atttypid = 1700 AND a.atttypmod > 4 THEN (a.atttypmod - 4) & 65535 END,
+                   pk.conkey IS NOT NULL, fc.relname, fa.attname
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_catalog.pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+            LEFT JOIN pg_catalog.pg_constraint pk
+              ON pk.conrelid = c.oid AND pk.contype = 'p' AND a.attnum = ANY (pk.conkey)
+            LEFT JOIN pg_catalog.pg_constraint fk
+              ON fk.conrelid = c.oid AND fk.contype = 'f' AND a.attnum = ANY (fk.conkey)
+            LEFT JOIN pg_catalog.pg_class fc ON fc.oid = fk.confrelid
+            LEFT JOIN pg_catalog.pg_attribute fa
+              ON fa.attrelid = fk.confrelid AND fa.attnum = fk.confkey[array_position(fk.conkey, a.attnum)]
+            WHERE n.nspname = COALESCE(%s, current_schema()) AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+            ORDER BY c.relname, a.attnum;""",
+        "mysql": """
+            SELECT c.table_name, c.column_name,
+                   CASE WHEN c.data_type = 'enum' OR INSTR(c.column_type, 'unsigned') > 0 THEN c.column_type
+                        ELSE c.data_type END,
+                   c.is_nullable = 'YES',
+                   c.character_maximum_length, c.numeric_precision, c.numeric_scale,
+                   c.column_key = 'PRI', k.referenced_table_name, k.referenced_column_name
+            FROM information_schema.columns c
+            LEFT JOIN information_schema.key_column_usage k
+              ON k.table_schema = c.table_schema AND k.table_name = c.table_name
+             AND k.column_name = c.column_name AND k.referenced_table_name IS NOT NULL
+            WHERE c.table_schema = COALESCE(%s, DATABASE())
+            ORDER BY c.table_name, c.ordinal_position;""",
+    }
+
+    TABLE_QUERIES = {
+        "postgresql": """
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = COALESCE(%s, current_schema());""",
+        "pg_catalog": """
+            SELECT c.relname
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = COALESCE(%s, current_schema()) AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+            ORDER BY c.relname;""",
+        "mysql": """
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = %s;""",
+    }
+
+    COLUMN_QUERIES = {
+        "postgresql": """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = COALESCE(%s, current_schema()) AND table_name = %s
+            ORDER BY ordinal_position;""",
+        "pg_catalog": """
+            SELECT a.attname, pg_catalog.format_type(a.atttypid, NULL)
+            FROM pg_catalog.pg_attribute a
+            JOIN pg_catalog.pg_class c ON c.oid = a.attrelid
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = COALESCE(%s, current_schema()) AND c.relname = %s
+              AND a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY a.attnum;""",
+        "mysql": """
+            SELECT column_name,
+                   CASE WHEN data_type = 'enum' OR INSTR(column_type, 'unsigned') > 0 THEN column_type ELSE data_type END
+            FROM information_schema.columns
+            WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s
+            ORDER BY ordinal_position;""",
+    }
+
+    # Planner statistics: cheap on any table size, good enough for progress
+    ROW_ESTIMATE_QUERIES = {
+        "postgresql": """
+            SELECT c.reltuples::bigint
+            FROM pg_catalog.pg_class c
+            JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = COALESCE(%s, current_schema()) AND c.relname = %s;""",
+        "mysql": """
+            SELECT table_rows FROM information_schema.tables
+            WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s;""",
+    }
+
+    # Labels of user-defined enum types; MySQL enums carry theirs in column_type
+    ENUM_QUERIES = {
+        "postgresql": """
+            SELECT t.typname, e.enumlabel
+            FROM pg_catalog.pg_enum e
+            JOIN pg_catalog.pg_type t ON t.oid = e.enumtypid
+            ORDER BY t.typname, e.enumsortorder;""",
+    }
+
+    def __init__(self, db_type, connection, cache=None, cache_ttl=300, cache_size=256,
+                 schema=None, use_pg_catalog=True):
+        """
+        `connection` is either a DB-API connection or a `ConnectionPool`; with
+        a pool, every query borrows its own connection so callers on
+        different threads never share one.
+        `schema` selects the Postgres schema / MySQL database to introspect;
+        None means the connection's current one. With `use_pg_catalog`,
+        Postgres metadata is read from pg_catalog instead of the slower
+        information_schema views.
+        """
         self.conn = connection
         self.db_type = db_type.lower()
+        self.schema = schema
+        self.use_pg_catalog = use_pg_catalog
+        self.cache = cache if cache is not None else SchemaCache(ttl=cache_ttl, max_entries=cache_size)
 
     @staticmethod
     def filter_audit_columns(columns):
+        # Accepts (name, type) pairs or bare names (the SQLite PRAGMA path)
         audit_keywords = ['created', 'updated', 'modified', 'timestamp', 'status', 'deleted']
         return [
-            (name, dtype) for name, dtype in columns
-            if not any(keyword in name.lower() for keyword in audit_keywords)
+            column for column in columns
+            if not any(keyword in (column if isinstance(column, str) else column[0]).lower()
+                       for keyword in audit_keywords)
         ]
 
+    @contextmanager
+    def _borrow(self):
+        if isinstance(self.conn, ConnectionPool):
+            with self.conn.connection() as conn:
+                yield conn
+        else:
+            yield self.conn
+
+    def connection(self):
+        """
+        Context manager lending one connection (from the pool, if there is
+        one) for work that spans several statements, such as a bulk import.
+        """
+        return self._borrow()
+
+    def refresh_schema(self, table_name=None):
+        """
+        Invalidate cached schema metadata so the next lookup hits the database.
+        With `table_name`, only that table's columns are dropped.
+        """
+        if table_name is None:
+            self.cache.invalidate()
+        else:
+            self.cache.invalidate(("columns", table_name))
+            self.cache.invalidate(("validator", table_name))
+            self.cache.invalidate(("schema",))
+
+    def cache_stats(self):
+        return self.cache.stats()
+
+    @traced("db.get_schema", "db")
+    def get_schema(self):
+        """
+        Return a `Schema` with every table, column, type, nullability,
+        primary key and foreign key, fetched with a single catalog query.
+        Once loaded, `get_table_names()` and `get_table_columns()` are
+        answered from it as well.
+        """
+        return self.cache.get(("schema",), self._fetch_schema)
+
+    def _cached_schema(self):
+        return self.cache.peek(("schema",))
+
+    def _catalog_dialect(self):
+        if self.db_type in ("postgresql", "postgres"):
+            return "pg_catalog" if self.use_pg_catalog else "postgresql"
+        return self.db_type
+
+    @traced("db.query_schema", "db")
+    @DB_QUERY_SECONDS.time(("schema",))
+    def _fetch_schema(self):
+        dialect = self._catalog_dialect()
+        query = self.SCHEMA_QUERIES.get(dialect)
+        if query is None:
+            raise ValueError(f"Unsupported database type: {self.db_type}")
+        with self._borrow() as conn:
+            return self._run_schema_query(conn, dialect, query)
+
+    def _run_schema_query(self, conn, dialect, query):
+        cursor = conn.cursor()
+        try:
+            if dialect == "sqlite":
+                cursor.execute(query)
+            else:
+                cursor.execute(query, (self.schema,))
+            return Schema.from_rows(cursor.fetchall())
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    @traced("db.get_enum_types", "db")
+    def get_enum_types(self):
+        """{enum type name: [labels]} for Postgres; empty for other backends."""
+        query = self.ENUM_QUERIES.get("postgresql" if self.db_type == "postgres" else self.db_type)
+        if query is None:
+            return {}
+        return self.cache.get(("enums",), lambda: self._fetch_enum_types(query))
+
+    @traced("db.query_enum_types", "db")
+    @DB_QUERY_SECONDS.time(("enum_types",))
+    def _fetch_enum_types(self, query):
+        enums = {}
+        with self._borrow() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query)
+                for type_name, label in cursor.fetchall():
+                    enums.setdefault(type_name, []).append(label)
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+        return enums
+
+    @traced("db.get_validator", "db")
+    def get_validator(self, table_name):
+        """
+        A `TableValidator` for `table_name`, compiled from the schema once
+        and cached with it, so checking a form or an import batch costs no
+        database calls.
+        """
+        return self.cache.get(("validator", table_name), lambda: self._build_validator(table_name))
+
+    @traced("db.build_validator", "db")
+    def _build_validator(self, table_name):
+        dialect = "postgresql" if self.db_type == "postgres" else self.db_type
+        enums = self.get_enum_types()
+        table = self.get_schema().table(table_name)
+        if table is not None:
+            return TableValidator(table.columns, dialect, enums)
+        return TableValidator.from_pairs(self.get_table_columns(table_name), dialect, enums)
+
+    @traced("db.get_table_names", "db")
     def get_table_names(self):
         """
         Return a list of table names for the configured database type.
-        Expects `self.conn` to provide a `.cursor()` method that supports `.execute()` and `.fetchall()`.
+        Results are served from the schema cache; see `refresh_schema()`.
         """
-        cursor = self.conn.cursor()
+        schema = self._cached_schema()
+        if schema is not None:
+            return schema.table_names()
+        return list(self.cache.get(("tables",), self._fetch_table_names))
+
+    @traced("db.query_table_names", "db")
+    @DB_QUERY_SECONDS.time(("table_names",))
+    def _fetch_table_names(self):
+        with self._borrow() as conn:
+            return self._query_table_names(conn)
+
+    def _query_table_names(self, conn):
+        """
+        Expects `conn` to provide a `.cursor()` method that supports `.execute()` and `.fetchall()`.
+        """
+        cursor = conn.cursor()
         try:
             if self.db_type == "sqlite":
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%';")
             elif self.db_type in ("postgresql", "postgres"):
-                cursor.execute(
-                    "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';"
-                )
+                cursor.execute(self.TABLE_QUERIES[self._catalog_dialect()], (self.schema,))
             elif self.db_type == "mysql":
-                cursor.execute("SHOW TABLES;")
+                if self.schema is None:
+                    cursor.execute("SHOW TABLES;")
+                else:
+                    cursor.execute(self.TABLE_QUERIES["mysql"], (self.schema,))
             else:
                 raise ValueError(f"Unsupported database type: {self.db_type}")
 
@@ -43,31 +386,122 @@ class DBConnector:
     def get_connection(self):
         return self.conn
 
+    def quote_identifier(self, name):
+        if self.db_type == "mysql":
+            return "`" + name.replace("`", "``") + "`"
+        return '"' + name.replace('"', '""') + '"'
+
+    def iter_row_batches(self, table_name=None, query=None, params=None, batch_size=1000):
+        """
+        Stream rows from `table_name` (or an arbitrary SELECT `query`) in
+        batches of dicts, using a server-side cursor where the driver has one
+        (named cursor on Postgres, unbuffered cursor on MySQL), so memory
+        stays flat regardless of table size.
+
+        The connection stays borrowed until the generator is exhausted or
+        closed; callers should consume it on one thread.
+        """
+        if query is None:
+            if not table_name:
+                raise ValueError("Either table_name or query is required")
+            query = f"SELECT * FROM {self.quote_identifier(table_name)}"
+        with self._borrow() as conn:
+            if self.db_type in ("postgresql", "postgres"):
+                cursor = conn.cursor(name=f"hackzilla_stream_{id(conn):x}")
+                cursor.itersize = batch_size
+            elif self.db_type == "mysql":
+                cursor = conn.cursor(buffered=False)
+            elif self.db_type == "sqlite":
+                cursor = conn.cursor()
+            else:
+                raise ValueError(f"Unsupported database type: {self.db_type}")
+            try:
+                started = time.perf_counter()
+                with span("db.execute", "db"):
+                    if params is None:
+                        cursor.execute(query)
+                    else:
+                        cursor.execute(query, params)
+                    rows = cursor.fetchmany(batch_size)
+                DB_QUERY_SECONDS.observe(time.perf_counter() - started, ("execute",))
+                # Named Postgres cursors only describe themselves after the first fetch
+                names = [d[0] for d in cursor.description]
+                while rows:
+                    yield [dict(zip(names, row)) for row in rows]
+                    # Spans never cross a yield; the consumer's context differs
+                    started = time.perf_counter()
+                    with span("db.fetch_batch", "db"):
+                        rows = cursor.fetchmany(batch_size)
+                    DB_QUERY_SECONDS.observe(time.perf_counter() - started, ("fetch_batch",))
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    # An unbuffered MySQL cursor abandoned mid-stream leaves
+                    # unread rows on the connection
+                    consume = getattr(conn, "consume_results", None)
+                    if consume is not None:
+                        try:
+                            consume()
+                        except Exception:
+                            pass
+
+    def estimate_row_count(self, table_name):
+        """
+        Approximate row count from planner statistics (exact on SQLite), or
+        None when the database doesn't know yet.
+        """
+        with self._borrow() as conn:
+            cursor = conn.cursor()
+            try:
+                if self.db_type == "sqlite":
+                    cursor.execute(f"SELECT COUNT(*) FROM {self.quote_identifier(table_name)}")
+                elif self.db_type in ("postgresql", "postgres"):
+                    cursor.execute(self.ROW_ESTIMATE_QUERIES["postgresql"], (self.schema, table_name))
+                elif self.db_type == "mysql":
+                    cursor.execute(self.ROW_ESTIMATE_QUERIES["mysql"], (self.schema, table_name))
+                else:
+                    return None
+                row = cursor.fetchone()
+            finally:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+        # Postgres reports -1 for a table that was never analyzed
+        if row is None or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+    @traced("db.get_table_columns", "db")
     def get_table_columns(self, table_name):
         """
-        Returns a list of column names for the specified table in the given database.
+        Returns (name, data_type) pairs for the columns of the specified table,
+        audit columns excluded. Results are served from the schema cache; see `refresh_schema()`.
         """
-        cursor = self.conn.cursor()
+        schema = self._cached_schema()
+        if schema is not None and schema.table(table_name) is not None:
+            return self.filter_audit_columns(schema.columns(table_name))
+        return list(self.cache.get(("columns", table_name), lambda: self._fetch_table_columns(table_name)))
+
+    @traced("db.query_table_columns", "db")
+    @DB_QUERY_SECONDS.time(("table_columns",))
+    def _fetch_table_columns(self, table_name):
+        with self._borrow() as conn:
+            return self._query_table_columns(conn, table_name)
+
+    def _query_table_columns(self, conn, table_name):
+        cursor = conn.cursor()
         try:
             if self.db_type == "sqlite":
                 cursor.execute(f"PRAGMA table_info('{table_name}');")
-                columns = [col[1] for col in cursor.fetchall()]
+                # (name, type), the same shape the schema path returns
+                columns = [(col[1], col[2]) for col in cursor.fetchall()]
                 return self.filter_audit_columns(columns)
-            elif self.db_type in ("postgresql", "postgres"):
-                cursor.execute("""
-                    SELECT column_name, data_type
-                    FROM information_schema.columns
-                    WHERE table_schema = 'public' AND table_name = %s;""", (table_name,))
-                columns = cursor.fetchall()
-                print(self.filter_audit_columns(columns))
-                return self.filter_audit_columns(columns)
-            elif self.db_type == "mysql":
-                query = """SELECT column_name, data_type
-                           FROM information_schema.columns
-                           WHERE table_name = %s;"""
-                cursor.execute(query, (table_name,))
+            elif self.db_type in ("postgresql", "postgres", "mysql"):
+                query = self.COLUMN_QUERIES[self._catalog_dialect()]
+                cursor.execute(query, (self.schema, table_name))
                 columns = cursor.fetchall()
-                print(self.filter_audit_columns(columns))
                 return self.filter_audit_columns(columns)
             else:
                 raise ValueError(f"Unsupported database type: {self.db_type}")
@@ -0,0 +1,332 @@
+# exporters.py
+import codecs
+import csv
+import decimal
+import json
+import os
+import re
+import threading
+import time
+
+JSON_READ_CHUNK = 256 * 1024
+# Rows per XLSX sheet, header included (the format's own limit)
+XLSX_MAX_ROWS = 1_048_576
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportProgress:
+    """Counters the Tk side polls while an export is running."""
+    def __init__(self, total=None):
+        self.rows = 0
+        self.bytes = 0
+        self.total = total
+        self.phase = "Exporting"
+        self.done = False
+        self.started_at = time.perf_counter()
+
+    def as_text(self):
+        elapsed = time.perf_counter() - self.started_at
+        rate = self.rows / elapsed if elapsed > 0 else 0
+        state = "Done" if self.done else self.phase
+        if self.bytes and not self.rows:
+            return f"{state}: {self.bytes / 1e6:,.1f} MB ({self.bytes / 1e6 / max(elapsed, 1e-9):,.1f} MB/s)"
+        of_total = f" of {self.total:,}" if self.total else ""
+        return f"{state}: {self.rows:,}{of_total} rows ({rate:,.0f} rows/s)"
+
+
+def iter_json_array(chunks, max_element=64 * 1024 * 1024):
+    """
+    Yield the elements of a top-level JSON array read from an iterable of
+    byte chunks, holding only the current element (plus one read-ahead
+    chunk) in memory. Raises ValueError if the input isn't a JSON array or
+    an element exceeds `max_element` characters.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = iter(chunks)
+    buffer, pos, eof = "", 0, False
+
+    def fill(minimum):
+        nonlocal buffer, pos, eof
+        buffer = buffer[pos:]
+        pos = 0
+        while not eof and len(buffer) < minimum:
+            data = next(chunks, None)
+            if data is None:
+                eof = True
+                buffer += text_decoder.decode(b"", final=True)
+            else:
+                buffer += text_decoder.decode(data)
+
+    def skip():
+        nonlocal pos
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                return
+            fill(1)
+
+    fill(1)
+    if buffer.startswith("\ufeff"):
+        pos = 1
+    skip()
+    if buffer[pos:pos + 1] != "[":
+        raise ValueError("Response is not a JSON array")
+    pos += 1
+    first = True
+    while True:
+        skip()
+        if buffer[pos:pos + 1] == "]":
+            return
+        if not first:
+            if buffer[pos:pos + 1] != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {buffer[pos:pos + 1]!r}")
+            pos += 1
+            skip()
+        first = False
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                value, end = None, None
+            # A number at the very end of the buffer may still be growing
+            if end is not None and (end < len(buffer) or eof):
+                break
+            if eof:
+                raise ValueError("Truncated or malformed JSON array")
+            if len(buffer) - pos > max_element:
+                raise ValueError(f"JSON array element larger than {max_element} characters")
+            # Double the read-ahead so a large element is re-parsed O(log n) times
+            fill(max(JSON_READ_CHUNK, 2 * (len(buffer) - pos)))
+        yield value
+        pos = end
+
+
+def flatten_record(record, sep="."):
+    """
+    One flat dict per record: nested objects become dotted keys, lists are
+    kept as JSON text, and a non-object element becomes {"value": ...}.
+    """
+    if not isinstance(record, dict):
+        return {"value": record}
+    flat = {}
+
+    def walk(prefix, obj):
+        for key, value in obj.items():
+            name = f"{prefix}{sep}{key}" if prefix else str(key)
+            if isinstance(value, dict) and value:
+                walk(name, value)
+            elif isinstance(value, (list, dict)):
+                flat[name] = json.dumps(value, ensure_ascii=False)
+            else:
+                flat[name] = value
+
+    walk("", record)
+    return flat
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    @staticmethod
+    def _text(value):
+        if value is None:
+            return ""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value).hex()
+        return value
+
+    def write(self, values):
+        self.writer.writerow([self._text(v) for v in values])
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    """openpyxl write-only workbook; rows stream to disk, a new sheet starts every XLSX_MAX_ROWS."""
+    def __init__(self, path, columns):
+        try:
+            import openpyxl
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        except ImportError:
+            raise ImportError("XLSX export requires the optional 'openpyxl' package.")
+        self.path = path
+        self.columns = list(columns)
+        self.illegal = ILLEGAL_CHARACTERS_RE
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = None
+        self.sheet_rows = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        count = len(self.workbook.worksheets)
+        self.sheet = self.workbook.create_sheet(title=f"Sheet{count + 1}" if count else "Sheet1")
+        self.sheet.append(self.columns)
+        self.sheet_rows = 1
+
+    def _cell(self, value):
+        if value is None or isinstance(value, (int, float, bool, decimal.Decimal)):
+            return value
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value).hex()
+        if isinstance(value, str):
+            return self.illegal.sub("", value)
+        if hasattr(value, "isoformat") and not getattr(value, "tzinfo", None):
+            return value
+        return self.illegal.sub("", str(value))
+
+    def write(self, values):
+        if self.sheet_rows >= XLSX_MAX_ROWS:
+            self._new_sheet()
+        self.sheet.append([self._cell(v) for v in values])
+        self.sheet_rows += 1
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class NdjsonWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", encoding="utf-8")
+        self.columns = columns
+
+    def write(self, values):
+        self.file.write(json.dumps(dict(zip(self.columns, values)), ensure_ascii=False, default=str))
+        self.file.write("\n")
+
+    def close(self):
+        self.file.close()
+
+
+WRITERS = {"csv": CsvWriter, "xlsx": XlsxWriter, "ndjson": NdjsonWriter}
+
+
+def format_for_path(path):
+    """csv / xlsx / ndjson from the file extension, or None for a raw copy."""
+    ext = os.path.splitext(path)[1].lower()
+    return {".csv": "csv", ".xlsx": "xlsx", ".ndjson": "ndjson", ".jsonl": "ndjson"}.get(ext)
+
+
+def _check(cancel):
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def export_raw(chunks, path, progress=None, cancel=None):
+    """Copy byte chunks straight to `path`; returns the byte count."""
+    written = 0
+    try:
+        with open(path, "wb") as f:
+            for data in chunks:
+                _check(cancel)
+                f.write(data)
+                written += len(data)
+                if progress is not None:
+                    progress.bytes = written
+    except ExportCancelled:
+        _discard(path)
+        raise
+    if progress is not None:
+        progress.done = True
+    return written
+
+
+def export_json_records(open_chunks, path, fmt, progress=None, cancel=None):
+    """
+    Flatten the JSON array read from `open_chunks()` (a callable returning a
+    fresh iterable of byte chunks) into CSV, XLSX or NDJSON in constant
+    memory. NDJSON keeps each record's nesting and needs one pass; CSV and
+    XLSX first scan the array for the union of flattened keys, then write.
+    Returns the record count.
+    """
+    progress = progress or ExportProgress()
+    cancel = cancel or threading.Event()
+    if fmt == "ndjson":
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for record in iter_json_array(open_chunks()):
+                    _check(cancel)
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    f.write("\n")
+                    progress.rows += 1
+        except BaseException:
+            _discard(path)
+            raise
+        progress.done = True
+        return progress.rows
+
+    progress.phase = "Scanning"
+    columns = {}
+    for record in iter_json_array(open_chunks()):
+        _check(cancel)
+        for key in flatten_record(record):
+            columns.setdefault(key, None)
+        progress.rows += 1
+    columns = list(columns)
+    progress.total, progress.rows, progress.phase = progress.rows, 0, "Exporting"
+
+    writer = WRITERS[fmt](path, columns)
+    try:
+        for record in iter_json_array(open_chunks()):
+            _check(cancel)
+            flat = flatten_record(record)
+            writer.write([flat.get(c) for c in columns])
+            progress.rows += 1
+        writer.close()
+    except BaseException:
+        writer.close()
+        _discard(path)
+        raise
+    progress.done = True
+    return progress.rows
+
+
+def export_rows(batches, path, fmt, progress=None, cancel=None, columns=None):
+    """
+    Write row batches (lists of dicts, e.g. from
+    `DBConnector.iter_row_batches()`) to CSV, XLSX or NDJSON as they arrive,
+    so memory stays flat whatever the row count. `columns` is the header
+    used when there are no rows. The batch iterator is closed on every exit,
+    which releases its server-side cursor. Returns the row count.
+    """
+    progress = progress or ExportProgress()
+    writer = None
+    try:
+        for batch in batches:
+            _check(cancel)
+            if not batch:
+                continue
+            if writer is None:
+                writer = WRITERS[fmt](path, list(batch[0]))
+            for row in batch:
+                writer.write(list(row.values()))
+            progress.rows += len(batch)
+        if writer is None:
+            writer = WRITERS[fmt](path, list(columns or []))
+        writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            _discard(path)
+        raise
+    finally:
+        closer = getattr(batches, "close", None)
+        if closer is not None:
+            closer()
+    progress.done = True
+    return progress.rows
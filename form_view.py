@@ -0,0 +1,153 @@
+# form_view.py
+import tkinter as tk
+from tkinter import ttk
+
+
+class _Slot:
+    """One recycled label/entry/error row and the canvas window holding it."""
+    __slots__ = ("frame", "label", "entry", "error", "item", "row")
+
+
+class FieldForm(ttk.Frame):
+    """
+    Scrollable column form that only builds widgets for the rows on screen.
+
+    Every field's value and error text live in StringVars (`values`,
+    `errors`); a pool of label/entry/error rows is bound to the fields in
+    or near the viewport and rebound as the form scrolls. A 300-column
+    table costs as many widgets as fit on screen, and switching tables
+    reuses the pool instead of adding canvas items.
+    """
+    OVERSCAN = 3
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.fields = []
+        self.values = {}
+        self.errors = {}
+        self._slots = []
+        self._row_height = None
+        self._layout_pending = False
+
+        self.canvas = tk.Canvas(self, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_yview)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.bind("<Configure>", self._on_configure)
+        self._bind_wheel(self.canvas)
+
+    def set_fields(self, fields):
+        """
+        Show `fields` ([(name, caption)]) with empty values. Returns the
+        value StringVars by name.
+        """
+        self.fields = list(fields)
+        self.values = {name: tk.StringVar(self) for name, _ in self.fields}
+        self.errors = {name: tk.StringVar(self) for name, _ in self.fields}
+        for slot in self._slots:
+            slot.row = None
+        self.canvas.yview_moveto(0)
+        self._layout()
+        return self.values
+
+    def set_error(self, name, text):
+        var = self.errors.get(name)
+        if var is not None:
+            var.set(text)
+
+    def clear_errors(self):
+        for var in self.errors.values():
+            var.set("")
+
+    def show_field(self, name):
+        """Scroll so the row for `name` is at the top."""
+        for row, (field, _) in enumerate(self.fields):
+            if field == name:
+                self.canvas.yview_moveto(row / len(self.fields))
+                return
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        widget.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        widget.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def _new_slot(self):
+        slot = _Slot()
+        slot.frame = ttk.Frame(self.canvas)
+        slot.label = ttk.Label(slot.frame)
+        slot.label.pack()
+        slot.entry = ttk.Entry(slot.frame)
+        slot.entry.pack()
+        slot.error = ttk.Label(slot.frame, foreground="red")
+        slot.error.pack()
+        slot.item = self.canvas.create_window(0, 0, window=slot.frame, anchor="nw", state="hidden",
+                                              width=max(self.canvas.winfo_width(), 1))
+        slot.row = None
+        for widget in (slot.frame, slot.label, slot.entry, slot.error):
+            self._bind_wheel(widget)
+        self._slots.append(slot)
+        return slot
+
+    def _measure(self):
+        # Every row has the same layout, so one measurement fixes the row height
+        slot = self._slots[0] if self._slots else self._new_slot()
+        slot.label.configure(text="Ag")
+        slot.frame.update_idletasks()
+        self._row_height = max(1, slot.frame.winfo_reqheight())
+        self.canvas.configure(yscrollincrement=self._row_height)
+
+    def _bind(self, slot, row):
+        name, caption = self.fields[row]
+        if slot.row is not None and str(self.tk.call("focus")) == str(slot.entry):
+            # Don't let typing land in the field this row is being reused for
+            self.canvas.focus_set()
+        slot.label.configure(text=caption)
+        slot.entry.configure(textvariable=self.values[name])
+        slot.error.configure(textvariable=self.errors[name])
+        self.canvas.coords(slot.item, 0, row * self._row_height)
+        self.canvas.itemconfigure(slot.item, state="normal")
+        slot.row = row
+
+    def _layout(self):
+        self._layout_pending = False
+        if not self.fields:
+            for slot in self._slots:
+                slot.row = None
+                self.canvas.itemconfigure(slot.item, state="hidden")
+            self.canvas.configure(scrollregion=(0, 0, 0, 0))
+            return
+        if self._row_height is None:
+            self._measure()
+        height = self._row_height
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), len(self.fields) * height))
+        top = self.canvas.canvasy(0)
+        view = max(self.canvas.winfo_height(), height)
+        first = max(0, int(top // height) - self.OVERSCAN)
+        last = min(len(self.fields), int((top + view) // height) + 1 + self.OVERSCAN)
+        while len(self._slots) < last - first:
+            self._new_slot()
+
+        # Rows that stay in range keep their slot; the rest are reassigned
+        bound = {slot.row: slot for slot in self._slots if slot.row is not None and first <= slot.row < last}
+        free = [slot for slot in self._slots if slot.row is None or not first <= slot.row < last]
+        for row in range(first, last):
+            if row not in bound:
+                self._bind(free.pop(), row)
+        for slot in free:
+            slot.row = None
+            self.canvas.itemconfigure(slot.item, state="hidden")
+
+    def _schedule_layout(self):
+        if not self._layout_pending:
+            self._layout_pending = True
+            self.after_idle(self._layout)
+
+    def _on_yview(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_layout()
+
+    def _on_configure(self, event):
+        for slot in self._slots:
+            self.canvas.itemconfigure(slot.item, width=event.width)
+        self._schedule_layout()
@@ -0,0 +1,312 @@
+# history_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from blob_store import BlobStore
+
+DEFAULT_HISTORY_PATH = "request_history.db"
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match (as a quoted
+    phrase, so punctuation in URLs is harmless); a trailing * keeps prefix
+    matching.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class HistoryStore:
+    """
+    Append-only request history in an embedded SQLite database.
+
+    Appends are single-row inserts (O(1), no rewrite of earlier entries).
+    The database runs in WAL mode, so a crash loses at most the last
+    uncommitted write and never corrupts earlier ones, and several writers,
+    including other processes, can share one file. Method, URL, status and
+    timestamp are indexed, and an FTS5 index over URL, payload and
+    response backs `search()` when the SQLite build has FTS5.
+
+    Response bodies live in a content-addressed `BlobStore` in the same
+    file; each row keeps only the body's hash, so an error body repeated
+    thousands of times is stored (compressed) once. The FTS index reads
+    bodies back through the `blob_text()` SQL function registered on the
+    connection, so the database must be written through this class.
+
+    Retention is enforced every `retention_every` appends: the oldest rows
+    are dropped beyond `max_entries`, older than `max_age` seconds, or while
+    the live data exceeds `max_bytes`. None disables a limit.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            method TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status INTEGER,
+            duration_ms REAL,
+            payload TEXT,
+            response_hash TEXT,
+            timing TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_history_ts ON history (ts);
+        CREATE INDEX IF NOT EXISTS idx_history_method ON history (method, ts);
+        CREATE INDEX IF NOT EXISTS idx_history_url ON history (url, ts);
+        CREATE INDEX IF NOT EXISTS idx_history_status ON history (status, ts);
+        CREATE INDEX IF NOT EXISTS idx_history_duration ON history (duration_ms);
+    """
+
+    # External-content FTS5 index over a view that inflates the bodies,
+    # kept in step with `history` by triggers
+    FTS_SCHEMA = """
+        CREATE VIEW IF NOT EXISTS history_text AS
+            SELECT id, url, payload, blob_text(response_hash) AS response FROM history;
+        CREATE VIRTUAL TABLE history_fts USING fts5(
+            url, payload, response, content='history_text', content_rowid='id'
+        );
+        CREATE TRIGGER history_fts_insert AFTER INSERT ON history BEGIN
+            INSERT INTO history_fts (rowid, url, payload, response)
+            VALUES (new.id, new.url, new.payload, blob_text(new.response_hash));
+        END;
+        CREATE TRIGGER history_fts_delete AFTER DELETE ON history BEGIN
+            INSERT INTO history_fts (history_fts, rowid, url, payload, response)
+            VALUES ('delete', old.id, old.url, old.payload, blob_text(old.response_hash));
+        END;
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, max_entries=1_000_000, max_age=None,
+                 max_bytes=None, retention_every=500, codec="zlib"):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.retention_every = retention_every
+        self._since_retention = 0
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # auto_vacuum only takes effect before the first table is created
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.blobs = BlobStore(self.conn, codec=codec)
+        self.conn.create_function("blob_text", 1, self.blobs.text, deterministic=True)
+        self._migrate_inline_responses()
+        self._add_column("timing", "TEXT")
+        # Lets blob garbage collection check references by index lookup
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_history_response ON history (response_hash)")
+        self.fts = self._ensure_fts()
+        self.conn.commit()
+
+    def _migrate_inline_responses(self):
+        """
+        Move bodies stored inline by earlier versions into the blob store.
+        The table is rebuilt without `response` (copy, drop, rename) in one
+        transaction; ALTER TABLE ... DROP COLUMN needs SQLite 3.35.
+        """
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(history)")]
+        if "response" not in columns:
+            return
+        with self.conn:
+            if not self.conn.in_transaction:
+                # Otherwise the DDL below would commit statement by statement
+                self.conn.execute("BEGIN")
+            # The old FTS table, triggers and view read `response`; _ensure_fts()
+            # recreates them over the blob store and reindexes
+            for statement in ("DROP TRIGGER IF EXISTS history_fts_insert",
+                              "DROP TRIGGER IF EXISTS history_fts_delete",
+                              "DROP TABLE IF EXISTS history_fts",
+                              "DROP VIEW IF EXISTS history_text",
+                              "ALTER TABLE history RENAME TO history_inline"):
+                self.conn.execute(statement)
+            # The indexes moved with the old table, so only the table is created
+            # here; the second pass below adds them once the old table is gone
+            self._create_schema()
+            current = {row[1] for row in self.conn.execute("PRAGMA table_info(history)")}
+            kept = ", ".join(name for name in columns if name in current)
+            self.conn.execute(f"INSERT INTO history ({kept}) SELECT {kept} FROM history_inline")
+            rows = self.conn.execute("SELECT id, response FROM history_inline WHERE response IS NOT NULL")
+            for row_id, response in rows.fetchall():
+                self.conn.execute("UPDATE history SET response_hash = ? WHERE id = ?",
+                                  (self.blobs.put(response), row_id))
+            self.conn.execute("DROP TABLE history_inline")
+            self._create_schema()
+
+    def _create_schema(self):
+        # executescript() would commit an open transaction first
+        for statement in self.SCHEMA.split(";"):
+            if statement.strip():
+                self.conn.execute(statement)
+
+    def _add_column(self, name, declaration):
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(history)")]
+        if name not in columns:
+            self.conn.execute(f"ALTER TABLE history ADD COLUMN {name} {declaration}")
+
+    def _ensure_fts(self):
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_fts'").fetchone()
+        if exists:
+            return True
+        try:
+            self.conn.executescript(self.FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search() falls back to LIKE scans
+            return False
+        # Index whatever was stored before the FTS table existed
+        self.conn.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+        return True
+
+    def _row(self, entry):
+        payload = entry.get("payload")
+        if payload is not None and not isinstance(payload, str):
+            payload = json.dumps(payload)
+        return (
+            entry.get("ts", time.time()),
+            entry["method"],
+            entry["url"],
+            entry.get("status"),
+            entry.get("duration_ms"),
+            payload,
+            self.blobs.put(entry.get("response")),
+            json.dumps(entry["timing"]) if entry.get("timing") is not None else None,
+        )
+
+    def append(self, method, url, payload=None, response=None, status=None, duration_ms=None, ts=None,
+               timing=None):
+        return self.append_many([{
+            "method": method, "url": url, "payload": payload, "response": response,
+            "status": status, "duration_ms": duration_ms, "ts": ts if ts is not None else time.time(),
+            "timing": timing,
+        }])
+
+    def append_many(self, entries):
+        with self._lock:
+            with self.conn:
+                rows = [self._row(e) for e in entries]
+                cursor = self.conn.executemany(
+                    "INSERT INTO history (ts, method, url, status, duration_ms, payload, response_hash, timing) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._since_retention += len(rows)
+            if self._since_retention >= self.retention_every:
+                self._apply_retention_locked()
+        return cursor.lastrowid
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def recent(self, limit=50, method=None, url=None, status=None, since=None, until=None):
+        """Newest-first entries, filtered through the indexes."""
+        return self.search(limit=limit, method=method, url=url, status=status, since=since, until=until)
+
+    def search(self, text=None, method=None, url=None, status=None, min_ms=None, max_ms=None,
+               since=None, until=None, limit=100):
+        """
+        Newest-first entries whose URL, payload or response contain every
+        word of `text`, narrowed by exact method/URL/status, a latency range
+        in milliseconds and a [since, until) time window.
+        """
+        clauses, params = [], []
+        source = "history h"
+        order = "h.ts DESC, h.id DESC"
+        if text and fts_query(text):
+            if self.fts:
+                source = "history_fts f JOIN history h ON h.id = f.rowid"
+                # Rows are appended in time order, so walking the index by
+                # rowid returns the newest matches first and stops at LIMIT
+                # instead of sorting every match
+                order = "f.rowid DESC"
+                clauses.append("history_fts MATCH ?")
+                params.append(fts_query(text))
+            else:
+                for word in text.split():
+                    clauses.append("(h.url LIKE ? OR h.payload LIKE ? OR blob_text(h.response_hash) LIKE ?)")
+                    params.extend([f"%{word}%"] * 3)
+        for column, value in (("method", method), ("url", url), ("status", status)):
+            if value is not None:
+                clauses.append(f"h.{column} = ?")
+                params.append(value)
+        for column, op, value in (("duration_ms", ">=", min_ms), ("duration_ms", "<=", max_ms),
+                                  ("ts", ">=", since), ("ts", "<", until)):
+            if value is not None:
+                clauses.append(f"h.{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+        with self._lock:
+            cursor = self.conn.execute(
+                f"SELECT h.id, h.ts, h.method, h.url, h.status, h.duration_ms, h.payload, h.response_hash, h.timing "
+                f"FROM {source} {where} ORDER BY {order} LIMIT ?", params)
+            names = [d[0] for d in cursor.description]
+            entries = [dict(zip(names, row)) for row in cursor.fetchall()]
+            for entry in entries:
+                entry["response"] = self.blobs.text(entry["response_hash"])
+                entry["timing"] = json.loads(entry["timing"]) if entry["timing"] else None
+            return entries
+
+    def apply_retention(self):
+        with self._lock:
+            self._apply_retention_locked()
+
+    def _live_bytes(self):
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * page_size
+
+    def _delete_where(self, condition, params):
+        """Delete matching rows, then any blobs only they referenced."""
+        hashes = [row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT response_hash FROM history WHERE {condition} AND response_hash IS NOT NULL",
+            params)]
+        self.conn.execute(f"DELETE FROM history WHERE {condition}", params)
+        self.blobs.collect_garbage([("history", "response_hash")], hashes)
+
+    def _apply_retention_locked(self):
+        self._since_retention = 0
+        with self.conn:
+            if self.max_entries is not None:
+                # ids only grow, so this is a range delete on the primary key
+                self._delete_where("id <= (SELECT MAX(id) FROM history) - ?", (self.max_entries,))
+            if self.max_age is not None:
+                self._delete_where("ts < ?", (time.time() - self.max_age,))
+        if self.max_bytes is not None:
+            while self._live_bytes() > self.max_bytes:
+                total = self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+                if not total:
+                    break
+                with self.conn:
+                    self._delete_where("id IN (SELECT id FROM history ORDER BY id LIMIT ?)",
+                                       (max(1, total // 10),))
+        self.conn.execute("PRAGMA incremental_vacuum")
+
+    def import_json(self, path):
+        """One-off import of the legacy `request_history.json` list."""
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        rows = []
+        for e in entries:
+            try:
+                ts = time.mktime(time.strptime(e["timestamp"], "%Y-%m-%d %H:%M:%S"))
+            except (KeyError, ValueError):
+                ts = time.time()
+            rows.append(dict(e, ts=ts))
+        if rows:
+            self.append_many(rows)
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
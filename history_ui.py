@@ -0,0 +1,126 @@
+# history_ui.py
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+import time
+from history_store import HistoryStore, DEFAULT_HISTORY_PATH
+from http_engine import format_timing
+from ui_worker import BackgroundRunner
+
+WINDOWS = {"Any time": None, "Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400}
+
+
+class HistoryBrowserFrame(tk.Frame):
+    def __init__(self, parent, history_path=DEFAULT_HISTORY_PATH, limit=200):
+        super().__init__(parent, borderwidth=1, relief="groove", padx=10, pady=10)
+        self.history_path = history_path
+        self.limit = limit
+        self.store = None
+        self.entries = {}
+        self.runner = BackgroundRunner(self, max_workers=1, name="hackzilla-history")
+
+        self.text_var = tk.StringVar()
+        self.method_var = tk.StringVar(value="Any")
+        self.status_var = tk.StringVar()
+        self.min_ms_var = tk.StringVar()
+        self.max_ms_var = tk.StringVar()
+        self.window_var = tk.StringVar(value="Any time")
+        self.info_var = tk.StringVar()
+        self.bind("<Destroy>", self._on_destroy)
+        self.build_ui()
+
+    def build_ui(self):
+        filters = tk.Frame(self)
+        filters.pack(fill=tk.X, pady=5)
+        tk.Label(filters, text="Search:").pack(side=tk.LEFT)
+        search_entry = tk.Entry(filters, textvariable=self.text_var, width=30)
+        search_entry.pack(side=tk.LEFT, padx=(5, 10))
+        search_entry.bind("<Return>", lambda e: self.search())
+        tk.Label(filters, text="Method:").pack(side=tk.LEFT)
+        ttk.Combobox(filters, textvariable=self.method_var, state="readonly", width=8,
+                     values=["Any", "GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]).pack(side=tk.LEFT, padx=(5, 10))
+        tk.Label(filters, text="Status:").pack(side=tk.LEFT)
+        tk.Entry(filters, textvariable=self.status_var, width=5).pack(side=tk.LEFT, padx=(5, 10))
+        tk.Label(filters, text="Latency ms:").pack(side=tk.LEFT)
+        tk.Entry(filters, textvariable=self.min_ms_var, width=6).pack(side=tk.LEFT, padx=(5, 0))
+        tk.Label(filters, text="–").pack(side=tk.LEFT)
+        tk.Entry(filters, textvariable=self.max_ms_var, width=6).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Combobox(filters, textvariable=self.window_var, state="readonly", width=12,
+                     values=list(WINDOWS)).pack(side=tk.LEFT, padx=(0, 10))
+        tk.Button(filters, text="Search", command=self.search).pack(side=tk.LEFT)
+        tk.Label(self, textvariable=self.info_var, fg="gray").pack(anchor="w")
+
+        columns = ("time", "method", "status", "ms", "url")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=10)
+        for col, width in zip(columns, (140, 70, 60, 80, 500)):
+            self.tree.heading(col, text=col.upper() if col != "ms" else "LATENCY (ms)")
+            self.tree.column(col, width=width, stretch=(col == "url"))
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind("<<TreeviewSelect>>", self.show_selected)
+
+        self.detail_text = scrolledtext.ScrolledText(self, font=('Consolas', 10), wrap='word', height=10)
+        self.detail_text.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+
+    def _on_destroy(self, event):
+        if event.widget is self:
+            self.runner.shutdown()
+            if self.store is not None:
+                # Waits for a search still running on the worker to let go of the connection
+                self.store.close()
+                self.store = None
+
+    def build_filters(self):
+        def number(var, cast):
+            value = var.get().strip()
+            return cast(value) if value else None
+        window = WINDOWS[self.window_var.get()]
+        method = self.method_var.get()
+        return {
+            "text": self.text_var.get().strip() or None,
+            "method": None if method == "Any" else method,
+            "status": number(self.status_var, int),
+            "min_ms": number(self.min_ms_var, float),
+            "max_ms": number(self.max_ms_var, float),
+            "since": time.time() - window if window else None,
+            "limit": self.limit,
+        }
+
+    def _query(self, filters):
+        # Worker thread: open lazily so the tab costs nothing until used
+        if self.store is None:
+            self.store = HistoryStore(self.history_path)
+        t0 = time.perf_counter()
+        rows = self.store.search(**filters)
+        return rows, (time.perf_counter() - t0) * 1000
+
+    def search(self):
+        try:
+            filters = self.build_filters()
+        except ValueError as e:
+            self.info_var.set(f"Invalid filter: {e}")
+            return
+        self.info_var.set("Searching…")
+        self.runner.submit("search", self._query, self._show_results,
+                           lambda e: self.info_var.set(f"Search failed: {e}"), filters)
+
+    def _show_results(self, outcome):
+        rows, elapsed_ms = outcome
+        self.tree.delete(*self.tree.get_children())
+        self.entries = {}
+        for row in rows:
+            item = self.tree.insert("", tk.END, values=(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["ts"])),
+                row["method"], row["status"] if row["status"] is not None else "",
+                "" if row["duration_ms"] is None else row["duration_ms"], row["url"],
+            ))
+            self.entries[item] = row
+        self.info_var.set(f"{len(rows)} result(s) in {elapsed_ms:.1f} ms")
+
+    def show_selected(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        row = self.entries[selection[0]]
+        self.detail_text.delete(1.0, tk.END)
+        timing = f"Timing: {format_timing(row['timing'])}\n\n" if row.get("timing") else ""
+        self.detail_text.insert(tk.END, f"{row['method']} {row['url']}\n\n{timing}Payload:\n{row['payload'] or ''}\n\n"
+                                        f"Response:\n{row['response'] or ''}")
@@ -0,0 +1,196 @@
+# http_engine.py
+import asyncio
+import threading
+import time
+
+
+class AsyncHttpEngine:
+    """
+    One long-lived asyncio loop on a background thread, owning a pooled
+    `httpx.AsyncClient`. Connections are kept alive between requests, so
+    repeated calls to the same host skip the TCP/TLS handshake.
+
+    Coroutines are scheduled with `submit()`, which returns a
+    `concurrent.futures.Future`; the Tk side hands that to
+    `BackgroundRunner.watch()` to get the result back on the Tk thread.
+    """
+    def __init__(self, max_connections=100, max_keepalive_connections=20,
+                 keepalive_expiry=30.0, http2=False, timeout=10.0):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.timeout = timeout
+
+        self.loop = None
+        self.client = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return self
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name="hackzilla-http", daemon=True)
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._open_client(), self.loop).result()
+        return self
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _http2_available(self):
+        if not self.http2:
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+            return False
+        return True
+
+    async def _open_client(self):
+        import httpx
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self.client = httpx.AsyncClient(limits=limits, http2=self._http2_available(), timeout=self.timeout)
+
+    def submit(self, coro):
+        """Schedule `coro` on the engine loop; returns a concurrent Future."""
+        if not self.running:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def shutdown(self, timeout=5):
+        with self._lock:
+            if not self.running:
+                return
+            if self.client is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result(timeout)
+                except Exception:
+                    pass
+                self.client = None
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class RequestTiming:
+    """
+    Per-phase timing of one request, built from httpcore's trace events.
+
+    Pass `atrace` (async clients) or `trace` (sync clients) as the
+    request's "trace" extension, then call `finish()` once the body has
+    been read. Phases, in seconds:
+
+        connect   name resolution and TCP connect (httpcore resolves
+                  inside its connect step, so the two aren't separable)
+        tls       TLS handshake
+        send      writing the request headers and body
+        wait      server think time, up to the response headers (TTFB)
+        download  reading the response body
+
+    A request that didn't open a connection went out on a pooled one;
+    `reused` says so.
+    """
+    PHASES = ("connect", "tls", "send", "wait", "download")
+    LABELS = {"connect": "DNS+connect", "tls": "TLS", "send": "send", "wait": "wait", "download": "download"}
+    _EVENTS = {
+        "connection.connect_tcp": "connect",
+        "connection.connect_unix_socket": "connect",
+        "connection.start_tls": "tls",
+        "http11.send_request_headers": "send",
+        "http11.send_request_body": "send",
+        "http11.receive_response_headers": "wait",
+        "http11.receive_response_body": "download",
+        "http2.send_connection_init": "send",
+        "http2.send_request_headers": "send",
+        "http2.send_request_body": "send",
+        "http2.receive_response_headers": "wait",
+        "http2.receive_response_body": "download",
+    }
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self.reused = True
+        self.started_at = clock()
+        self.total = None
+        self._open = {}
+
+    def trace(self, event, info):
+        name, _, stage = event.rpartition(".")
+        phase = self._EVENTS.get(name)
+        if phase is None:
+            return
+        now = self.clock()
+        if stage == "started":
+            self._open[name] = now
+            if phase == "connect":
+                self.reused = False
+        elif name in self._open:
+            # "complete" or "failed"
+            self.phases[phase] += now - self._open.pop(name)
+
+    async def atrace(self, event, info):
+        self.trace(event, info)
+
+    def finish(self):
+        if self.total is None:
+            self.total = self.clock() - self.started_at
+        return self
+
+    def as_dict(self):
+        """Milliseconds per phase plus `total` and `reused`, as stored in history."""
+        timing = {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()}
+        timing["total"] = round(self.finish().total * 1000, 2)
+        timing["reused"] = self.reused
+        return timing
+
+    def summary(self):
+        return format_timing(self.as_dict())
+
+
+def format_timing(timing):
+    """One line for the response pane from an `as_dict()`-style mapping."""
+    parts = [f"{RequestTiming.LABELS.get(phase, phase)} {timing[phase]} ms"
+             for phase in RequestTiming.PHASES if timing.get(phase) is not None]
+    line = "  ·  ".join(parts)
+    if "reused" in timing:
+        line += "   (reused connection)" if timing["reused"] else "   (new connection)"
+    return line
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(**config):
+    """
+    Return the app-wide engine, creating and starting it on first use.
+    `config` only applies to that first call.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncHttpEngine(**config)
+        engine = _engine
+    return engine.start()
+
+
+def shutdown_engine():
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        engine.shutdown()
@@ -0,0 +1,463 @@
+# load_test.py
+import asyncio
+import json
+import math
+import multiprocessing
+import queue
+import threading
+import time
+from collections import Counter
+from metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of latencies in microseconds.
+
+    Values below 2**SUB_BUCKET_BITS get one bucket each; above that every
+    power of two is split into 2**(SUB_BUCKET_BITS - 1) equal buckets, so the
+    recorded value is within ~1.6% of the real one at any magnitude while
+    memory stays a few hundred counters. Histograms merge by adding counts.
+    """
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+    HALF_COUNT = SUB_BUCKET_COUNT >> 1
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = None
+
+    @classmethod
+    def _index(cls, value):
+        if value < cls.SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS
+        return shift * cls.HALF_COUNT + (value >> shift)
+
+    @classmethod
+    def _bucket_range(cls, index):
+        if index < cls.SUB_BUCKET_COUNT:
+            return index, index
+        shift = index // cls.HALF_COUNT - 1
+        mantissa = index - shift * cls.HALF_COUNT
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1_000_000))
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        self.sum_us += value
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+        self.max_us = value if self.max_us is None else max(self.max_us, value)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum_us += other.sum_us
+        for attr, pick in (("min_us", min), ("max_us", max)):
+            theirs = getattr(other, attr)
+            if theirs is not None:
+                mine = getattr(self, attr)
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+        return self
+
+    def copy(self):
+        # dict() of a dict is a single C-level copy, so this is safe to call
+        # from another thread while the loop keeps recording
+        hist = LatencyHistogram()
+        hist.counts = Counter(dict(self.counts))
+        hist.total, hist.sum_us = self.total, self.sum_us
+        hist.min_us, hist.max_us = self.min_us, self.max_us
+        return hist
+
+    def percentile(self, p):
+        """Latency in milliseconds at percentile `p` (0-100)."""
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(self.total * p / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                low, high = self._bucket_range(index)
+                value = min((low + high) / 2, self.max_us)
+                return round(value / 1000.0, 3)
+        return round(self.max_us / 1000.0, 3)
+
+    def mean_ms(self):
+        return round(self.sum_us / self.total / 1000.0, 3) if self.total else 0.0
+
+    def to_dict(self):
+        return {"counts": dict(self.counts), "total": self.total, "sum_us": self.sum_us,
+                "min_us": self.min_us, "max_us": self.max_us}
+
+    @classmethod
+    def from_dict(cls, data):
+        hist = cls()
+        hist.counts = Counter({int(k): v for k, v in data["counts"].items()})
+        hist.total = data["total"]
+        hist.sum_us = data["sum_us"]
+        hist.min_us = data["min_us"]
+        hist.max_us = data["max_us"]
+        return hist
+
+
+class LoadTestConfig:
+    def __init__(self, method, url, headers=None, auth=None, params=None, json_body=None,
+                 duration=30.0, warmup=5.0, concurrency=10, target_rps=None, max_in_flight=1000):
+        """
+        With `target_rps` set, requests are launched on a fixed schedule
+        (open loop, capped at `max_in_flight`); otherwise `concurrency`
+        workers send back-to-back (closed loop). Results from the first
+        `warmup` seconds are discarded.
+        """
+        self.method = method
+        self.url = url
+        self.headers = headers or {}
+        self.auth = auth
+        self.params = params
+        self.json_body = json_body
+        self.duration = duration
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.target_rps = target_rps
+        self.max_in_flight = max_in_flight
+
+
+class LoadTestStats:
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.outcomes = Counter()  # status code, or exception class name
+
+    def record(self, latency, outcome):
+        self.histogram.record(latency)
+        self.outcomes[outcome] += 1
+
+    def copy(self):
+        stats = LoadTestStats()
+        stats.histogram = self.histogram.copy()
+        stats.outcomes = Counter(dict(self.outcomes))
+        return stats
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.outcomes.update(other.outcomes)
+        return self
+
+    def to_dict(self):
+        return {"histogram": self.histogram.to_dict(), "outcomes": dict(self.outcomes)}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.outcomes = Counter(data["outcomes"])
+        return stats
+
+
+def record_metrics(stats, method, source="load"):
+    """
+    Add a stats delta from a worker process to the in-process metrics,
+    placing each latency at the middle of its histogram bucket.
+    """
+    for outcome, count in stats.outcomes.items():
+        HTTP_REQUESTS.inc((source, method, str(outcome)), count)
+    for index, count in stats.histogram.counts.items():
+        low, high = LatencyHistogram._bucket_range(index)
+        HTTP_LATENCY.observe((low + high) / 2 / 1_000_000, (source,), count)
+
+
+def build_report(stats, elapsed, in_flight=0, warming_up=False, done=False):
+    hist = stats.histogram
+    errors = {str(k): v for k, v in stats.outcomes.items()
+              if not isinstance(k, int) or k >= 400}
+    return {
+        "count": hist.total,
+        "elapsed": round(elapsed, 2),
+        "throughput": round(hist.total / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50": hist.percentile(50),
+        "p90": hist.percentile(90),
+        "p99": hist.percentile(99),
+        "p999": hist.percentile(99.9),
+        "mean": hist.mean_ms(),
+        "min": round((hist.min_us or 0) / 1000.0, 3),
+        "max": round((hist.max_us or 0) / 1000.0, 3),
+        "outcomes": {str(k): v for k, v in sorted(stats.outcomes.items(), key=lambda kv: str(kv[0]))},
+        "errors": errors,
+        "error_rate": round(sum(errors.values()) / hist.total, 4) if hist.total else 0.0,
+        "in_flight": in_flight,
+        "warming_up": warming_up,
+        "done": done,
+    }
+
+
+def format_report(report):
+    state = "warming up" if report["warming_up"] else ("done" if report["done"] else "running")
+    lines = [
+        f"State: {state}   Elapsed: {report['elapsed']} s   In flight: {report['in_flight']}",
+        f"Requests: {report['count']}   Throughput: {report['throughput']} req/s   "
+        f"Error rate: {report['error_rate'] * 100:.2f}%",
+        f"Latency ms  p50 {report['p50']}  p90 {report['p90']}  p99 {report['p99']}  "
+        f"p99.9 {report['p999']}  mean {report['mean']}  max {report['max']}",
+        "By status: " + (", ".join(f"{k}: {v}" for k, v in report["outcomes"].items()) or "-"),
+    ]
+    return "\n".join(lines)
+
+
+class LoadTester:
+    """
+    Drives one configured request against a shared async client and keeps
+    live statistics that another thread may read through `report()`.
+    """
+    def __init__(self, client, config):
+        self.client = client
+        self.config = config
+        self.stats = LoadTestStats()
+        self.in_flight = 0
+        # Encode the body once instead of on every request
+        self._headers = dict(config.headers)
+        self._content = None
+        if config.json_body is not None:
+            self._content = json.dumps(config.json_body).encode("utf-8")
+            self._headers.setdefault("Content-Type", "application/json")
+        self._measure_from = None
+        self._deadline = None
+        self._stopped = False
+        self._done = False
+
+    def stop(self):
+        self._stopped = True
+
+    def _running(self):
+        return not self._stopped and time.perf_counter() < self._deadline
+
+    def report(self):
+        now = time.perf_counter()
+        if self._measure_from is None:
+            return build_report(self.stats, 0.0)
+        warming_up = now < self._measure_from
+        end = min(now, self._deadline) if not self._stopped else now
+        elapsed = max(0.0, end - self._measure_from)
+        return build_report(self.stats.copy(), elapsed, self.in_flight, warming_up, self._done)
+
+    def take_stats(self):
+        """Hand over everything recorded so far and start a fresh delta."""
+        stats, self.stats = self.stats, LoadTestStats()
+        return stats
+
+    async def _one(self):
+        cfg = self.config
+        self.in_flight += 1
+        HTTP_IN_FLIGHT.inc(("load",))
+        t0 = time.perf_counter()
+        try:
+            response = await self.client.request(cfg.method, cfg.url, params=cfg.params, content=self._content,
+                                                 headers=self._headers, auth=cfg.auth)
+            await response.aread()
+            outcome = response.status_code
+        except Exception as e:
+            outcome = e.__class__.__name__
+        finally:
+            self.in_flight -= 1
+            HTTP_IN_FLIGHT.dec(("load",))
+        t1 = time.perf_counter()
+        if t0 >= self._measure_from:
+            self.stats.record(t1 - t0, outcome)
+            HTTP_REQUESTS.inc(("load", cfg.method, str(outcome)))
+            HTTP_LATENCY.observe(t1 - t0, ("load",))
+
+    async def _closed_loop(self):
+        async def worker():
+            while self._running():
+                await self._one()
+        await asyncio.gather(*(worker() for _ in range(self.config.concurrency)))
+
+    async def _open_loop(self):
+        interval = 1.0 / self.config.target_rps
+        tasks = set()
+        next_at = time.perf_counter()
+        while self._running():
+            if self.in_flight < self.config.max_in_flight:
+                task = asyncio.ensure_future(self._one())
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def run(self):
+        start = time.perf_counter()
+        self.stats = LoadTestStats()
+        self._measure_from = start + self.config.warmup
+        self._deadline = self._measure_from + self.config.duration
+        try:
+            if self.config.target_rps:
+                await self._open_loop()
+            else:
+                await self._closed_loop()
+        finally:
+            self._done = True
+        return self.report()
+
+
+def _split(total, parts):
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+async def _worker_run(config, worker_id, results, start_event, stop_event, report_interval):
+    import httpx
+    limits = httpx.Limits(max_connections=max(config.concurrency, config.max_in_flight if config.target_rps else 0, 1))
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        tester = LoadTester(client, config)
+        results.put(("ready", worker_id, None))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, start_event.wait)
+        if stop_event.is_set():
+            results.put(("done", worker_id, None))
+            return
+
+        run = asyncio.ensure_future(tester.run())
+        while not run.done():
+            await asyncio.wait([run], timeout=report_interval)
+            if stop_event.is_set():
+                tester.stop()
+            results.put(("stats", worker_id, tester.take_stats().to_dict()))
+        run.result()
+    results.put(("done", worker_id, None))
+
+
+def _worker_main(config, worker_id, results, start_event, stop_event, report_interval):
+    # Child process entry point: its own event loop and its own client
+    try:
+        asyncio.run(_worker_run(config, worker_id, results, start_event, stop_event, report_interval))
+    except BaseException as e:
+        results.put(("error", worker_id, f"{e.__class__.__name__}: {e}"))
+
+
+class MultiProcessLoadTest:
+    """
+    Fans a load test out over `processes` worker processes, each running its
+    own event loop and async client, so request generation and JSON/HTTP
+    parsing are not limited by one interpreter's GIL.
+
+    Concurrency (or target RPS) is split across workers. Workers connect,
+    report ready, then start together; every `report_interval` seconds they
+    send the delta of their histogram and counters, which the parent merges.
+    """
+    def __init__(self, config, processes=None, report_interval=0.5):
+        self.config = config
+        self.processes = processes or multiprocessing.cpu_count()
+        self.report_interval = report_interval
+        self.stats = LoadTestStats()
+        self.errors = []
+        self._ctx = multiprocessing.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._start_event = self._ctx.Event()
+        self._stop_event = self._ctx.Event()
+        self._workers = []
+        self._ready = set()
+        self._finished = set()
+        self._measure_from = None
+        self._stopped_at = None
+        self._lock = threading.Lock()
+
+    def _worker_configs(self):
+        cfg = self.config
+        shares = _split(cfg.concurrency, self.processes)
+        configs = []
+        for i in range(self.processes):
+            rps = cfg.target_rps / self.processes if cfg.target_rps else None
+            if not rps and not shares[i]:
+                continue
+            configs.append(LoadTestConfig(
+                cfg.method, cfg.url, headers=cfg.headers, auth=cfg.auth, params=cfg.params,
+                json_body=cfg.json_body, duration=cfg.duration, warmup=cfg.warmup,
+                concurrency=shares[i] or 1, target_rps=rps,
+                max_in_flight=max(1, cfg.max_in_flight // self.processes),
+            ))
+        return configs
+
+    def start(self):
+        for worker_id, config in enumerate(self._worker_configs()):
+            process = self._ctx.Process(
+                target=_worker_main, name=f"hackzilla-load-{worker_id}", daemon=True,
+                args=(config, worker_id, self._results, self._start_event, self._stop_event, self.report_interval),
+            )
+            process.start()
+            self._workers.append(process)
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self._start_event.set()
+
+    @property
+    def done(self):
+        with self._lock:
+            return len(self._finished) == len(self._workers)
+
+    def poll(self):
+        """Merge whatever the workers have sent so far. Safe from any thread."""
+        with self._lock:
+            while True:
+                try:
+                    kind, worker_id, payload = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "stats":
+                    delta = LoadTestStats.from_dict(payload)
+                    self.stats.merge(delta)
+                    record_metrics(delta, self.config.method)
+                elif kind == "ready":
+                    self._ready.add(worker_id)
+                    if len(self._ready) == len(self._workers) and not self._start_event.is_set():
+                        self._measure_from = time.perf_counter() + self.config.warmup
+                        self._start_event.set()
+                elif kind in ("done", "error"):
+                    if kind == "error":
+                        self.errors.append(payload)
+                    self._finished.add(worker_id)
+            # A worker that died without reporting still counts as finished
+            for worker_id, process in enumerate(self._workers):
+                if process.exitcode not in (None, 0) and worker_id not in self._finished:
+                    self.errors.append(f"worker {worker_id} exited with code {process.exitcode}")
+                    self._finished.add(worker_id)
+
+    def report(self):
+        self.poll()
+        with self._lock:
+            done = len(self._finished) == len(self._workers)
+            if self._measure_from is None:
+                return build_report(self.stats.copy(), 0.0, done=done)
+            now = time.perf_counter()
+            if done and self._stopped_at is None:
+                self._stopped_at = now
+            end = min(self._stopped_at or now, self._measure_from + self.config.duration)
+            elapsed = max(0.0, end - self._measure_from)
+            report = build_report(self.stats.copy(), elapsed, warming_up=now < self._measure_from, done=done)
+            report["processes"] = len(self._workers)
+            report["worker_errors"] = list(self.errors)
+            return report
+
+    def wait(self, timeout=None):
+        """Block until every worker has finished; returns the final report."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done:
+            if deadline is not None and time.monotonic() > deadline:
+                self.stop()
+                deadline = None
+            time.sleep(0.05)
+            self.poll()
+        for process in self._workers:
+            process.join(5)
+        return self.report()
+
+    def run(self):
+        return self.start().wait()
@@ -0,0 +1,155 @@
+# load_test_ui.py
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+import json
+from bulk_runner import prepare_auth
+from http_engine import get_engine
+from load_test import LoadTestConfig, LoadTester, MultiProcessLoadTest, format_report
+from ui_worker import BackgroundRunner
+
+REFRESH_MS = 500
+
+
+class LoadTestFrame(tk.Frame):
+    def __init__(self, parent, auth=None, http_engine=None):
+        super().__init__(parent, borderwidth=1, relief="groove", padx=10, pady=10)
+        self.auth = auth
+        self._http_engine = http_engine
+        self.runner = BackgroundRunner(self, max_workers=1, name="hackzilla-load")
+        self.tester = None
+
+        self.method_var = tk.StringVar(value="GET")
+        self.mode_var = tk.StringVar(value="concurrency")
+        self.level_var = tk.StringVar(value="10")
+        self.duration_var = tk.StringVar(value="30")
+        self.warmup_var = tk.StringVar(value="5")
+        self.processes_var = tk.StringVar(value="1")
+        self.build_ui()
+
+    @property
+    def http_engine(self):
+        if self._http_engine is None:
+            self._http_engine = get_engine()
+        return self._http_engine
+
+    def build_ui(self):
+        tk.Label(self, text="Load Test", font=('Segoe UI', 12, 'bold')).pack(pady=10)
+
+        tk.Label(self, text="Endpoint URL:", font=('Segoe UI', 10)).pack(anchor='w', padx=10)
+        self.url_entry = tk.Entry(self, font=('Segoe UI', 10), width=80)
+        self.url_entry.pack(padx=10, pady=5)
+
+        options = tk.Frame(self)
+        options.pack(fill=tk.X, padx=10, pady=5)
+        tk.Label(options, text="Method:").pack(side=tk.LEFT)
+        ttk.Combobox(options, textvariable=self.method_var, values=["GET", "POST", "PUT", "DELETE"],
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Radiobutton(options, text="Concurrency", variable=self.mode_var, value="concurrency").pack(side=tk.LEFT)
+        ttk.Radiobutton(options, text="Target RPS", variable=self.mode_var, value="rps").pack(side=tk.LEFT)
+        tk.Entry(options, textvariable=self.level_var, width=6).pack(side=tk.LEFT, padx=(5, 15))
+        tk.Label(options, text="Duration (s):").pack(side=tk.LEFT)
+        tk.Entry(options, textvariable=self.duration_var, width=6).pack(side=tk.LEFT, padx=(5, 15))
+        tk.Label(options, text="Warm-up (s):").pack(side=tk.LEFT)
+        tk.Entry(options, textvariable=self.warmup_var, width=6).pack(side=tk.LEFT, padx=(5, 15))
+        tk.Label(options, text="Processes:").pack(side=tk.LEFT)
+        tk.Entry(options, textvariable=self.processes_var, width=4).pack(side=tk.LEFT, padx=5)
+
+        tk.Label(self, text="Request Body (JSON):", font=('Segoe UI', 10)).pack(anchor='w', padx=10)
+        self.body_text = scrolledtext.ScrolledText(self, font=('Consolas', 10), wrap='word', width=85, height=6)
+        self.body_text.pack(padx=10, pady=5)
+
+        buttons = tk.Frame(self)
+        buttons.pack(pady=10)
+        self.start_btn = tk.Button(buttons, text="Start", command=self.start, font=('Segoe UI', 10))
+        self.start_btn.pack(side=tk.LEFT, padx=5)
+        self.stop_btn = tk.Button(buttons, text="Stop", command=self.stop, font=('Segoe UI', 10), state="disabled")
+        self.stop_btn.pack(side=tk.LEFT, padx=5)
+
+        tk.Label(self, text="Results:", font=('Segoe UI', 10)).pack(anchor='w', padx=10)
+        self.results_text = scrolledtext.ScrolledText(self, font=('Consolas', 10), wrap='none', width=85, height=8)
+        self.results_text.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+
+    def _show(self, text):
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, text)
+
+    def build_config(self):
+        method = self.method_var.get()
+        body = self.body_text.get("1.0", tk.END).strip()
+        json_body = json.loads(body) if body and method in ("POST", "PUT") else None
+        level = float(self.level_var.get())
+        headers = self.auth.build_headers() if self.auth else {}
+        # OAuth2 when configured, otherwise basic auth
+        auth = self.auth.build_auth() if self.auth else None
+        return LoadTestConfig(
+            method, self.url_entry.get().strip(), headers=headers, auth=auth, json_body=json_body,
+            duration=float(self.duration_var.get()), warmup=float(self.warmup_var.get()),
+            concurrency=int(level) if self.mode_var.get() == "concurrency" else 10,
+            target_rps=level if self.mode_var.get() == "rps" else None,
+        )
+
+    def start(self):
+        if self.tester is not None:
+            return
+        try:
+            config = self.build_config()
+            processes = int(self.processes_var.get())
+        except (ValueError, json.JSONDecodeError) as e:
+            self._show(f"❌ Invalid settings: {e}")
+            return
+        if not config.url:
+            self._show("❌ Endpoint URL is required.")
+            return
+        self.start_btn.config(state="disabled")
+        self.stop_btn.config(state="normal")
+        if processes > 1:
+            # Worker processes each run their own loop and client; the
+            # parent only merges their partial histograms
+            oauth = self.auth.oauth_provider() if self.auth else None
+            if oauth is not None:
+                # The OAuth2 callable can't be pickled; workers get the token as a header
+                config.auth = None
+            tester = MultiProcessLoadTest(config, processes=processes)
+            self.tester = tester
+            self.runner.submit("load", self._run_processes, self._on_done, self._on_error, tester, oauth)
+        else:
+            engine = self.http_engine
+            self.tester = LoadTester(engine.client, config)
+            self.runner.watch("load", engine.submit(self._run_local(self.tester)), self._on_done, self._on_error)
+        self._refresh()
+
+    @staticmethod
+    async def _run_local(tester):
+        # Fetch the OAuth2 token before the clock starts, off the event loop
+        await prepare_auth(tester.config.auth)
+        return await tester.run()
+
+    @staticmethod
+    def _run_processes(tester, oauth):
+        # Worker thread. A token that expires mid-run is not refreshed in the workers
+        if oauth is not None:
+            tester.config.headers["Authorization"] = f"Bearer {oauth.token()}"
+        return tester.start().wait()
+
+    def stop(self):
+        if self.tester is not None:
+            self.tester.stop()
+
+    def _refresh(self):
+        if self.tester is None:
+            return
+        self._show(format_report(self.tester.report()))
+        self.after(REFRESH_MS, self._refresh)
+
+    def _finish(self):
+        self.tester = None
+        self.start_btn.config(state="normal")
+        self.stop_btn.config(state="disabled")
+
+    def _on_done(self, report):
+        self._finish()
+        self._show(format_report(report))
+
+    def _on_error(self, e):
+        self._finish()
+        self._show(f"❌ Load test failed: {e}")
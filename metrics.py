@@ -0,0 +1,305 @@
+# metrics.py
+"""
+In-process metrics with OpenMetrics text exposition.
+
+The HTTP and database layers update the counters, gauges and histograms
+defined at the bottom of this module. Updates never take a lock: every
+thread writes only to its own shard of each metric, and the shards are
+summed when the metrics are collected. A collection is therefore a little
+more work, and may miss an update that lands while it runs; the next one
+includes it.
+
+Export either from a local endpoint or to a file rewritten periodically:
+
+    HACKZILLA_METRICS_PORT=9464      http://127.0.0.1:9464/metrics
+    HACKZILLA_METRICS_FILE=run.prom  (every HACKZILLA_METRICS_INTERVAL s, default 15)
+
+or with `serve()` / `MetricsFileWriter` directly.
+"""
+import functools
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _labels_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), unit=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.unit = unit
+        # thread ident -> {label values: value}; each shard has one writer
+        self._shards = {}
+
+    def _shard(self):
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            shard = self._shards.setdefault(ident, {})
+        return shard
+
+    def _merged(self, add, copy=None):
+        merged = {}
+        # dict() of a dict is a single C-level copy, so the writers can keep
+        # going while we read
+        for shard in list(self._shards.values()):
+            for labels, value in dict(shard).items():
+                if labels in merged:
+                    merged[labels] = add(merged[labels], value)
+                else:
+                    merged[labels] = copy(value) if copy else value
+        return merged
+
+    def _header(self):
+        lines = [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {_escape(self.documentation)}"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        return self._merged(lambda a, b: a + b).get(tuple(labels), 0)
+
+    def samples(self):
+        lines = self._header()
+        for labels, value in sorted(self._merged(lambda a, b: a + b).items()):
+            lines.append(f"{self.name}_total{_labels_text(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A gauge moved up and down, such as requests in flight."""
+    kind = "gauge"
+
+    def inc(self, labels=(), amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def value(self, labels=()):
+        return self._merged(lambda a, b: a + b).get(tuple(labels), 0)
+
+    def samples(self):
+        lines = self._header()
+        for labels, value in sorted(self._merged(lambda a, b: a + b).items()):
+            lines.append(f"{self.name}{_labels_text(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), unit=None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, unit)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, labels=(), count=1):
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            # One counter per bucket plus +Inf, then the sum
+            row = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect_left(self.buckets, value)] += count
+        row[-1] += value * count
+
+    def time(self, labels=()):
+        """Decorator observing the wrapped function's duration in seconds."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, labels)
+            return wrapper
+        return decorate
+
+    def _rows(self):
+        return self._merged(lambda a, b: [x + y for x, y in zip(a, b)], copy=list)
+
+    def count(self, labels=()):
+        row = self._rows().get(tuple(labels))
+        return sum(row[:-1]) if row else 0
+
+    def samples(self):
+        lines = self._header()
+        bounds = [_format_value(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, row in sorted(self._rows().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, row):
+                cumulative += count
+                text = _labels_text(self.labelnames, labels, [("le", bound)])
+                lines.append(f"{self.name}_bucket{text} {cumulative}")
+            text = _labels_text(self.labelnames, labels)
+            lines.append(f"{self.name}_count{text} {cumulative}")
+            lines.append(f"{self.name}_sum{text} {_format_value(row[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), unit=None, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, unit, buckets))
+
+    def exposition(self):
+        """Every metric in OpenMetrics text format."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.samples())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsFileWriter:
+    """
+    Rewrites `path` with the current exposition every `interval` seconds
+    (and once more on `stop()`), replacing the file atomically so a
+    collector never reads half of it.
+    """
+    def __init__(self, path, registry=None, interval=15.0):
+        self.path = path
+        self.registry = registry or REGISTRY
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="hackzilla-metrics", daemon=True)
+            self._thread.start()
+        return self
+
+    def write(self):
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(self.registry.exposition())
+        os.replace(temp, self.path)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Metrics file not written: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+        self.write()
+
+
+def serve(port=9464, host="127.0.0.1", registry=None):
+    """
+    Serve the exposition at http://host:port/metrics on a daemon thread.
+    Returns the server; `shutdown()` and `server_close()` stop it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    registry = registry or REGISTRY
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="hackzilla-metrics-http", daemon=True).start()
+    return server
+
+
+def start_from_env(environ=os.environ):
+    """
+    Start the exporters named by HACKZILLA_METRICS_PORT and
+    HACKZILLA_METRICS_FILE; returns a function that stops them.
+    """
+    stoppers = []
+    port = environ.get("HACKZILLA_METRICS_PORT")
+    if port:
+        server = serve(int(port))
+        stoppers.append(lambda: (server.shutdown(), server.server_close()))
+    path = environ.get("HACKZILLA_METRICS_FILE")
+    if path:
+        writer = MetricsFileWriter(path, interval=float(environ.get("HACKZILLA_METRICS_INTERVAL") or 15)).start()
+        stoppers.append(writer.stop)
+
+    def stop():
+        for stopper in stoppers:
+            stopper()
+    return stop
+
+
+REGISTRY = Registry()
+HTTP_REQUESTS = REGISTRY.counter(
+    "hackzilla_http_requests", "HTTP requests completed, by source, method and status (or error class).",
+    ("source", "method", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "hackzilla_http_request_duration_seconds", "HTTP request latency, headers and body.",
+    ("source",), unit="seconds")
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "hackzilla_http_requests_in_flight", "HTTP requests sent and not yet completed.", ("source",))
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "hackzilla_db_query_duration_seconds", "Database query time, by operation.",
+    ("operation",), unit="seconds")
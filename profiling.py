@@ -0,0 +1,206 @@
+# profiling.py
+"""
+Span-based profiling for the request pipeline.
+
+Code marks stages with `span("name")` blocks or the `@traced` decorator.
+While the profiler is stopped (the default) both cost one attribute check;
+once started, every span is recorded with its thread and parent spans, and
+the session can be written as Chrome trace-event JSON (chrome://tracing,
+Perfetto) or as folded stacks for flamegraph.pl / speedscope.
+
+    from profiling import profiler, span, traced
+    profiler.start()
+    ...
+    profiler.write("session.json")   # or "session.folded"
+
+Setting HACKZILLA_PROFILE=<path> starts the profiler when Hackzilla
+launches and writes the file when it closes.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+# The enclosing spans; a ContextVar so coroutines interleaved on
+# one loop thread each keep their own stack
+_stack = ContextVar("hackzilla_span_stack", default=())
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "cat", "args", "start", "children", "token", "parent")
+
+    def __init__(self, profiler, name, cat, args):
+        self.profiler = profiler
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.children = 0
+
+    def __enter__(self):
+        stack = _stack.get()
+        self.parent = stack[-1] if stack else None
+        self.token = _stack.set(stack + (self,))
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        _stack.reset(self.token)
+        duration = end - self.start
+        if self.parent is not None:
+            self.parent.children += duration
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        self.profiler._record(self, duration)
+        return False
+
+    def path(self):
+        names = [self.name]
+        parent = self.parent
+        while parent is not None:
+            names.append(parent.name)
+            parent = parent.parent
+        return ";".join(reversed(names))
+
+
+class Profiler:
+    """
+    Collects finished spans in a bounded buffer (`max_spans`, oldest
+    dropped first). Safe to use from any thread and from coroutines.
+    """
+    def __init__(self, max_spans=500_000):
+        self.enabled = False
+        self.spans = deque(maxlen=max_spans)
+        self._origin = time.perf_counter_ns()
+        self._threads = {}
+
+    def start(self, clear=True):
+        if clear:
+            self.clear()
+        self.enabled = True
+        return self
+
+    def stop(self):
+        self.enabled = False
+        return self
+
+    def clear(self):
+        self.spans.clear()
+        self._threads.clear()
+        self._origin = time.perf_counter_ns()
+
+    def span(self, name, cat="app", **args):
+        """Context manager timing the enclosed block; a shared no-op while stopped."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, cat, args or None)
+
+    def traced(self, name=None, cat="app"):
+        """Decorator wrapping every call in a span (async functions included)."""
+        def decorate(fn):
+            label = name or fn.__qualname__
+            if _is_coroutine_function(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await fn(*args, **kwargs)
+                    with _Span(self, label, cat, None):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, label, cat, None):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _record(self, span, duration):
+        thread = threading.current_thread()
+        self._threads.setdefault(thread.ident, thread.name)
+        # deque.append is atomic, so recording needs no lock
+        self.spans.append((span.name, span.cat, span.start - self._origin, duration,
+                           max(0, duration - span.children), thread.ident, span.path(), span.args))
+
+    def chrome_trace(self):
+        """The recorded spans as a Chrome trace-event document."""
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in list(self._threads.items())]
+        for name, cat, start, duration, _, tid, _, args in list(self.spans):
+            event = {"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": tid,
+                     "ts": start / 1000, "dur": duration / 1000}
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def folded(self):
+        """
+        Folded stacks ("outer;inner <microseconds>"), one line per distinct
+        stack, weighted by self time.
+        """
+        totals = {}
+        for _, _, _, _, self_time, _, path, _ in list(self.spans):
+            totals[path] = totals.get(path, 0) + self_time
+        return "".join(f"{path} {round(ns / 1000)}\n" for path, ns in sorted(totals.items()) if ns > 0)
+
+    def summary(self):
+        """Per span name: count, total and self time in ms, heaviest self time first."""
+        rows = {}
+        for name, _, _, duration, self_time, _, _, _ in list(self.spans):
+            row = rows.setdefault(name, [0, 0, 0])
+            row[0] += 1
+            row[1] += duration
+            row[2] += self_time
+        return [{"name": name, "count": count, "total_ms": round(total / 1e6, 3), "self_ms": round(own / 1e6, 3)}
+                for name, (count, total, own) in sorted(rows.items(), key=lambda item: -item[1][2])]
+
+    def write(self, path):
+        """Write a Chrome trace, or folded stacks when `path` ends in .folded or .txt."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith((".folded", ".txt")):
+                f.write(self.folded())
+            else:
+                json.dump(self.chrome_trace(), f)
+        return path
+
+
+CO_COROUTINE = 0x80
+
+
+def _is_coroutine_function(fn):
+    # Same test as inspect.iscoroutinefunction, without importing inspect at startup
+    code = getattr(fn, "__code__", None)
+    return code is not None and bool(code.co_flags & CO_COROUTINE)
+
+
+profiler = Profiler()
+span = profiler.span
+traced = profiler.traced
+
+
+def start_from_env(environ=os.environ):
+    """Start the profiler if HACKZILLA_PROFILE names an output file; returns that path."""
+    path = environ.get("HACKZILLA_PROFILE")
+    if path:
+        profiler.start()
+    return path or None
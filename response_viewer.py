@@ -0,0 +1,406 @@
+# response_viewer.py
+import codecs
+import re
+import tempfile
+import threading
+from itertools import accumulate
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+from profiling import traced
+
+SPOOL_SIZE = 1024 * 1024
+READ_CHUNK = 1024 * 1024
+
+
+class JsonReindenter:
+    """
+    Re-indents JSON fed in arbitrary chunks, producing the same layout as
+    `json.dumps(indent=2)` without ever holding the document in memory.
+    Works on structure only, so values keep their exact spelling and
+    malformed input comes out reformatted as far as possible rather than
+    rejected.
+
+    Each chunk is tokenized by one regex into whole strings, brackets and
+    the runs between them; only those tokens cost a Python step.
+    """
+    _TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]|[^"{}\[\]]+|"')
+    _STRING_SPECIAL = re.compile(r'["\\]')
+    _WHITESPACE = str.maketrans("", "", " \t\r\n")
+
+    def __init__(self, indent=2, max_carry=1024 * 1024):
+        self.indent = indent
+        self.max_carry = max_carry
+        self.depth = 0
+        self.pending_open = False
+        # Set while inside a string too long to carry between chunks
+        self.in_string = False
+        self.escape = False
+        self._carry = ""
+        self._newlines = []
+
+    def _newline(self):
+        depth = max(self.depth, 0)
+        while len(self._newlines) <= depth:
+            self._newlines.append("\n" + " " * (self.indent * len(self._newlines)))
+        return self._newlines[depth]
+
+    def _finish_long_string(self, text, out):
+        """Copy string content until its closing quote; return where it ended."""
+        i = 0
+        while i < len(text):
+            if self.escape:
+                self.escape = False
+                i += 1
+                continue
+            match = self._STRING_SPECIAL.search(text, i)
+            if match is None:
+                break
+            i = match.end()
+            if match.group() == "\\":
+                self.escape = True
+            else:
+                self.in_string = False
+                out.append(text[:i])
+                return i
+        out.append(text)
+        return len(text)
+
+    def feed(self, text):
+        out = []
+        text = self._carry + text
+        self._carry = ""
+        if self.in_string:
+            text = text[self._finish_long_string(text, out):]
+            if self.in_string:
+                return "".join(out)
+
+        tokens = self._TOKEN.findall(text)
+        for index, tok in enumerate(tokens):
+            c = tok[0]
+            if c == '"':
+                if tok == '"':
+                    # Unterminated string: wait for the rest of it
+                    rest = "".join(tokens[index:])
+                    if len(rest) <= self.max_carry:
+                        self._carry = rest
+                        break
+                    if self.pending_open:
+                        self.pending_open = False
+                        out.append(self._newline())
+                    # No closing quote in `rest`; this only tracks a trailing escape
+                    self.in_string = True
+                    self._finish_long_string(rest[1:], [])
+                    out.append(rest)
+                    break
+                if self.pending_open:
+                    self.pending_open = False
+                    out.append(self._newline())
+                out.append(tok)
+            elif c in "{[":
+                if self.pending_open:
+                    out.append(self._newline())
+                out.append(tok)
+                self.depth += 1
+                self.pending_open = True
+            elif c in "}]":
+                self.depth -= 1
+                if self.pending_open:
+                    # Empty container stays on one line: {} / []
+                    self.pending_open = False
+                else:
+                    out.append(self._newline())
+                out.append(tok)
+            else:
+                tok = tok.translate(self._WHITESPACE)
+                if not tok:
+                    continue
+                if self.pending_open:
+                    self.pending_open = False
+                    out.append(self._newline())
+                if "," in tok:
+                    tok = tok.replace(",", "," + self._newline())
+                if ":" in tok:
+                    tok = tok.replace(":", ": ")
+                out.append(tok)
+        return "".join(out)
+
+    def flush(self):
+        """Text still held back at the end of the input (an unterminated string)."""
+        carry, self._carry = self._carry, ""
+        return carry
+
+
+class LineSpool:
+    """
+    Display text written in pieces to a spooled temp file (UTF-8), with the
+    byte offset of every `step`-th line kept so any window of lines can be
+    read back with one seek. Lines longer than `max_line` bytes are broken
+    so a minified body never turns into one enormous line.
+    """
+    def __init__(self, max_line=2000, step=64, spool_size=SPOOL_SIZE):
+        self.max_line = max_line
+        self.step = step
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        self._offset = 0
+        self._line_len = 0
+        self._complete = 0
+        self._checkpoints = [0]
+        self._lock = threading.Lock()
+
+    @property
+    def line_count(self):
+        return self._complete + (1 if self._line_len else 0)
+
+    def _wrap(self, lines):
+        out = []
+        carry = self._line_len
+        for line in lines:
+            while carry + len(line) > self.max_line:
+                cut = self.max_line - carry
+                # Never split inside a multi-byte character
+                while cut > 0 and (line[cut] & 0xC0) == 0x80:
+                    cut -= 1
+                out.append(line[:cut])
+                line = line[cut:]
+                carry = 0
+            out.append(line)
+            carry = 0
+        return out
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        if not data:
+            return
+        # lines[0] continues the current partial line, lines[-1] starts a new one
+        lines = data.split(b"\n")
+        if self._line_len + len(lines[0]) > self.max_line or max(map(len, lines)) > self.max_line:
+            lines = self._wrap(lines)
+            data = b"\n".join(lines)
+        ends = list(accumulate(map(len, lines)))
+        first = (-self._complete) % self.step or self.step
+        with self._lock:
+            self._file.seek(0, 2)
+            self._file.write(data)
+            # Line k of this write starts after k newlines and the k lines before it
+            self._checkpoints.extend(self._offset + ends[k - 1] + k for k in range(first, len(lines), self.step))
+            self._offset += len(data)
+            self._complete += len(lines) - 1
+            self._line_len = self._line_len + len(lines[0]) if len(lines) == 1 else len(lines[-1])
+
+    def lines(self, start, count):
+        """Up to `count` display lines starting at line `start`."""
+        start = max(0, start)
+        block = min(start // self.step, len(self._checkpoints) - 1)
+        with self._lock:
+            self._file.seek(self._checkpoints[block])
+            for _ in range(start - block * self.step):
+                if not self._file.readline():
+                    return []
+            lines = []
+            for _ in range(count):
+                line = self._file.readline()
+                if not line:
+                    break
+                lines.append(line.rstrip(b"\n").decode("utf-8", errors="replace"))
+            return lines
+
+    def iter_bytes(self, chunk_size=READ_CHUNK):
+        with self._lock:
+            self._file.seek(0)
+            while True:
+                data = self._file.read(chunk_size)
+                if not data:
+                    return
+                yield data
+
+    def close(self):
+        self._file.close()
+
+
+class ResponseBody:
+    """
+    A response body streamed chunk by chunk into a spooled temp file (kept
+    in memory up to `spool_size`, on disk beyond), and the line-indexed
+    display text built from it by `finish()`. JSON bodies are re-indented
+    on the way; anything else is shown as decoded text. `finish()` may run
+    on a worker thread while the viewer already shows the first lines.
+    """
+    def __init__(self, content_type="", encoding=None, spool_size=SPOOL_SIZE):
+        self.content_type = content_type or ""
+        self.encoding = encoding or "utf-8"
+        self.raw = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        self.size = 0
+        self.view = LineSpool(spool_size=spool_size)
+        self.finished = False
+        self.closed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_text(cls, text):
+        body = cls("text/plain")
+        body.write(text.encode("utf-8"))
+        body.finish()
+        return body
+
+    def write(self, chunk):
+        with self._lock:
+            self.raw.write(chunk)
+            self.size += len(chunk)
+
+    def read(self, offset, size):
+        with self._lock:
+            if self.closed:
+                return b""
+            self.raw.seek(offset)
+            data = self.raw.read(size)
+            self.raw.seek(0, 2)
+            return data
+
+    def iter_raw(self, chunk_size=READ_CHUNK):
+        offset = 0
+        while True:
+            data = self.read(offset, chunk_size)
+            if not data:
+                return
+            offset += len(data)
+            yield data
+
+    def head(self, limit):
+        return self.read(0, limit)
+
+    def is_json(self):
+        if "json" in self.content_type.lower():
+            return True
+        return self.head(64).lstrip()[:1] in (b"{", b"[")
+
+    def _decoder(self):
+        try:
+            return codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        except LookupError:
+            return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def head_text(self, limit):
+        """The first `limit` bytes, decoded."""
+        return self._decoder().decode(self.head(limit), final=True)
+
+    @traced("response.format", "format")
+    def finish(self, preamble=""):
+        """
+        Build the display lines, after `preamble` (e.g. status and headers);
+        safe to run off the Tk thread.
+        """
+        decoder = self._decoder()
+        if preamble:
+            self.view.write(preamble)
+        reindenter = JsonReindenter() if self.is_json() else None
+        for data in self.iter_raw():
+            text = decoder.decode(data)
+            self.view.write(reindenter.feed(text) if reindenter else text)
+        tail = decoder.decode(b"", final=True)
+        if reindenter:
+            tail = reindenter.feed(tail) + reindenter.flush()
+        if tail and not self.closed:
+            self.view.write(tail)
+        self.finished = True
+        return self
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self.raw.close()
+            self.view.close()
+
+
+class ResponseViewer(ttk.Frame):
+    """
+    Read-only text view over a `ResponseBody` that only ever holds the lines
+    currently on screen; scrolling re-reads the visible window from the
+    body's line index. While the body is still being formatted the view
+    refreshes every REFRESH_MS so lines appear as they are produced.
+    """
+    REFRESH_MS = 200
+
+    def __init__(self, parent, height=10, width=50):
+        super().__init__(parent)
+        self.body = None
+        self.top = 0
+        self._height = height
+
+        self.vscroll = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scroll)
+        self.vscroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.hscroll = ttk.Scrollbar(self, orient=tk.HORIZONTAL)
+        self.hscroll.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text = tk.Text(self, height=height, width=width, wrap="none",
+                            xscrollcommand=self.hscroll.set)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.config(state=tk.DISABLED)
+        self.hscroll.config(command=self.text.xview)
+
+        self.text.bind("<Configure>", lambda e: self._render())
+        self.text.bind("<MouseWheel>", lambda e: self.scroll_by(-3 if e.delta > 0 else 3) or "break")
+        self.text.bind("<Button-4>", lambda e: self.scroll_by(-3) or "break")
+        self.text.bind("<Button-5>", lambda e: self.scroll_by(3) or "break")
+        for key, step in (("<Up>", -1), ("<Down>", 1)):
+            self.text.bind(key, lambda e, s=step: self.scroll_by(s) or "break")
+        self.text.bind("<Prior>", lambda e: self.scroll_by(-self.visible_lines()) or "break")
+        self.text.bind("<Next>", lambda e: self.scroll_by(self.visible_lines()) or "break")
+        self.text.bind("<Control-Home>", lambda e: self.scroll_to(0) or "break")
+        self.text.bind("<Control-End>", lambda e: self.scroll_to(self.line_count()) or "break")
+
+    def show(self, body):
+        """Display `body`, closing the one shown before."""
+        if self.body is not None and self.body is not body:
+            self.body.close()
+        self.body = body
+        self.top = 0
+        self._render()
+        if not body.finished:
+            self.after(self.REFRESH_MS, self._refresh, body)
+
+    def refresh(self):
+        self._render()
+
+    def _refresh(self, body):
+        if body is not self.body or body.closed:
+            return
+        self._render()
+        if not body.finished:
+            self.after(self.REFRESH_MS, self._refresh, body)
+
+    def set_text(self, text):
+        self.show(ResponseBody.from_text(text))
+
+    def line_count(self):
+        return self.body.view.line_count if self.body is not None else 0
+
+    def visible_lines(self):
+        linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace") or 1
+        height = self.text.winfo_height()
+        return max(1, height // linespace) if height > 1 else self._height
+
+    def scroll_by(self, lines):
+        self.scroll_to(self.top + lines)
+
+    def scroll_to(self, line):
+        self.top = max(0, min(line, self.line_count() - self.visible_lines()))
+        self._render()
+
+    def _on_scroll(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * self.line_count()))
+        elif action == "scroll":
+            amount = int(args[0])
+            self.scroll_by(amount * self.visible_lines() if args[1] == "pages" else amount)
+
+    def _render(self):
+        visible = self.visible_lines()
+        total = self.line_count()
+        lines = self.body.view.lines(self.top, visible) if self.body is not None else []
+        self.text.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.config(state=tk.DISABLED)
+        if total > visible:
+            self.vscroll.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.vscroll.set(0.0, 1.0)
@@ -0,0 +1,80 @@
+# schema_model.py
+from collections import namedtuple
+
+Column = namedtuple(
+    "Column",
+    ["name", "data_type", "nullable", "primary_key", "max_length",
+     "precision", "scale", "foreign_key"]
+)
+
+ForeignKey = namedtuple("ForeignKey", ["table", "column"])
+
+
+class Table:
+    __slots__ = ("name", "columns", "_by_name")
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = tuple(columns)
+        self._by_name = {c.name: c for c in self.columns}
+
+    def column(self, name):
+        return self._by_name.get(name)
+
+    @property
+    def primary_key(self):
+        return [c.name for c in self.columns if c.primary_key]
+
+    @property
+    def foreign_keys(self):
+        return {c.name: c.foreign_key for c in self.columns if c.foreign_key}
+
+    def column_pairs(self):
+        """(name, data_type) pairs, the same shape `DBConnector.get_table_columns()` returns."""
+        return [(c.name, c.data_type) for c in self.columns]
+
+
+class Schema:
+    """
+    Compact, read-only snapshot of a database schema built from a single
+    catalog query. Lookups are dict-based and never touch the database.
+    """
+    __slots__ = ("tables",)
+
+    def __init__(self, tables):
+        self.tables = {t.name: t for t in tables}
+
+    def table_names(self):
+        return list(self.tables)
+
+    def table(self, name):
+        return self.tables.get(name)
+
+    def columns(self, table_name):
+        table = self.tables.get(table_name)
+        return table.column_pairs() if table else []
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build a schema from normalized catalog rows of the form
+        (table, column, data_type, nullable, max_length, precision, scale,
+         is_primary_key, fk_table, fk_column).
+        Rows must be ordered by table and column position; a column may
+        appear more than once when it takes part in several constraints.
+        """
+        tables = {}
+        for (table, name, data_type, nullable, max_length, precision, scale,
+             is_pk, fk_table, fk_column) in rows:
+            columns = tables.setdefault(table, {})
+            fk = ForeignKey(fk_table, fk_column) if fk_table else None
+            existing = columns.get(name)
+            if existing is None:
+                columns[name] = Column(name, data_type, bool(nullable), bool(is_pk),
+                                       max_length, precision, scale, fk)
+            else:
+                columns[name] = existing._replace(
+                    primary_key=existing.primary_key or bool(is_pk),
+                    foreign_key=existing.foreign_key or fk,
+                )
+        return cls(Table(name, cols.values()) for name, cols in tables.items())
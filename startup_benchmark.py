@@ -0,0 +1,99 @@
+# startup_benchmark.py
+"""
+Cold-start benchmark for Hackzilla.
+
+Each run starts a fresh interpreter, imports Hackzilla and, when a display
+is available, builds the main window and draws it once. The wall time of
+the whole process (interpreter start included) is reported, along with
+any heavy library that got imported during startup. Exits 1 if the
+median is over the budget or a heavy library was loaded.
+
+    python startup_benchmark.py [--runs 5] [--budget 0.5] [--imports-only]
+                                [--without-drivers]
+
+--without-drivers hides psycopg2, mysql-connector, requests and httpx
+from the child interpreter to check that startup doesn't depend on them.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Libraries that must not be imported until the feature using them is
+HEAVY_MODULES = ("psycopg2", "mysql.connector", "requests", "httpx", "asyncio",
+                 "multiprocessing", "sqlite3", "openpyxl")
+DRIVER_MODULES = ("psycopg2", "mysql", "mysql.connector", "requests", "httpx")
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+for name in {blocked!r}:
+    sys.modules[name] = None  # makes "import name" raise ImportError
+import Hackzilla
+imported = time.perf_counter()
+drawn = None
+if not {imports_only!r}:
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        root = None
+    if root is not None:
+        Hackzilla.HackzillaApp(root)
+        root.update()
+        drawn = time.perf_counter()
+        root.destroy()
+print(json.dumps({{
+    "import": imported - started,
+    "window": None if drawn is None else drawn - started,
+    "heavy": [m for m in {heavy!r} if sys.modules.get(m) is not None],
+}}))
+"""
+
+
+def run_once(imports_only=False, without_drivers=False):
+    code = CHILD.format(blocked=DRIVER_MODULES if without_drivers else (),
+                        imports_only=imports_only, heavy=HEAVY_MODULES)
+    here = os.path.dirname(os.path.abspath(__file__))
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup failed:\n{result.stderr}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["wall"] = wall
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds, median wall time")
+    parser.add_argument("--imports-only", action="store_true")
+    parser.add_argument("--without-drivers", action="store_true")
+    args = parser.parse_args(argv)
+
+    reports = [run_once(args.imports_only, args.without_drivers) for _ in range(args.runs)]
+    walls = [r["wall"] for r in reports]
+    median = statistics.median(walls)
+    windows = [r["window"] for r in reports if r["window"] is not None]
+    heavy = sorted({m for r in reports for m in r["heavy"]})
+
+    print(f"runs: {args.runs}")
+    print(f"process wall time: median {median * 1000:.0f} ms, max {max(walls) * 1000:.0f} ms")
+    print(f"import Hackzilla: median {statistics.median(r['import'] for r in reports) * 1000:.1f} ms")
+    if windows:
+        print(f"window drawn: median {statistics.median(windows) * 1000:.0f} ms after start")
+    elif not args.imports_only:
+        print("window drawn: skipped (no display)")
+    print(f"heavy modules loaded at startup: {', '.join(heavy) or 'none'}")
+    ok = median <= args.budget and not heavy
+    print("PASS" if ok else f"FAIL (budget {args.budget * 1000:.0f} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,68 +1,135 @@
+import threading
 import pytest
 import tkinter as tk
 from unittest.mock import patch, Mock
-from api_test_ui import ApiTestFrame
+from api_test_ui import ApiTestFrame, RequestCancelled
+
+class ImmediateRunner:
+    """Stands in for BackgroundRunner: runs jobs inline on the calling thread."""
+    def __init__(self, widget, *args, **kwargs):
+        pass
+
+    def submit(self, key, fn, on_success, on_error=None, *args, **kwargs):
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            return
+        on_success(result)
+
+    def cancel(self, key):
+        pass
+
+    def shutdown(self):
+        pass
+
+def make_response(status_code, text, elapsed=0.1, headers=None):
+    return Mock(status_code=status_code, elapsed=Mock(total_seconds=lambda: elapsed),
+                headers=headers or {}, encoding="utf-8",
+                iter_content=Mock(return_value=[text.encode("utf-8")] if text else []))
 
 @pytest.fixture
 def api_frame():
     root = tk.Tk()
-    frame = ApiTestFrame(root)
+    with patch("api_test_ui.BackgroundRunner", ImmediateRunner):
+        frame = ApiTestFrame(root)
     yield frame
     root.destroy()
 
 def test_send_get_request_success(api_frame):
     api_frame.url_entry.insert(0, "http://test.com")
     api_frame.method_var.set("GET")
-    mock_response = Mock(status_code=200, text="OK", elapsed=Mock(total_seconds=lambda: 0.1))
-    with patch("requests.get", return_value=mock_response):
+    with patch.object(api_frame.session, "request", return_value=make_response(200, "OK")) as mock_request:
         api_frame.send_request()
-    assert "Status Code: 200" in api_frame.response_text.get("1.0", tk.END)
-    assert "OK" in api_frame.response_text.get("1.0", tk.END)
+    assert mock_request.call_args[0] == ("GET", "http://test.com")
+    assert "Status Code: 200" in api_frame.response_view.text.get("1.0", tk.END)
+    assert "OK" in api_frame.response_view.text.get("1.0", tk.END)
+    assert "wait 100.0 ms" in api_frame.response_view.text.get("1.0", tk.END)
 
 def test_send_post_request_with_valid_json(api_frame):
     api_frame.url_entry.insert(0, "http://test.com")
     api_frame.method_var.set("POST")
     api_frame.body_text.insert("1.0", '{"foo": "bar"}')
-    mock_response = Mock(status_code=201, text="Created", elapsed=Mock(total_seconds=lambda: 0.2))
-    with patch("requests.post", return_value=mock_response):
+    with patch.object(api_frame.session, "request", return_value=make_response(201, "Created", 0.2)) as mock_request:
         api_frame.send_request()
-    assert "Status Code: 201" in api_frame.response_text.get("1.0", tk.END)
-    assert "Created" in api_frame.response_text.get("1.0", tk.END)
+    assert mock_request.call_args[1]["json"] == {"foo": "bar"}
+    assert "Status Code: 201" in api_frame.response_view.text.get("1.0", tk.END)
+    assert "Created" in api_frame.response_view.text.get("1.0", tk.END)
 
 def test_send_post_request_with_invalid_json(api_frame):
     api_frame.url_entry.insert(0, "http://test.com")
     api_frame.method_var.set("POST")
     api_frame.body_text.insert("1.0", '{"foo": bar}')  # invalid JSON
     api_frame.send_request()
-    assert "Invalid JSON format" in api_frame.response_text.get("1.0", tk.END)
+    assert "Invalid JSON format" in api_frame.response_view.text.get("1.0", tk.END)
 
 def test_send_put_request_with_valid_json(api_frame):
     api_frame.url_entry.insert(0, "http://test.com")
     api_frame.method_var.set("PUT")
     api_frame.body_text.insert("1.0", '{"foo": "baz"}')
-    mock_response = Mock(status_code=200, text="Updated", elapsed=Mock(total_seconds=lambda: 0.3))
-    with patch("requests.put", return_value=mock_response):
+    with patch.object(api_frame.session, "request", return_value=make_response(200, "Updated", 0.3)):
+        api_frame.send_request()
+    assert "Status Code: 200" in api_frame.response_view.text.get("1.0", tk.END)
+    assert "Updated" in api_frame.response_view.text.get("1.0", tk.END)
+
+def test_send_patch_request_with_custom_headers(api_frame):
+    api_frame.url_entry.insert(0, "http://test.com")
+    api_frame.method_var.set("PATCH")
+    api_frame.body_text.insert("1.0", '{"foo": 1}')
+    api_frame.headers_text.insert("1.0", "X-Trace: abc\nAccept: text/plain\n")
+    with patch.object(api_frame.session, "request", return_value=make_response(200, "Patched")) as mock_request:
         api_frame.send_request()
-    assert "Status Code: 200" in api_frame.response_text.get("1.0", tk.END)
-    assert "Updated" in api_frame.response_text.get("1.0", tk.END)
+    headers = mock_request.call_args[1]["headers"]
+    assert headers["X-Trace"] == "abc"
+    assert headers["Accept"] == "text/plain"
+    assert "Patched" in api_frame.response_view.text.get("1.0", tk.END)
+
+def test_send_head_request_shows_headers(api_frame):
+    api_frame.url_entry.insert(0, "http://test.com")
+    api_frame.method_var.set("HEAD")
+    response = make_response(200, "", headers={"Content-Length": "42"})
+    with patch.object(api_frame.session, "request", return_value=response):
+        api_frame.send_request()
+    assert "Content-Length: 42" in api_frame.response_view.text.get("1.0", tk.END)
+
+def test_invalid_header_line(api_frame):
+    api_frame.url_entry.insert(0, "http://test.com")
+    api_frame.headers_text.insert("1.0", "not a header")
+    api_frame.send_request()
+    assert "Invalid header line" in api_frame.response_view.text.get("1.0", tk.END)
 
 def test_send_delete_request_success(api_frame):
     api_frame.url_entry.insert(0, "http://test.com")
     api_frame.method_var.set("DELETE")
-    mock_response = Mock(status_code=204, text="", elapsed=Mock(total_seconds=lambda: 0.05))
-    with patch("requests.delete", return_value=mock_response):
+    with patch.object(api_frame.session, "request", return_value=make_response(204, "", 0.05)):
         api_frame.send_request()
-    assert "Status Code: 204" in api_frame.response_text.get("1.0", tk.END)
+    assert "Status Code: 204" in api_frame.response_view.text.get("1.0", tk.END)
 
 def test_send_request_unsupported_method(api_frame):
     api_frame.url_entry.insert(0, "http://test.com")
-    api_frame.method_var.set("PATCH")  # Not supported
+    api_frame.method_var.set("TRACE")  # Not supported
     api_frame.send_request()
-    assert "Unsupported method" in api_frame.response_text.get("1.0", tk.END)
+    assert "Unsupported method" in api_frame.response_view.text.get("1.0", tk.END)
 
 def test_send_request_exception(api_frame):
     api_frame.url_entry.insert(0, "http://test.com")
     api_frame.method_var.set("GET")
-    with patch("requests.get", side_effect=Exception("Network error")):
+    with patch.object(api_frame.session, "request", side_effect=Exception("Network error")):
         api_frame.send_request()
-    assert "Error: Network error" in api_frame.response_text.get("1.0", tk.END)
\ No newline at end of file
+    assert "Error: Network error" in api_frame.response_view.text.get("1.0", tk.END)
+
+def test_cancel_gives_the_next_send_a_fresh_session(api_frame):
+    first = api_frame.session
+    cancel_event = threading.Event()
+    api_frame._cancel_event = cancel_event  # a request in flight
+    api_frame.cancel_request()
+    assert cancel_event.is_set()
+    assert api_frame.session is not first
+    # The abandoned request answers late: its response is dropped and its session closed
+    session = Mock()
+    session.request.return_value = make_response(200, "late")
+    with pytest.raises(RequestCancelled):
+        api_frame._execute("GET", "http://test.com", {}, None, cancel_event, session)
+    session.request.return_value.close.assert_called_once()
+    session.close.assert_called_once()
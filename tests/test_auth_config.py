@@ -1,7 +1,13 @@
+import base64
+import json
+import threading
+import time
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import pytest
 import tkinter as tk
 import tkinter.messagebox as messagebox
-from auth_config import ApiAuth, AuthConfigUI
+from auth_config import ApiAuth, AuthConfigUI, OAuth2Auth, OAuth2Error, OAuth2TokenProvider
 
 @pytest.fixture(scope="module")
 def tk_root():
@@ -110,4 +116,171 @@ def test_authconfigui_preview_auth_calls_messagebox(monkeypatch, tk_root):
             self.username_var.get.return_value = ""
             self.password_var.get.return_value = ""
             auth = ApiAuth(self.token_var, self.api_key_var, self.username_var, self.password_var)
-    assert "'password': 'p1'" in captured.get("msg", "")
\ No newline at end of file
+    assert "'password': 'p1'" in captured.get("msg", "")
+
+class TokenHandler(BaseHTTPRequestHandler):
+    """Stub OAuth2 token endpoint; GET echoes the Authorization header back."""
+    protocol_version = "HTTP/1.1"
+    calls = []
+    expires_in = 3600
+    delay = 0
+    fail = False
+
+    def do_POST(self):
+        form = dict(urllib.parse.parse_qsl(self.rfile.read(int(self.headers["Content-Length"])).decode()))
+        TokenHandler.calls.append((form, self.headers.get("Authorization")))
+        time.sleep(TokenHandler.delay)
+        n = len(TokenHandler.calls)
+        if TokenHandler.fail:
+            self._reply(401, {"error": "invalid_client", "error_description": "bad secret"})
+        else:
+            self._reply(200, {"access_token": f"tok{n}", "token_type": "Bearer",
+                              "expires_in": TokenHandler.expires_in, "refresh_token": f"r{n}"})
+
+    def do_GET(self):
+        self._reply(200, {"authorization": self.headers.get("Authorization")})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def token_server():
+    TokenHandler.calls, TokenHandler.expires_in, TokenHandler.delay, TokenHandler.fail = [], 3600, 0, False
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), TokenHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_client_credentials_token_is_cached(token_server):
+    provider = OAuth2TokenProvider(token_server + "/token", "my id", "s3cret", scope="read", background=False)
+    assert provider.token() == "tok1"
+    assert provider.token() == "tok1"
+    assert len(TokenHandler.calls) == 1
+    form, authorization = TokenHandler.calls[0]
+    assert form == {"grant_type": "client_credentials", "scope": "read"}
+    assert authorization == "Basic " + base64.b64encode(b"my%20id:s3cret").decode()
+
+def test_expired_token_is_refetched(token_server):
+    now = [0.0]
+    TokenHandler.expires_in = 100
+    provider = OAuth2TokenProvider(token_server, "id", "secret", background=False, clock=lambda: now[0])
+    assert provider.token() == "tok1"
+    now[0] = 90.0
+    assert provider.token() == "tok1"
+    now[0] = 96.0  # inside the expiry skew
+    assert provider.token() == "tok2"
+
+def test_concurrent_callers_share_one_fetch(token_server):
+    TokenHandler.delay = 0.3
+    provider = OAuth2TokenProvider(token_server, "id", "secret", background=False)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(provider.token())) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["tok1"] * 10
+    assert len(TokenHandler.calls) == 1
+
+def test_background_refresh_before_expiry(token_server):
+    TokenHandler.expires_in = 1.5
+    provider = OAuth2TokenProvider(token_server, "id", "secret", refresh_margin=1.0, expiry_skew=0.1)
+    try:
+        assert provider.token() == "tok1"
+        deadline = time.monotonic() + 3
+        while len(TokenHandler.calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(TokenHandler.calls) == 2
+        assert provider.token() == "tok2"
+        assert len(TokenHandler.calls) == 2
+    finally:
+        provider.close()
+
+def test_refresh_token_grant_uses_rotated_token(token_server):
+    now = [0.0]
+    TokenHandler.expires_in = 10
+    provider = OAuth2TokenProvider(token_server, "id", None, refresh_token="r0", client_auth="body",
+                                   background=False, clock=lambda: now[0])
+    provider.token()
+    now[0] = 20.0
+    provider.token()
+    assert TokenHandler.calls[0][0] == {"grant_type": "refresh_token", "refresh_token": "r0", "client_id": "id"}
+    assert TokenHandler.calls[1][0]["refresh_token"] == "r1"
+    assert TokenHandler.calls[0][1] is None
+
+def test_token_endpoint_error(token_server):
+    TokenHandler.fail = True
+    provider = OAuth2TokenProvider(token_server, "id", "wrong", background=False)
+    with pytest.raises(OAuth2Error, match="401.*bad secret"):
+        provider.token()
+
+def test_api_auth_builds_oauth_for_httpx(token_server):
+    httpx = pytest.importorskip("httpx")
+    api = ApiAuth(username_var="u", password_var="p", oauth_url_var=token_server, client_id_var="id",
+                  client_secret_var="secret")
+    auth = api.build_auth()
+    assert isinstance(auth, OAuth2Auth)
+    assert api.oauth_provider() is auth.provider
+    with httpx.Client() as client:
+        assert client.get(token_server + "/api", auth=auth).json() == {"authorization": "Bearer tok1"}
+        assert client.get(token_server + "/api", auth=auth).json() == {"authorization": "Bearer tok1"}
+    assert len(TokenHandler.calls) == 1
+    auth.provider.close()
+    assert ApiAuth(username_var="u", password_var="p").build_auth() == ("u", "p")
+
+class FakeVar(tk.Variable):
+    """A Tk-less variable that fires write traces like a StringVar."""
+    def __init__(self, value=""):
+        self._value = value
+        self._traces = []
+    def get(self):
+        return self._value
+    def set(self, value):
+        self._value = value
+        for callback in self._traces:
+            callback("fake", "", "write")
+    def trace_add(self, mode, callback):
+        self._traces.append(callback)
+
+def test_snapshot_is_rebuilt_on_variable_write():
+    token, user, pwd = FakeVar("t1"), FakeVar("u"), FakeVar("")
+    api = ApiAuth(token_var=token, username_var=user, password_var=pwd)
+    first = api.snapshot()
+    assert first.version == 1 and dict(first.headers) == {"Authorization": "Bearer t1"}
+    assert first.auth is None
+    with pytest.raises(TypeError):
+        first.headers["x-api-key"] = "k"
+
+    token.set("t2")
+    pwd.set("p")
+    second = api.snapshot()
+    assert second.version == 3
+    assert dict(second.headers) == {"Authorization": "Bearer t2"}
+    assert second.auth == ("u", "p") == api.build_basic_auth()
+    # Readers holding the old snapshot keep a consistent view
+    assert first.headers["Authorization"] == "Bearer t1"
+    # build_headers hands out a copy callers may extend
+    api.build_headers()["Content-Type"] = "application/json"
+    assert "Content-Type" not in api.snapshot().headers
+
+def test_snapshot_reuses_oauth_provider_until_settings_change():
+    url, client_id = FakeVar("http://127.0.0.1:1/token"), FakeVar("client")
+    api = ApiAuth(oauth_url_var=url, client_id_var=client_id, client_secret_var=FakeVar("secret"))
+    provider = api.oauth_provider()
+    assert isinstance(api.snapshot().auth, OAuth2Auth)
+    api.refresh()
+    assert api.oauth_provider() is provider
+    client_id.set("other")
+    assert api.oauth_provider() is not provider
+    client_id.set("")
+    assert api.oauth_provider() is None and api.build_auth() is None
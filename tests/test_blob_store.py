@@ -0,0 +1,56 @@
+import sqlite3
+import pytest
+from blob_store import BlobStore
+
+def make_store(**kwargs):
+    conn = sqlite3.connect(":memory:")
+    return BlobStore(conn, **kwargs)
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_put_dedupes_and_compresses(codec):
+    store = make_store(codec=codec)
+    body = '{"error": "Bearer token required"}' * 20
+    keys = {store.put(body) for _ in range(100)}
+    assert len(keys) == 1
+    stats = store.stats()
+    assert stats["blobs"] == 1
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+    store._cache.clear()
+    assert store.text(keys.pop()) == body
+
+def test_small_bodies_stay_raw():
+    store = make_store()
+    key = store.put(b"ok")
+    assert store.conn.execute("SELECT codec FROM blobs").fetchone()[0] == "raw"
+    assert store.get(key) == b"ok"
+    assert store.put(None) is None and store.get(None) is None
+
+def test_str_and_bytes_share_a_key():
+    store = make_store()
+    assert store.put("héllo") == store.put("héllo".encode("utf-8"))
+
+def test_collect_garbage_keeps_referenced_blobs():
+    store = make_store()
+    store.conn.execute("CREATE TABLE refs (h TEXT)")
+    live, dead = store.put("live body"), store.put("dead body")
+    store.conn.execute("INSERT INTO refs VALUES (?)", (live,))
+    assert store.collect_garbage([("refs", "h")], [live, dead]) == 1
+    assert store.get(dead) is None and store.get(live) == b"live body"
+    store.conn.execute("DELETE FROM refs")
+    assert store.collect_garbage([("refs", "h")]) == 1
+    assert store.stats()["blobs"] == 0
+
+def test_unknown_codec_rejected():
+    with pytest.raises(ValueError):
+        make_store(codec="brotli")
+
+def test_put_after_rollback_stores_the_body_again():
+    store = make_store()
+    with pytest.raises(RuntimeError):
+        with store.conn:
+            store.put("lost")
+            raise RuntimeError("rollback")
+    key = store.put("lost")
+    store.conn.commit()
+    assert store.stats()["blobs"] == 1
+    assert BlobStore(store.conn).text(key) == "lost"
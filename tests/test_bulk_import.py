@@ -0,0 +1,98 @@
+import csv
+import sqlite3
+from unittest.mock import MagicMock
+import pytest
+from bulk_import import BulkImporter, ImportCancelled, map_columns, read_rows
+from dbconnector import DBConnector
+
+def make_db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE people (id INTEGER PRIMARY KEY, name TEXT NOT NULL, born DATE, score REAL)")
+    return conn, DBConnector("sqlite", conn)
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+class TypedConnector(DBConnector):
+    def get_table_columns(self, table_name):
+        return [("id", "integer"), ("name", "text"), ("born", "date"), ("score", "real")]
+
+def test_map_columns_normalizes_names():
+    mapping, unmapped = map_columns([" ID", "Full Name", "name", "extra"], ["id", "name", "full_name"])
+    assert mapping == [(0, "id"), (1, "full_name"), (2, "name")]
+    assert unmapped == ["extra"]
+
+def test_read_rows_batches(tmp_path):
+    path = write_csv(tmp_path / "p.csv", [["id"]] + [[str(i)] for i in range(5)])
+    header, batches = read_rows(path, batch_size=2)
+    assert header == ["id"]
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+def test_import_sqlite_with_rejections(tmp_path):
+    conn, _ = make_db()
+    db = TypedConnector("sqlite", conn)
+    rows = [["ID", "Name", "Born", "Score", "Ignored"],
+            ["1", "ann", "2000-01-02", "1.5", "x"],
+            ["two", "bob", "", "", ""],          # bad integer
+            ["3", "", "", "", ""],               # NOT NULL, caught by the validator
+            ["1", "dup", "", "", ""],            # primary key violation
+            ["4", "dan", "not a date", "", ""],  # bad date
+            ["5", "eve", "", "2", ""]]
+    path = write_csv(tmp_path / "people.csv", rows)
+    importer = BulkImporter(db, "people", batch_size=3)
+    result = importer.run(path)
+    assert result.inserted == 2 and result.rejected == 4
+    assert result.unmapped == ["Ignored"]
+    assert conn.execute("SELECT id, name, born, score FROM people ORDER BY id").fetchall() == [
+        (1, "ann", "2000-01-02", 1.5), (5, "eve", None, 2.0)]
+    with open(result.report_path, newline="", encoding="utf-8") as f:
+        report = list(csv.reader(f))
+    assert report[0][:3] == ["line", "error", "ID"]
+    assert [r[0] for r in report[1:]] == ["3", "4", "5", "6"]
+    assert report[1][1].startswith("id:")
+    assert report[2][1] == "name: is required"
+    assert report[3][1].startswith("UNIQUE constraint failed")
+    assert importer.progress.done and importer.progress.read == 6
+
+def test_import_is_one_transaction_and_cancellable(tmp_path):
+    conn, db = make_db()
+    path = write_csv(tmp_path / "p.csv", [["id", "name"]] + [[str(i), "n"] for i in range(10)])
+    importer = BulkImporter(db, "people", batch_size=2)
+    importer.cancel()
+    with pytest.raises(ImportCancelled):
+        importer.run(path)
+    assert conn.execute("SELECT COUNT(*) FROM people").fetchone()[0] == 0
+
+def test_import_without_matching_columns(tmp_path):
+    _, db = make_db()
+    path = write_csv(tmp_path / "p.csv", [["foo"], ["1"]])
+    with pytest.raises(ValueError):
+        BulkImporter(db, "people").run(path)
+
+def test_import_xlsx(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    import datetime
+    wb = openpyxl.Workbook()
+    wb.active.append(["id", "name", "born"])
+    wb.active.append([1, "ann", datetime.datetime(2000, 1, 2)])
+    path = str(tmp_path / "p.xlsx")
+    wb.save(path)
+    conn, _ = make_db()
+    result = BulkImporter(TypedConnector("sqlite", conn), "people").run(path)
+    assert result.inserted == 1
+    assert conn.execute("SELECT id, name, born FROM people").fetchone() == (1, "ann", "2000-01-02")
+
+def test_postgres_uses_copy(tmp_path):
+    conn = MagicMock()
+    cursor = conn.cursor.return_value
+    db = DBConnector("postgresql", conn)
+    db.get_table_columns = lambda table: [("id", "integer"), ("name", "text")]
+    path = write_csv(tmp_path / "p.csv", [["id", "name"], ["1", "a,b"], ["2", ""]])
+    result = BulkImporter(db, "people").run(path)
+    assert result.inserted == 2
+    sql, buffer = cursor.copy_expert.call_args[0]
+    assert sql == 'COPY "people" ("id", "name") FROM STDIN WITH (FORMAT csv)'
+    assert buffer.getvalue().splitlines() == ['1,"a,b"', "2,"]
+    conn.commit.assert_called_once()
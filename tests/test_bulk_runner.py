@@ -0,0 +1,161 @@
+import datetime
+import decimal
+import json
+import sqlite3
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from bulk_runner import BulkRunner, BulkResultsStore, row_to_request
+from dbconnector import DBConnector
+from http_engine import AsyncHttpEngine
+from metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        EchoHandler.received.append(body)
+        status = 400 if body.get("name") == "bad" else 201
+        reply = json.dumps({"error": "bad name"} if status == 400 else {"ok": True}).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    EchoHandler.received = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_row_to_request_get_uses_non_empty_params():
+    request = row_to_request("GET", "http://x/api", {"id": 1, "name": " ", "note": None})
+    assert request == {"method": "GET", "url": "http://x/api", "params": {"id": "1"}}
+
+def test_row_to_request_post_serializes_values_and_fills_url():
+    row = {"id": 7, "born": datetime.date(2000, 1, 2), "balance": decimal.Decimal("1.50")}
+    request = row_to_request("POST", "http://x/api/{id}", row)
+    assert request["url"] == "http://x/api/7"
+    assert request["json"] == {"id": 7, "born": "2000-01-02", "balance": "1.50"}
+
+def test_row_to_request_drops_audit_columns_like_the_form():
+    row = {"id": 7, "name": "a", "created_at": datetime.datetime(2024, 1, 2, 3, 4), "status": "new"}
+    request = row_to_request("PUT", "http://x/api/{id}/{status}", row)
+    assert request["url"] == "http://x/api/7/new"
+    assert request["json"] == {"id": 7, "name": "a"}
+    assert row_to_request("GET", "http://x/api", row)["params"] == {"id": "7", "name": "a"}
+
+def test_row_to_request_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        row_to_request("PATCH", "http://x", {})
+
+def test_iter_row_batches_sqlite():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER, name TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"n{i}") for i in range(5)])
+    db = DBConnector("sqlite", conn)
+    batches = list(db.iter_row_batches("t", batch_size=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert batches[0][0] == {"id": 0, "name": "n0"}
+
+def test_bulk_run_streams_rows_with_bounded_concurrency(server):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("CREATE TABLE people (id INTEGER, name TEXT)")
+    rows = [(i, "bad" if i % 10 == 0 else f"p{i}") for i in range(50)]
+    conn.executemany("INSERT INTO people VALUES (?, ?)", rows)
+    db = DBConnector("sqlite", conn)
+
+    sent_before = HTTP_REQUESTS.value(("bulk", "POST", "201"))
+    engine = AsyncHttpEngine().start()
+    store = BulkResultsStore(flush_every=7)
+    try:
+        runner = BulkRunner(engine.client, store, concurrency=5)
+        summary = engine.submit(
+            runner.run(db.iter_row_batches("people", batch_size=8), "POST", server + "/people")
+        ).result(timeout=30)
+    finally:
+        engine.shutdown()
+
+    assert summary[201]["count"] == 45
+    assert summary[400]["count"] == 5
+    assert len(EchoHandler.received) == 50
+    assert runner.progress.sent == 50 and runner.progress.failed == 5 and runner.progress.done
+    results = store.results(runner.run_id)
+    assert [r[0] for r in results] == list(range(50))
+    assert json.loads(store.body(runner.run_id, 10)) == {"error": "bad name"}
+    # 50 bodies, two distinct
+    assert store.blobs.stats()["blobs"] == 2
+    assert HTTP_REQUESTS.value(("bulk", "POST", "201")) == sent_before + 45
+    assert HTTP_IN_FLIGHT.value(("bulk",)) == 0
+
+def test_bulk_run_cancel_stops_sending(server):
+    def batches():
+        for i in range(1000):
+            yield [{"id": i, "name": "x"}]
+    engine = AsyncHttpEngine().start()
+    store = BulkResultsStore()
+    try:
+        runner = BulkRunner(engine.client, store, concurrency=2)
+        runner.cancel()
+        summary = engine.submit(runner.run(batches(), "POST", server)).result(timeout=30)
+    finally:
+        engine.shutdown()
+    assert summary == {}
+
+class FailingStore(BulkResultsStore):
+    def record(self, *args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+def test_bulk_run_failure_cancels_tasks_and_closes_iterator(server):
+    closed = threading.Event()
+
+    def batches():
+        try:
+            for i in range(100000):
+                yield [{"id": i, "name": "x"}]
+        finally:
+            closed.set()
+
+    engine = AsyncHttpEngine().start()
+    try:
+        runner = BulkRunner(engine.client, FailingStore(), concurrency=2)
+        with pytest.raises(sqlite3.OperationalError):
+            engine.submit(runner.run(batches(), "POST", server)).result(timeout=30)
+    finally:
+        engine.shutdown()
+    assert closed.is_set()
+    assert runner.progress.done
+
+class ThreadRecordingStore(BulkResultsStore):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.flush_threads = set()
+
+    def flush(self):
+        self.flush_threads.add(threading.current_thread().name)
+        super().flush()
+
+def test_bulk_results_are_written_off_the_event_loop(server):
+    def batches():
+        for i in range(0, 40, 8):
+            yield [{"id": n, "name": "x"} for n in range(i, i + 8)]
+    engine = AsyncHttpEngine().start()
+    store = ThreadRecordingStore(flush_every=5)
+    try:
+        runner = BulkRunner(engine.client, store, concurrency=4)
+        summary = engine.submit(runner.run(batches(), "POST", server)).result(timeout=30)
+    finally:
+        engine.shutdown()
+    threads = set(store.flush_threads)
+    assert threads and all(name.startswith("hackzilla-bulk-writer") for name in threads)
+    assert sum(s["count"] for s in summary.values()) == 40
+    assert len(store.results(runner.run_id)) == 40
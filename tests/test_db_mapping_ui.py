@@ -1,3 +1,6 @@
+import os
+import tempfile
+import threading
 import unittest
 from unittest.mock import patch, MagicMock, AsyncMock
 import sys
@@ -5,10 +8,32 @@ import sys
 # Mock external modules
 sys.modules['dbconnector'] = MagicMock()
 sys.modules['auth_config'] = MagicMock()
-sys.modules['httpx'] = MagicMock()
 
 import tkinter as tk
 from db_mapping_ui import DBFormApp
+from exporters import ExportProgress
+from validators import TableValidator
+
+class ImmediateRunner:
+    """Stands in for BackgroundRunner: runs jobs inline on the calling thread."""
+    def __init__(self, widget, *args, **kwargs):
+        self.submitted = []
+
+    def submit(self, key, fn, on_success, on_error=None, *args, **kwargs):
+        self.submitted.append(key)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            return
+        on_success(result)
+
+    def cancel(self, key):
+        pass
+
+    def shutdown(self):
+        pass
 
 class TestDBFormApp(unittest.TestCase):
     def setUp(self):
@@ -25,16 +50,23 @@ class TestDBFormApp(unittest.TestCase):
             ('last_name', 'varchar'),
             ('date_of_birth', 'date')
         ]
+        self.mock_dbconnector.get_validator.side_effect = lambda table: TableValidator.from_pairs(
+            self.mock_dbconnector.get_table_columns.return_value)
 
         # Patch DBConnector to return our mock
         patcher_db = patch('db_mapping_ui.DBConnector', return_value=self.mock_dbconnector)
         self.addCleanup(patcher_db.stop)
         self.mock_DBConnector = patcher_db.start()
 
+        patcher_runner = patch('db_mapping_ui.BackgroundRunner', ImmediateRunner)
+        self.addCleanup(patcher_runner.stop)
+        patcher_runner.start()
+
         # Mock ApiAuth
         self.mock_auth = MagicMock()
         self.mock_auth.build_headers.return_value = {'Authorization': 'Bearer testtoken'}
         self.mock_auth.build_basic_auth.return_value = ('user', 'pass')
+        self.mock_auth.build_auth.return_value = ('user', 'pass')
 
         # Patch PhotoImage to avoid file errors
         patcher_img = patch('db_mapping_ui.PhotoImage', return_value=MagicMock())
@@ -51,6 +83,8 @@ class TestDBFormApp(unittest.TestCase):
         self.assertIs(app.auth, self.mock_auth)
         self.assertIsNotNone(app.table_dropdown)
         self.assertIn('patients', app.table_dropdown['values'])
+        self.assertEqual(app.runner.submitted, ['tables', 'columns'])
+        self.assertEqual(app.status_var.get(), '')
 
     def test_validate_inputs_valid(self):
         app = DBFormApp(self.root, 'PostgreSQL', MagicMock(), self.mock_auth)
@@ -72,12 +106,14 @@ class TestDBFormApp(unittest.TestCase):
         app.inputs['first_name'] = MagicMock(get=MagicMock(return_value='John'))
         app.inputs['last_name'] = MagicMock(get=MagicMock(return_value='Doe'))
         errors = app.validate_inputs()
+        self.mock_dbconnector.get_table_columns.assert_called_once_with('patients')
+        self.mock_dbconnector.get_validator.assert_called_once_with('patients')
         self.assertIn('patient_id must be an integer.', errors)
         self.assertIn('date_of_birth must be YYYY-MM-DD.', errors)
 
-    @patch('db_mapping_ui.httpx.AsyncClient', new_callable=AsyncMock)
-    def test_perform_request(self, mock_async_client):
-        app = DBFormApp(self.root, 'PostgreSQL', MagicMock(), self.mock_auth)
+    def test_perform_request(self):
+        mock_engine = MagicMock()
+        app = DBFormApp(self.root, 'PostgreSQL', MagicMock(), self.mock_auth, http_engine=mock_engine)
         app.method_var.set('GET')
         app.api_path_var.set('http://localhost/api/patients')
         app.inputs = {
@@ -86,22 +122,72 @@ class TestDBFormApp(unittest.TestCase):
             'last_name': MagicMock(get=MagicMock(return_value='')),
             'date_of_birth': MagicMock(get=MagicMock(return_value=''))
         }
-        # Mock response
+        # Mock streamed response
+        async def chunks():
+            yield b'{"result":'
+            yield b' "ok"}'
         mock_response = MagicMock()
-        mock_response.json.return_value = {'result': 'ok'}
         mock_response.status_code = 200
-        mock_response.text = '{"result": "ok"}'
-        mock_async_client().__aenter__().get.return_value = mock_response
+        mock_response.headers = {'content-type': 'application/json'}
+        mock_response.charset_encoding = None
+        mock_response.aiter_bytes = chunks
+        mock_response.aclose = AsyncMock()
+        mock_engine.client.send = AsyncMock(return_value=mock_response)
 
-        # Patch _update_response to avoid UI calls
-        app._update_response = MagicMock()
+        request = app._collect_request()
+        self.assertEqual(request['params'], {'patient_id': '1'})
+        self.assertEqual(request['headers'], {'Authorization': 'Bearer testtoken'})
 
         import asyncio
-        asyncio.run(app._perform_request())
-        app._update_response.assert_called()
-        args = app._update_response.call_args[0][0]
-        self.assertIn('Status: 200', args)
-        self.assertIn('"result": "ok"', args)
+        outcome = asyncio.run(app._perform_request(request))
+        mock_engine.client.send.assert_awaited_once()
+        mock_response.aclose.assert_awaited_once()
+        self.assertEqual(mock_engine.client.build_request.call_args[0], ('GET', 'http://localhost/api/patients'))
+        self.assertEqual(mock_engine.client.build_request.call_args[1]['params'], {'patient_id': '1'})
+        self.assertIn('Status: 200', outcome['text'])
+        self.assertIn('wait 0.0 ms', outcome['text'])
+        self.assertEqual(outcome['duration_ms'], outcome['timing']['total'])
+        self.assertIn('trace', mock_engine.client.build_request.return_value.extensions.__setitem__.call_args[0])
+        body = outcome['body'].finish()
+        self.assertEqual(body.view.lines(0, 5), ['{', '  "result": "ok"', '}'])
+        body.close()
+
+    def test_send_request_submits_to_engine(self):
+        mock_engine = MagicMock()
+        app = DBFormApp(self.root, 'PostgreSQL', MagicMock(), self.mock_auth, http_engine=mock_engine)
+        app.runner = MagicMock()
+        app.method_var.set('POST')
+        app.api_path_var.set('http://localhost/api/patients')
+        app.inputs['first_name'].set('John')
+        app.send_request()
+        mock_engine.submit.assert_called_once()
+        mock_engine.submit.call_args[0][0].close()  # discard the unawaited coroutine
+        self.assertEqual(app.runner.watch.call_args[0][0], 'send')
+
+    def test_wide_table_form_recycles_widgets(self):
+        self.mock_dbconnector.get_table_columns.return_value = [(f"col_{i}", "text") for i in range(300)]
+        app = DBFormApp(self.root, 'PostgreSQL', MagicMock(), self.mock_auth)
+        self.assertEqual(len(app.inputs), 300)
+        items = len(app.form.canvas.find_all())
+        self.assertLess(items, 300)
+        for _ in range(5):
+            app.load_columns()
+        self.assertEqual(len(app.form.canvas.find_all()), items)
+        app.inputs['col_299'].set('x')
+        self.assertEqual(app._collect_request()['params'], {'col_299': 'x'})
+
+    def test_export_empty_table_writes_header(self):
+        self.mock_dbconnector.get_schema.return_value.columns.return_value = [
+            ('patient_id', 'int'), ('first_name', 'varchar'), ('created_at', 'timestamp')]
+        self.mock_dbconnector.iter_row_batches.return_value = iter([])
+        app = DBFormApp(self.root, 'PostgreSQL', MagicMock(), self.mock_auth)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'patients.csv')
+            rows = app._export_table_rows('patients', path, 'csv', ExportProgress(), threading.Event())
+            with open(path, encoding='utf-8-sig') as f:
+                header = f.read()
+        self.assertEqual(rows, 0)
+        self.assertEqual(header.strip(), 'patient_id,first_name,created_at')
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
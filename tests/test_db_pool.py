@@ -0,0 +1,72 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from db_pool import ConnectionPool, Driver, PoolTimeout, get_driver
+from dbconnector import DBConnector
+
+def make_driver():
+    connections = []
+    def connect(**params):
+        conn = MagicMock()
+        connections.append(conn)
+        return conn
+    return Driver("fake", connect), connections
+
+def test_get_driver_aliases_and_unknown():
+    assert get_driver("PostgreSQL") is get_driver("postgres")
+    assert get_driver("MySQL").name == "mysql"
+    with pytest.raises(ValueError):
+        get_driver("db2")
+
+def test_pool_opens_min_size_up_front():
+    driver, connections = make_driver()
+    pool = ConnectionPool(driver, min_size=2, max_size=4)
+    assert len(connections) == 2
+    assert pool.stats() == {"size": 2, "idle": 2, "max_size": 4}
+
+def test_pool_reuses_released_connection():
+    driver, connections = make_driver()
+    pool = ConnectionPool(driver, min_size=1, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(connections) == 1
+    first.rollback.assert_called()
+
+def test_pool_times_out_when_exhausted():
+    driver, _ = make_driver()
+    pool = ConnectionPool(driver, min_size=0, max_size=1)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+    pool.release(conn)
+    assert pool.acquire(timeout=0.05) is conn
+
+def test_pool_replaces_dead_connection_on_checkout():
+    driver, connections = make_driver()
+    pool = ConnectionPool(driver, min_size=1, max_size=1, health_check_interval=0)
+    connections[0].cursor.return_value.execute.side_effect = Exception("gone")
+    conn = pool.acquire()
+    assert conn is connections[1]
+    connections[0].close.assert_called_once()
+    assert pool.stats()["size"] == 1
+
+def test_pool_is_safe_across_threads(tmp_path):
+    pool = ConnectionPool("sqlite", {"database": str(tmp_path / "t.db")}, min_size=1, max_size=3)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.commit()
+    db = DBConnector("sqlite", pool)
+    results = []
+    def worker():
+        db.refresh_schema()
+        results.append(db.get_schema().table_names())
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [["items"]] * 6
+    assert pool.stats()["size"] <= 3
@@ -0,0 +1,130 @@
+import csv
+import json
+import threading
+import pytest
+from exporters import (ExportCancelled, ExportProgress, export_json_records, export_raw, export_rows,
+                       flatten_record, format_for_path, iter_json_array)
+
+RECORDS = [{"id": i, "name": f"n{i}", "addr": {"city": "X", "geo": {"lat": i}}, "tags": ["a", i]}
+           for i in range(50)] + [{"id": 50, "extra": None}]
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_iter_json_array_any_chunking(size):
+    data = json.dumps(RECORDS + [1, "two", None, [3]], indent=1).encode()
+    assert list(iter_json_array(chunked(data, size))) == RECORDS + [1, "two", None, [3]]
+
+def test_iter_json_array_empty_and_invalid():
+    assert list(iter_json_array([b" [ ] "])) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"a": 1}']))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[1, 2']))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[1 2]']))
+
+def test_iter_json_array_number_split_across_chunks():
+    assert list(iter_json_array([b"[12", b"34, 5", b"6]"])) == [1234, 56]
+
+def test_flatten_record():
+    assert flatten_record(RECORDS[1]) == {"id": 1, "name": "n1", "addr.city": "X", "addr.geo.lat": 1,
+                                          "tags": '["a", 1]'}
+    assert flatten_record(7) == {"value": 7}
+
+def test_export_csv_uses_union_of_keys(tmp_path):
+    data = json.dumps(RECORDS).encode()
+    path = str(tmp_path / "out.csv")
+    progress = ExportProgress()
+    count = export_json_records(lambda: chunked(data, 100), path, "csv", progress)
+    assert count == 51 and progress.done and progress.total == 51
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ["id", "name", "addr.city", "addr.geo.lat", "tags", "extra"]
+    assert rows[3]["addr.geo.lat"] == "3"
+    assert rows[50]["name"] == "" and rows[50]["id"] == "50"
+
+def test_export_ndjson_keeps_nesting(tmp_path):
+    data = json.dumps(RECORDS).encode()
+    path = str(tmp_path / "out.ndjson")
+    export_json_records(lambda: chunked(data, 100), path, "ndjson")
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == RECORDS
+
+def test_export_xlsx(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    data = json.dumps(RECORDS).encode()
+    path = str(tmp_path / "out.xlsx")
+    export_json_records(lambda: [data], path, "xlsx")
+    rows = list(openpyxl.load_workbook(path, read_only=True).active.values)
+    assert rows[0][:3] == ("id", "name", "addr.city")
+    assert len(rows) == 52
+
+def test_export_cancel_removes_partial_file(tmp_path):
+    cancel = threading.Event()
+    cancel.set()
+    path = tmp_path / "out.csv"
+    with pytest.raises(ExportCancelled):
+        export_json_records(lambda: [json.dumps(RECORDS).encode()], str(path), "csv", cancel=cancel)
+    with pytest.raises(ExportCancelled):
+        export_raw([b"abc"], str(path), cancel=cancel)
+    assert not path.exists()
+
+def test_export_raw_and_format_for_path(tmp_path):
+    path = str(tmp_path / "body.bin")
+    assert export_raw([b"ab", b"c"], path) == 3
+    assert open(path, "rb").read() == b"abc"
+    assert format_for_path("x.CSV") == "csv" and format_for_path("x.jsonl") == "ndjson"
+    assert format_for_path("x.json") is None
+
+def make_table(rows=25):
+    import sqlite3
+    from dbconnector import DBConnector
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER, name TEXT, data BLOB)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", [(i, f"n{i}", b"\x01") for i in range(rows)])
+    return DBConnector("sqlite", conn)
+
+def test_export_rows_csv_from_server_side_batches(tmp_path):
+    db = make_table()
+    path = str(tmp_path / "t.csv")
+    progress = ExportProgress(total=db.estimate_row_count("t"))
+    assert export_rows(db.iter_row_batches("t", batch_size=4), path, "csv", progress) == 25
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["id", "name", "data"]
+    assert rows[1] == ["0", "n0", "01"] and len(rows) == 26
+    assert progress.total == 25 and progress.done
+
+def test_export_rows_empty_table_writes_header(tmp_path):
+    db = make_table(0)
+    path = str(tmp_path / "t.csv")
+    assert export_rows(db.iter_row_batches("t"), path, "csv", columns=["id", "name", "data"]) == 0
+    assert open(path, encoding="utf-8").read().strip() == "id,name,data"
+
+def test_export_rows_xlsx_and_cancel(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    db = make_table()
+    path = str(tmp_path / "t.xlsx")
+    export_rows(db.iter_row_batches("t", batch_size=10), path, "xlsx")
+    rows = list(openpyxl.load_workbook(path, read_only=True).active.values)
+    assert rows[0] == ("id", "name", "data") and rows[25] == (24, "n24", "01")
+
+    cancel = threading.Event()
+    def batches():
+        yield [{"id": 1}]
+        cancel.set()
+        yield [{"id": 2}]
+    with pytest.raises(ExportCancelled):
+        export_rows(batches(), str(tmp_path / "c.csv"), "csv", cancel=cancel)
+    assert not (tmp_path / "c.csv").exists()
+
+def test_xlsx_rolls_over_to_new_sheet(tmp_path, monkeypatch):
+    openpyxl = pytest.importorskip("openpyxl")
+    import exporters
+    monkeypatch.setattr(exporters, "XLSX_MAX_ROWS", 11)
+    path = str(tmp_path / "t.xlsx")
+    export_rows(make_table().iter_row_batches("t"), path, "xlsx")
+    sheets = openpyxl.load_workbook(path, read_only=True).worksheets
+    assert [len(list(ws.values)) for ws in sheets] == [11, 11, 6]
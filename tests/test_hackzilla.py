@@ -6,7 +6,9 @@ sys.modules['api_test_ui'] = MagicMock()
 sys.modules['dbconnector'] = MagicMock()
 sys.modules['db_mapping_ui'] = MagicMock()
 sys.modules['auth_config'] = MagicMock()
-sys.modules['psycopg2'] = MagicMock()
+sys.modules['db_pool'] = MagicMock()
+sys.modules['load_test_ui'] = MagicMock()
+sys.modules['history_ui'] = MagicMock()
 
 import tkinter as tk
 from Hackzilla import HackzillaApp
@@ -20,7 +22,7 @@ class TestHackzillaApp(unittest.TestCase):
     def tearDown(self):
         self.root.destroy()
 
-    @patch('Hackzilla.DBFormApp')
+    @patch('db_mapping_ui.DBFormApp')
     @patch('Hackzilla.AuthConfigUI')
     def test_app_initialization(self, MockAuthConfigUI, MockDBFormApp):
         # Mock AuthConfigUI and its .auth property
@@ -35,6 +37,8 @@ class TestHackzillaApp(unittest.TestCase):
         self.assertIsNotNone(app.db_tab)
         self.assertIsNotNone(app.api_key_tab)
         self.assertIsNotNone(app.api_tab)
+        self.assertIsNotNone(app.load_tab)
+        self.assertIsNotNone(app.history_tab)
 
         # AuthConfigUI should be initialized and packed
         MockAuthConfigUI.assert_called_with(app.api_key_tab)
@@ -52,8 +56,25 @@ class TestHackzillaApp(unittest.TestCase):
         )
         app.db_ui_frame.pack.assert_called()
 
-    @patch('Hackzilla.psycopg2.connect')
-    def test_connect_to_db_success(self, mock_connect):
+    def test_tabs_are_built_on_first_select(self):
+        api_module = sys.modules['api_test_ui']
+        api_module.ApiTestFrame.reset_mock()
+        app = HackzillaApp(self.root)
+        self.assertIsNone(app.api_frame)
+        api_module.ApiTestFrame.assert_not_called()
+        app.notebook.select(app.api_tab)
+        app._on_tab_changed()
+        api_module.ApiTestFrame.assert_called_once_with(app.api_tab)
+        self.assertIs(app.api_frame, api_module.ApiTestFrame.return_value)
+        app.notebook.select(app.db_tab)
+        app._on_tab_changed()
+        app.notebook.select(app.api_tab)
+        app._on_tab_changed()
+        api_module.ApiTestFrame.assert_called_once()
+        self.assertIsNone(app.history_frame)
+
+    @patch('Hackzilla.ConnectionPool')
+    def test_connect_to_db_success(self, mock_pool):
         app = HackzillaApp(self.root)
         app.db_type_var.set("PostgreSQL")
         app.host_entry.get = MagicMock(return_value="localhost")
@@ -62,14 +83,18 @@ class TestHackzillaApp(unittest.TestCase):
         app.password_entry.get = MagicMock(return_value="password")
         app.db_name_entry.get = MagicMock(return_value="patientdb")
 
-        mock_connect.return_value = MagicMock()
+        mock_pool.return_value = MagicMock()
         with patch('tkinter.messagebox.showinfo') as mock_info:
             app.connect_to_db()
             mock_info.assert_called_with("Success", "Connected to the database!")
-            self.assertIsNotNone(app.connection)
+            self.assertIs(app.connection, mock_pool.return_value)
+        args, kwargs = mock_pool.call_args
+        self.assertEqual(args[0], "PostgreSQL")
+        self.assertEqual(args[1]["host"], "localhost")
+        self.assertEqual(args[1]["database"], "patientdb")
 
-    @patch('Hackzilla.psycopg2.connect', side_effect=Exception("fail"))
-    def test_connect_to_db_failure(self, mock_connect):
+    @patch('Hackzilla.ConnectionPool', side_effect=Exception("fail"))
+    def test_connect_to_db_failure(self, mock_pool):
         app = HackzillaApp(self.root)
         app.db_type_var.set("PostgreSQL")
         app.host_entry.get = MagicMock(return_value="localhost")
@@ -0,0 +1,195 @@
+import json
+import sqlite3
+import threading
+import time
+import pytest
+from blob_store import BlobStore
+from history_store import HistoryStore
+
+def test_append_and_recent_filters(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"))
+    store.append("GET", "http://a/x", payload={"id": "1"}, response="ok", status=200, duration_ms=12.5, ts=100)
+    store.append("POST", "http://a/y", payload={"id": "2"}, response="err", status=500, ts=200)
+    store.append("GET", "http://a/x", response="ok", status=404, ts=300)
+    assert store.count() == 3
+    assert [e["ts"] for e in store.recent()] == [300, 200, 100]
+    assert [e["status"] for e in store.recent(method="GET")] == [404, 200]
+    assert store.recent(status=500)[0]["url"] == "http://a/y"
+    assert [e["ts"] for e in store.recent(since=150, until=300)] == [200]
+    assert json.loads(store.recent(url="http://a/x", limit=1, until=200)[0]["payload"]) == {"id": "1"}
+
+def test_timing_is_stored_with_the_entry(tmp_path):
+    path = str(tmp_path / "h.db")
+    store = HistoryStore(path)
+    timing = {"connect": 1.5, "wait": 20.0, "total": 25.0, "reused": False}
+    store.append("GET", "http://a/x", status=200, duration_ms=25.0, timing=timing)
+    store.append("GET", "http://a/y")
+    store.close()
+    assert [e["timing"] for e in HistoryStore(path).recent()] == [None, timing]
+
+def test_queries_use_indexes(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"))
+    for column in ("method", "url", "status"):
+        plan = store.conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM history WHERE {column} = ? ORDER BY ts DESC", ("x",)).fetchall()
+        assert any(f"idx_history_{column}" in row[-1] for row in plan)
+
+def test_retention_by_count(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"), max_entries=10, retention_every=5)
+    for i in range(23):
+        store.append("GET", f"http://a/{i}", ts=i)
+    store.apply_retention()
+    assert store.count() == 10
+    assert store.recent(limit=1)[0]["url"] == "http://a/22"
+
+def test_retention_by_age(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"), max_age=60)
+    store.append("GET", "http://old", ts=time.time() - 3600)
+    store.append("GET", "http://new")
+    store.apply_retention()
+    assert [e["url"] for e in store.recent()] == ["http://new"]
+
+def test_retention_by_size(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"), max_entries=None, max_bytes=200_000)
+    store.append_many([{"method": "GET", "url": f"http://a/{i}", "response": "x" * 1000} for i in range(500)])
+    store.apply_retention()
+    assert 0 < store.count() < 500
+    assert store._live_bytes() <= 200_000
+
+def test_concurrent_writers_share_file(tmp_path):
+    path = str(tmp_path / "h.db")
+    stores = [HistoryStore(path), HistoryStore(path)]
+    def write(store):
+        for i in range(100):
+            store.append("GET", f"http://a/{i}")
+    threads = [threading.Thread(target=write, args=(s,)) for s in stores for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert HistoryStore(path).count() == 400
+
+def test_import_legacy_json(tmp_path):
+    legacy = tmp_path / "request_history.json"
+    legacy.write_text(json.dumps([
+        {"method": "GET", "url": "http://a", "payload": {"id": "7"}, "response": "r",
+         "timestamp": "2025-10-15 06:30:45"},
+    ]))
+    store = HistoryStore(str(tmp_path / "h.db"))
+    assert store.import_json(str(legacy)) == 1
+    assert store.recent()[0]["url"] == "http://a"
+    assert store.import_json(str(tmp_path / "missing.json")) == 0
+
+def test_full_text_search_with_filters(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"))
+    assert store.fts
+    store.append("GET", "http://a/api/patients/getpatient", payload={"patient_id": "7"},
+                 response='{"error": "Endpoint not found"}', status=404, duration_ms=5, ts=100)
+    store.append("POST", "http://a/api/patients/addpatient", payload={"first_name": "Ada"},
+                 response='{"id": 9}', status=201, duration_ms=250, ts=200)
+    store.append("DELETE", "http://a/api/orders/1", response='{"error": "Bearer token required"}',
+                 status=401, duration_ms=3, ts=300)
+    assert [e["ts"] for e in store.search("patients")] == [200, 100]
+    assert [e["ts"] for e in store.search("error")] == [300, 100]
+    assert [e["ts"] for e in store.search("Bearer token")] == [300]
+    assert [e["ts"] for e in store.search("Ada")] == [200]
+    assert [e["ts"] for e in store.search("patient*", min_ms=100)] == [200]
+    assert [e["ts"] for e in store.search("error", status=404)] == [100]
+    assert [e["ts"] for e in store.search(max_ms=10, since=150)] == [300]
+    assert store.search('"unbalanced') == []
+    assert len(store.search("*")) == 3
+
+def test_search_index_follows_retention(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"), max_entries=1)
+    store.append("GET", "http://a/first", response="alpha", ts=1)
+    store.append("GET", "http://a/second", response="beta", ts=2)
+    store.apply_retention()
+    assert store.search("alpha") == []
+    assert [e["url"] for e in store.search("beta")] == ["http://a/second"]
+
+def test_fts_backfilled_for_existing_database(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "h.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE history (id INTEGER PRIMARY KEY, ts REAL NOT NULL, method TEXT NOT NULL, "
+                 "url TEXT NOT NULL, status INTEGER, duration_ms REAL, payload TEXT, response TEXT)")
+    conn.execute("INSERT INTO history (ts, method, url, response) VALUES (1, 'GET', 'http://old', 'legacy body')")
+    conn.commit()
+    conn.close()
+    assert [e["url"] for e in HistoryStore(path).search("legacy")] == ["http://old"]
+
+def test_repeated_responses_stored_once(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"))
+    body = '{"error": "Bearer token required"}'
+    store.append_many([{"method": "GET", "url": f"http://a/{i}", "response": body} for i in range(1000)])
+    assert store.blobs.stats()["blobs"] == 1
+    assert store.search("bearer", limit=1)[0]["response"] == body
+
+def test_retention_drops_unreferenced_blobs(tmp_path):
+    store = HistoryStore(str(tmp_path / "h.db"), max_entries=2)
+    store.append("GET", "http://a/1", response="gone")
+    store.append("GET", "http://a/2", response="kept")
+    store.append("GET", "http://a/3", response="kept")
+    store.apply_retention()
+    assert store.blobs.stats()["blobs"] == 1
+    assert store.search("gone") == []
+    assert [e["response"] for e in store.recent()] == ["kept", "kept"]
+
+def make_inline_history(path):
+    HistoryStore(path).close()
+    conn = sqlite3.connect(path)
+    conn.executescript("DROP TRIGGER history_fts_insert; DROP TRIGGER history_fts_delete; "
+                       "DROP VIEW history_text; DROP TABLE history_fts; DROP TABLE history;")
+    conn.execute("CREATE TABLE history (id INTEGER PRIMARY KEY, ts REAL NOT NULL, method TEXT NOT NULL, "
+                 "url TEXT NOT NULL, status INTEGER, duration_ms REAL, payload TEXT, response TEXT)")
+    conn.executemany("INSERT INTO history (ts, method, url, status, response) VALUES (?, 'GET', ?, 200, ?)",
+                     [(i, f"http://a/{i}", "same body" if i < 3 else "other") for i in range(4)])
+    conn.commit()
+    conn.close()
+
+def test_inline_responses_migrated_to_blobs(tmp_path, monkeypatch):
+    path = str(tmp_path / "h.db")
+    make_inline_history(path)
+    statements = []
+    connect = sqlite3.connect
+
+    def tracing_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", tracing_connect)
+    store = HistoryStore(path)
+    # DROP COLUMN needs SQLite 3.35
+    assert not [sql for sql in statements if "DROP COLUMN" in sql.upper()]
+    assert store.blobs.stats()["blobs"] == 2
+    assert [e["url"] for e in store.search("same")] == ["http://a/2", "http://a/1", "http://a/0"]
+    assert [(e["status"], e["response"]) for e in store.recent()][0] == (200, "other")
+    columns = [row[1] for row in store.conn.execute("PRAGMA table_info(history)")]
+    assert "response" not in columns and "timing" in columns
+    indexes = {row[1] for row in store.conn.execute("PRAGMA index_list(history)")}
+    assert {"idx_history_ts", "idx_history_url", "idx_history_response"} <= indexes
+    assert store.conn.execute("SELECT name FROM sqlite_master WHERE name = 'history_inline'").fetchone() is None
+
+def test_inline_response_migration_is_all_or_nothing(tmp_path, monkeypatch):
+    path = str(tmp_path / "h.db")
+    make_inline_history(path)
+    puts = []
+
+    def failing_put(self, data):
+        puts.append(data)
+        if len(puts) == 2:
+            raise OSError("disk full")
+        return original_put(self, data)
+
+    original_put = BlobStore.put
+    monkeypatch.setattr(BlobStore, "put", failing_put)
+    with pytest.raises(OSError):
+        HistoryStore(path)
+    conn = sqlite3.connect(path)
+    assert "response" in [row[1] for row in conn.execute("PRAGMA table_info(history)")]
+    assert conn.execute("SELECT COUNT(*) FROM history WHERE response IS NOT NULL").fetchone() == (4,)
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'history_inline'").fetchone() is None
+    conn.close()
+    monkeypatch.setattr(BlobStore, "put", original_put)
+    assert len(HistoryStore(path).recent()) == 4
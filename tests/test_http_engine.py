@@ -0,0 +1,99 @@
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import pytest
+from http_engine import AsyncHttpEngine, RequestTiming, format_timing
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        KeepAliveHandler.connections.add(self.client_address)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    KeepAliveHandler.connections = set()
+    httpd = HTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_engine_reuses_connections_across_requests(server):
+    engine = AsyncHttpEngine().start()
+    try:
+        async def fetch():
+            response = await engine.client.get(server)
+            return response.json()
+        for _ in range(5):
+            assert engine.submit(fetch()).result(timeout=5) == {"ok": True}
+        assert len(KeepAliveHandler.connections) == 1
+    finally:
+        engine.shutdown()
+    assert not engine.running
+
+def test_engine_runs_on_one_background_loop():
+    engine = AsyncHttpEngine()
+    try:
+        async def thread_name():
+            return threading.current_thread().name
+        assert engine.submit(thread_name()).result(timeout=5) == "hackzilla-http"
+        loop = engine.loop
+        engine.submit(thread_name()).result(timeout=5)
+        assert engine.loop is loop
+    finally:
+        engine.shutdown()
+
+def test_http2_falls_back_without_h2():
+    engine = AsyncHttpEngine(http2=True)
+    try:
+        import h2  # noqa: F401
+        pytest.skip("h2 installed")
+    except ImportError:
+        pass
+    assert engine._http2_available() is False
+
+def test_request_timing_phases_and_connection_reuse(server):
+    engine = AsyncHttpEngine().start()
+    try:
+        async def timed():
+            timing = RequestTiming()
+            response = await engine.client.get(server, extensions={"trace": timing.atrace})
+            assert response.status_code == 200
+            return timing.finish().as_dict()
+        first = engine.submit(timed()).result(timeout=5)
+        second = engine.submit(timed()).result(timeout=5)
+    finally:
+        engine.shutdown()
+    assert first["reused"] is False and first["connect"] > 0
+    assert second["reused"] is True and second["connect"] == 0
+    for timing in (first, second):
+        assert timing["wait"] > 0
+        assert sum(timing[p] for p in RequestTiming.PHASES) <= timing["total"]
+    assert "(new connection)" in format_timing(first)
+
+def test_request_timing_from_trace_events():
+    now = [0.0]
+    timing = RequestTiming(clock=lambda: now[0])
+    for event, at in (("connection.connect_tcp.started", 0.0), ("connection.connect_tcp.complete", 0.010),
+                      ("connection.start_tls.started", 0.010), ("connection.start_tls.complete", 0.040),
+                      ("http11.send_request_headers.started", 0.040), ("http11.send_request_headers.complete", 0.041),
+                      ("http11.receive_response_headers.started", 0.041),
+                      ("http11.receive_response_headers.complete", 0.141),
+                      ("http11.receive_response_body.started", 0.141), ("http11.receive_response_body.complete", 0.151),
+                      ("http11.response_closed.started", 0.151)):
+        now[0] = at
+        timing.trace(event, {})
+    assert timing.as_dict() == {"connect": 10.0, "tls": 30.0, "send": 1.0, "wait": 100.0, "download": 10.0,
+                                "total": 151.0, "reused": False}
+    assert format_timing({"wait": 5.0}) == "wait 5.0 ms"
@@ -0,0 +1,121 @@
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from load_test import LatencyHistogram, LoadTestConfig, LoadTestStats, LoadTester, format_report, record_metrics
+from metrics import HTTP_LATENCY, HTTP_REQUESTS
+from http_engine import AsyncHttpEngine
+
+class StatusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = 0
+
+    def do_GET(self):
+        StatusHandler.hits += 1
+        status = 500 if StatusHandler.hits % 4 == 0 else 200
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    StatusHandler.hits = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_histogram_percentiles_within_precision():
+    hist = LatencyHistogram()
+    values = [random.uniform(0.001, 2.0) for _ in range(20000)]
+    for v in values:
+        hist.record(v)
+    values.sort()
+    for p in (50, 90, 99, 99.9):
+        exact = values[int(len(values) * p / 100) - 1] * 1000
+        assert hist.percentile(p) == pytest.approx(exact, rel=0.03)
+    assert hist.total == 20000
+
+def test_histogram_small_values_are_exact():
+    hist = LatencyHistogram()
+    for us in (5, 5, 10, 100):
+        hist.record(us / 1_000_000)
+    assert hist.percentile(50) == 0.005
+    assert hist.percentile(100) == 0.1
+
+def test_histogram_merge_and_roundtrip():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    for v in (0.01, 0.02):
+        a.record(v)
+    for v in (0.5, 1.0):
+        b.record(v)
+    merged = LatencyHistogram.from_dict(a.to_dict()).merge(LatencyHistogram.from_dict(b.to_dict()))
+    assert merged.total == 4
+    assert merged.min_us == 10000 and merged.max_us == 1000000
+    assert merged.percentile(100) == 1000.0
+
+def test_stats_roundtrip_keeps_error_breakdown():
+    stats = LoadTestStats()
+    stats.record(0.01, 200)
+    stats.record(0.02, "ConnectError")
+    restored = LoadTestStats.from_dict(stats.to_dict())
+    assert restored.outcomes == {200: 1, "ConnectError": 1}
+
+def test_closed_loop_load_test_reports_errors_by_status(server):
+    engine = AsyncHttpEngine().start()
+    try:
+        tester = LoadTester(engine.client, LoadTestConfig("GET", server, duration=0.5, warmup=0.1, concurrency=4))
+        report = engine.submit(tester.run()).result(timeout=10)
+    finally:
+        engine.shutdown()
+    assert report["done"] and report["count"] > 0
+    assert report["outcomes"]["200"] > report["outcomes"]["500"] > 0
+    assert report["errors"] == {"500": report["outcomes"]["500"]}
+    assert report["p50"] <= report["p99"] <= report["max"]
+    assert "Throughput" in format_report(report)
+
+def test_open_loop_load_test_tracks_target_rate(server):
+    engine = AsyncHttpEngine().start()
+    try:
+        tester = LoadTester(engine.client, LoadTestConfig("GET", server, duration=1.0, warmup=0, target_rps=50))
+        report = engine.submit(tester.run()).result(timeout=10)
+    finally:
+        engine.shutdown()
+    assert 35 <= report["count"] <= 60
+
+def test_multiprocess_load_test_merges_worker_histograms(server):
+    from load_test import MultiProcessLoadTest
+    config = LoadTestConfig("GET", server, duration=1.0, warmup=0.2, concurrency=4)
+    mp = MultiProcessLoadTest(config, processes=2, report_interval=0.2)
+    report = mp.start().wait(timeout=60)
+    assert report["done"]
+    assert report["processes"] == 2
+    assert report["worker_errors"] == []
+    assert report["count"] > 0
+    assert sum(report["outcomes"].values()) == report["count"]
+    assert "500" in report["errors"]
+
+def test_worker_configs_split_load():
+    from load_test import MultiProcessLoadTest
+    mp = MultiProcessLoadTest(LoadTestConfig("GET", "http://x", concurrency=5, target_rps=None), processes=3)
+    assert [c.concurrency for c in mp._worker_configs()] == [2, 2, 1]
+    mp = MultiProcessLoadTest(LoadTestConfig("GET", "http://x", target_rps=90), processes=3)
+    assert [c.target_rps for c in mp._worker_configs()] == [30, 30, 30]
+
+def test_worker_stats_feed_metrics():
+    before = HTTP_REQUESTS.value(("load", "PATCH", "200"))
+    seen = HTTP_LATENCY.count(("load",))
+    stats = LoadTestStats()
+    for _ in range(3):
+        stats.record(0.012, 200)
+    stats.record(0.5, "ConnectError")
+    record_metrics(stats, "PATCH")
+    assert HTTP_REQUESTS.value(("load", "PATCH", "200")) == before + 3
+    assert HTTP_REQUESTS.value(("load", "PATCH", "ConnectError")) >= 1
+    assert HTTP_LATENCY.count(("load",)) == seen + 4
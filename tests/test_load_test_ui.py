@@ -0,0 +1,66 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from auth_config import OAuth2Auth
+from http_engine import AsyncHttpEngine
+from load_test import LoadTestConfig, LoadTester
+from load_test_ui import LoadTestFrame
+
+class AuthHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    seen = []
+
+    def do_GET(self):
+        AuthHandler.seen.append(self.headers.get("Authorization"))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+class FakeProvider:
+    def __init__(self):
+        self.calls = []
+
+    def token(self):
+        self.calls.append(threading.current_thread().name)
+        return "tok1"
+
+@pytest.fixture
+def server():
+    AuthHandler.seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), AuthHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_in_process_run_sends_the_oauth_token(server):
+    provider = FakeProvider()
+    engine = AsyncHttpEngine().start()
+    try:
+        config = LoadTestConfig("GET", server, auth=OAuth2Auth(provider), duration=0.3, warmup=0, concurrency=2)
+        report = engine.submit(LoadTestFrame._run_local(LoadTester(engine.client, config))).result(timeout=10)
+    finally:
+        engine.shutdown()
+    assert report["count"] > 0
+    assert set(AuthHandler.seen) == {"Bearer tok1"}
+    # The first fetch ran before the loop started sending, not on the loop thread
+    assert provider.calls[0] != "hackzilla-http"
+
+def test_worker_processes_get_the_token_as_a_header():
+    class FakeTester:
+        config = LoadTestConfig("GET", "http://x/", headers={"X-Api-Key": "k"})
+
+        def start(self):
+            self.sent_headers = dict(self.config.headers)
+            return self
+
+        def wait(self):
+            return self.sent_headers
+
+    headers = LoadTestFrame._run_processes(FakeTester(), FakeProvider())
+    assert headers == {"X-Api-Key": "k", "Authorization": "Bearer tok1"}
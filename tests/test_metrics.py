@@ -0,0 +1,79 @@
+import threading
+import urllib.request
+from metrics import CONTENT_TYPE, MetricsFileWriter, Registry, serve, start_from_env
+
+def make_registry():
+    registry = Registry()
+    requests = registry.counter("app_requests", "Requests sent.", ("source", "status"))
+    in_flight = registry.gauge("app_in_flight", "Requests in flight.")
+    latency = registry.histogram("app_latency_seconds", "Latency.", ("source",), unit="seconds",
+                                 buckets=(0.1, 1.0))
+    return registry, requests, in_flight, latency
+
+def test_openmetrics_exposition():
+    registry, requests, in_flight, latency = make_registry()
+    requests.inc(("bulk", "200"), 3)
+    requests.inc(("bulk", 'say "hi"'))
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, ("bulk",))
+    assert registry.exposition() == "\n".join([
+        "# TYPE app_requests counter",
+        "# HELP app_requests Requests sent.",
+        'app_requests_total{source="bulk",status="200"} 3',
+        'app_requests_total{source="bulk",status="say \\"hi\\""} 1',
+        "# TYPE app_in_flight gauge",
+        "# HELP app_in_flight Requests in flight.",
+        "app_in_flight 1",
+        "# TYPE app_latency_seconds histogram",
+        "# HELP app_latency_seconds Latency.",
+        "# UNIT app_latency_seconds seconds",
+        'app_latency_seconds_bucket{source="bulk",le="0.1"} 2',
+        'app_latency_seconds_bucket{source="bulk",le="1.0"} 3',
+        'app_latency_seconds_bucket{source="bulk",le="+Inf"} 4',
+        'app_latency_seconds_count{source="bulk"} 4',
+        'app_latency_seconds_sum{source="bulk"} 3.65',
+        "# EOF",
+    ]) + "\n"
+
+def test_updates_from_many_threads_are_all_counted():
+    registry, requests, in_flight, latency = make_registry()
+
+    def work():
+        for _ in range(10000):
+            in_flight.inc()
+            requests.inc(("load", "200"))
+            latency.observe(0.2, ("load",))
+            in_flight.dec()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert requests.value(("load", "200")) == 80000
+    assert latency.count(("load",)) == 80000
+    assert in_flight.value() == 0
+
+def test_file_writer_and_http_endpoint(tmp_path):
+    registry, requests, _, _ = make_registry()
+    requests.inc(("bulk", "201"))
+    path = str(tmp_path / "metrics.prom")
+    writer = MetricsFileWriter(path, registry, interval=60).start()
+    writer.stop()
+    with open(path, encoding="utf-8") as f:
+        assert 'app_requests_total{source="bulk",status="201"} 1' in f.read()
+
+    server = serve(0, registry=registry)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            assert response.read().decode().endswith("# EOF\n")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_start_from_env_without_settings_is_a_no_op():
+    start_from_env({})()
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from profiling import Profiler, start_from_env, profiler as global_profiler
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    calls = []
+
+    @profiler.traced("work")
+    def work(x):
+        calls.append(x)
+        return x * 2
+
+    with profiler.span("outer") as s:
+        assert work(2) == 4
+    assert s is profiler.span("other")  # one shared no-op
+    assert calls == [2] and len(profiler.spans) == 0
+
+def test_nested_spans_self_time_and_folded():
+    profiler = Profiler().start()
+    with profiler.span("send", "ui"):
+        with profiler.span("validate"):
+            time.sleep(0.01)
+        with profiler.span("network", "http", url="http://x"):
+            time.sleep(0.02)
+    profiler.stop()
+    names = [s[0] for s in profiler.spans]
+    assert names == ["validate", "network", "send"]
+    summary = {row["name"]: row for row in profiler.summary()}
+    assert summary["send"]["total_ms"] >= 30
+    assert summary["send"]["self_ms"] < summary["network"]["self_ms"]
+    stacks = dict(line.rsplit(" ", 1) for line in profiler.folded().splitlines())
+    assert set(stacks) >= {"send;validate", "send;network"}
+    assert int(stacks["send;network"]) >= 20000
+
+def test_chrome_trace_export(tmp_path):
+    profiler = Profiler().start()
+    with pytest.raises(ValueError):
+        with profiler.span("fails", url="http://x"):
+            raise ValueError("boom")
+    thread = threading.Thread(target=lambda: profiler.span("worker").__enter__().__exit__(None, None, None),
+                              name="hackzilla-worker")
+    thread.start()
+    thread.join()
+    path = profiler.write(str(tmp_path / "trace.json"))
+    with open(path, encoding="utf-8") as f:
+        trace = json.load(f)
+    complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in complete] == ["fails", "worker"]
+    assert complete[0]["args"] == {"url": "http://x", "error": "ValueError"}
+    assert complete[0]["tid"] != complete[1]["tid"]
+    threads = {e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"}
+    assert "hackzilla-worker" in threads
+    assert profiler.write(str(tmp_path / "trace.folded")).endswith(".folded")
+
+def test_concurrent_coroutines_keep_their_own_stacks():
+    profiler = Profiler().start()
+
+    @profiler.traced("request", "http")
+    async def request(delay):
+        with profiler.span("download"):
+            await asyncio.sleep(delay)
+
+    async def run():
+        await asyncio.gather(request(0.02), request(0.01))
+
+    asyncio.run(run())
+    assert sorted(s[6] for s in profiler.spans) == ["request", "request", "request;download", "request;download"]
+
+def test_start_from_env():
+    try:
+        assert start_from_env({}) is None and not global_profiler.enabled
+        assert start_from_env({"HACKZILLA_PROFILE": "out.json"}) == "out.json"
+        assert global_profiler.enabled
+    finally:
+        global_profiler.stop()
+        global_profiler.clear()
@@ -0,0 +1,64 @@
+import json
+import pytest
+from response_viewer import JsonReindenter, LineSpool, ResponseBody
+
+DOC = {"id": 1, "name": "a \"quoted\" {name}, [x]: y", "tags": [], "meta": {}, "items": [
+    {"n": 1.5, "ok": True, "none": None, "esc": "back\\slash"}, [1, [2, []]]]}
+
+def test_reindent_matches_json_dumps():
+    source = json.dumps(DOC, separators=(",", ":"))
+    assert JsonReindenter().feed(source) == json.dumps(DOC, indent=2)
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_reindent_is_chunk_independent(size):
+    source = json.dumps(DOC, indent=4)
+    r = JsonReindenter()
+    out = "".join(r.feed(source[i:i + size]) for i in range(0, len(source), size))
+    assert out == json.dumps(DOC, indent=2)
+
+def test_reindent_strings_longer_than_carry_limit():
+    doc = {"big": "a\\\"b" * 50 + "[{,:}]", "n": [1]}
+    source = json.dumps(doc)
+    r = JsonReindenter(max_carry=8)
+    out = "".join(r.feed(source[i:i + 5]) for i in range(0, len(source), 5)) + r.flush()
+    assert out == json.dumps(doc, indent=2)
+
+def test_reindent_keeps_value_spelling():
+    assert JsonReindenter().feed('{"a":1.50,"b":1e5}') == '{\n  "a": 1.50,\n  "b": 1e5\n}'
+
+def test_line_spool_reads_any_window():
+    spool = LineSpool(step=4)
+    text = "".join(f"line {i}\n" for i in range(100))
+    for i in range(0, len(text), 13):
+        spool.write(text[i:i + 13])
+    assert spool.line_count == 100
+    assert spool.lines(0, 2) == ["line 0", "line 1"]
+    assert spool.lines(37, 3) == ["line 37", "line 38", "line 39"]
+    assert spool.lines(98, 10) == ["line 98", "line 99"]
+    assert spool.lines(200, 5) == []
+
+def test_line_spool_breaks_long_lines():
+    spool = LineSpool(max_line=10)
+    spool.write("x" * 25)
+    spool.write("y" * 3 + "\nz")
+    assert spool.lines(0, 10) == ["x" * 10, "x" * 10, "x" * 5 + "yyy", "z"]
+
+def test_response_body_spools_to_disk_and_formats_json():
+    body = ResponseBody("application/json", spool_size=1024)
+    payload = json.dumps([{"i": i, "v": "x" * 20} for i in range(200)]).encode()
+    for i in range(0, len(payload), 100):
+        body.write(payload[i:i + 100])
+    assert body.raw._rolled
+    body.finish()
+    assert body.size == len(payload)
+    assert b"".join(body.iter_raw()) == payload
+    assert body.view.lines(0, 4) == ["[", "  {", '    "i": 0,', '    "v": "' + "x" * 20 + '"']
+    assert body.view.line_count == len(json.dumps(json.loads(payload), indent=2).splitlines())
+
+def test_response_body_plain_text_and_multibyte_split():
+    body = ResponseBody("text/plain")
+    data = "héllo\nwörld".encode("utf-8")
+    for b in data:
+        body.write(bytes([b]))
+    body.finish()
+    assert body.view.lines(0, 5) == ["héllo", "wörld"]
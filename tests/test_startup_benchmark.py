@@ -0,0 +1,13 @@
+from startup_benchmark import main, run_once
+
+def test_startup_imports_no_heavy_modules():
+    report = run_once(imports_only=True)
+    assert report["heavy"] == []
+
+def test_startup_without_optional_drivers():
+    report = run_once(imports_only=True, without_drivers=True)
+    assert report["heavy"] == []
+
+def test_benchmark_passes_budget(capsys):
+    assert main(["--runs", "1", "--imports-only", "--budget", "5"]) == 0
+    assert "PASS" in capsys.readouterr().out
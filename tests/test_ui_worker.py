@@ -0,0 +1,73 @@
+import threading
+import time
+from ui_worker import BackgroundRunner
+
+class FakeWidget:
+    """Collects after() callbacks so the test can play the Tk thread."""
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, fn):
+        self.callbacks.append(fn)
+
+    def run_pending(self):
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+def wait_and_drain(widget, future):
+    future.exception(timeout=5)
+    # The done-callback may race the result; keep polling until it lands
+    for _ in range(100):
+        widget.run_pending()
+        if not widget.callbacks:
+            break
+        time.sleep(0.01)
+
+def test_result_delivered_via_after():
+    widget = FakeWidget()
+    runner = BackgroundRunner(widget)
+    results = []
+    future = runner.submit("k", lambda: threading.current_thread().name, results.append)
+    future.result(timeout=5)
+    assert results == []  # nothing touches the UI until the Tk thread drains
+    wait_and_drain(widget, future)
+    assert results and results[0].startswith("hackzilla-worker")
+    runner.shutdown()
+
+def test_errors_routed_to_on_error():
+    widget = FakeWidget()
+    runner = BackgroundRunner(widget)
+    errors = []
+    def boom():
+        raise RuntimeError("db down")
+    future = runner.submit("k", boom, lambda r: None, errors.append)
+    future.exception(timeout=5)
+    wait_and_drain(widget, future)
+    assert str(errors[0]) == "db down"
+    runner.shutdown()
+
+def test_newer_job_supersedes_stale_one():
+    widget = FakeWidget()
+    runner = BackgroundRunner(widget)
+    gate = threading.Event()
+    results = []
+    first = runner.submit("columns", lambda: gate.wait(5) and "old", results.append)
+    second = runner.submit("columns", lambda: "new", results.append)
+    gate.set()
+    first.result(timeout=5)
+    wait_and_drain(widget, second)
+    assert results == ["new"]
+    assert not runner.is_busy()
+    runner.shutdown()
+
+def test_cancel_drops_result():
+    widget = FakeWidget()
+    runner = BackgroundRunner(widget)
+    results = []
+    future = runner.submit("k", lambda: 1, results.append)
+    runner.cancel("k")
+    if not future.cancelled():
+        future.result(timeout=5)
+    widget.run_pending()
+    assert results == []
+    runner.shutdown()
@@ -0,0 +1,94 @@
+import datetime
+import decimal
+import time
+import pytest
+from schema_model import Column
+from validators import TableValidator, compile_column, parse_type
+
+def col(name, data_type, nullable=True, primary_key=False, max_length=None, precision=None, scale=None):
+    return Column(name, data_type, nullable, primary_key, max_length, precision, scale, None)
+
+def reason(check, text):
+    with pytest.raises(ValueError) as e:
+        check(text)
+    return str(e.value)
+
+def test_parse_type():
+    assert parse_type("NUMERIC(10, 2)") == ("numeric", ["10", "2"])
+    assert parse_type("timestamp(3) with time zone") == ("timestamp with time zone", ["3"])
+    assert parse_type("int(11) unsigned") == ("int", ["11"])
+    assert parse_type(None) == ("", [])
+
+def test_integer_ranges():
+    check = compile_column("smallint")
+    assert check("-32768") == -32768
+    assert reason(check, "32768") == "must be between -32768 and 32767"
+    assert reason(check, "1.5") == "must be an integer"
+    assert compile_column("integer", dialect="sqlite")("4294967296") == 4294967296
+    assert reason(compile_column("integer", dialect="postgresql"), "4294967296").startswith("must be between")
+
+def test_unsigned_integer_ranges():
+    check = compile_column("int(10) unsigned", dialect="mysql")
+    assert check("4294967295") == 4294967295
+    assert reason(check, "-1") == "must be between 0 and 4294967295"
+    assert compile_column("bigint unsigned", dialect="mysql")("18446744073709551615") == 2 ** 64 - 1
+    assert reason(compile_column("bigint", dialect="mysql"), "9223372036854775808").startswith("must be between")
+
+def test_numeric_precision():
+    check = compile_column("numeric", precision=5, scale=2)
+    assert check("123.45") == decimal.Decimal("123.45")
+    assert reason(check, "1234.5") == "must have at most 3 digits before the decimal point"
+    assert reason(check, "1.234") == "must have at most 2 decimal places"
+    assert reason(check, "NaN") == "must be a number"
+    assert compile_column("decimal(4,1)")("999.9") == decimal.Decimal("999.9")
+    assert compile_column("numeric")("1e30") == decimal.Decimal("1e30")
+
+def test_dates_booleans_uuid_json():
+    assert compile_column("date")("2024-01-02 00:00:00") == datetime.date(2024, 1, 2)
+    assert reason(compile_column("date"), "01-01-2000") == "must be YYYY-MM-DD"
+    assert compile_column("timestamp with time zone")("2024-01-02T03:04:05Z").tzinfo is not None
+    assert compile_column("time")("12:30") == datetime.time(12, 30)
+    assert compile_column("boolean")("Yes") is True
+    assert reason(compile_column("bool"), "maybe") == "must be a boolean"
+    assert compile_column("uuid")("12345678123456781234567812345678") == "12345678-1234-5678-1234-567812345678"
+    assert reason(compile_column("uuid"), "nope") == "must be a UUID"
+    assert reason(compile_column("jsonb"), "{") == "must be valid JSON"
+
+def test_strings_and_enums():
+    assert reason(compile_column("character varying", max_length=3), "abcd") == "must be at most 3 characters"
+    assert compile_column("VARCHAR(3)")("abc") == "abc"
+    assert compile_column("text")("x" * 10000)
+    check = compile_column("enum('small','it''s')")
+    assert check("it's") == "it's"
+    assert reason(check, "big") == "must be one of: small, it's"
+    mood = compile_column("mood", dialect="postgresql", enums={"mood": ["sad", "ok"]})
+    assert mood("ok") == "ok" and reason(mood, "happy") == "must be one of: sad, ok"
+    assert compile_column("point", dialect="postgresql")("(1,2)") == "(1,2)"
+
+def test_table_validator_required_and_validate():
+    validator = TableValidator([col("id", "integer", nullable=False, primary_key=True),
+                                col("name", "varchar", nullable=False, max_length=5),
+                                col("age", "smallint")])
+    assert validator.required == {"name"}
+    assert validator.validate({"id": "", "name": "", "age": "x"}) == {"age": "must be an integer"}
+    assert validator.validate({"id": "", "name": "", "age": ""}, require=True) == {"name": "is required"}
+    assert validator.convert("age", "") is None
+    with pytest.raises(ValueError):
+        validator.convert("name", "")
+    assert TableValidator.from_pairs([("n", "int"), "free"]).validate({"n": "1", "free": "x"}) == {}
+
+def test_validation_is_fast():
+    validator = TableValidator([col("id", "bigint"), col("name", "varchar", max_length=50),
+                                col("born", "date"), col("price", "numeric", precision=10, scale=2),
+                                col("active", "boolean")])
+    row = {"id": "123456", "name": "Jane", "born": "2000-01-02", "price": "19.99", "active": "t"}
+    start = time.perf_counter()
+    for _ in range(10000):
+        validator.validate(row)
+    assert (time.perf_counter() - start) / 10000 < 500e-6
+
+def test_sqlite_binds_plain_values():
+    assert compile_column("NUMERIC(10,2)", dialect="sqlite")("1.50") == 1.5
+    assert compile_column("DATE", dialect="sqlite")("2024-01-02") == "2024-01-02"
+    assert compile_column("DATETIME", dialect="sqlite")("2024-01-02T03:04:05") == "2024-01-02 03:04:05"
+    assert reason(compile_column("DATE", dialect="sqlite"), "x") == "must be YYYY-MM-DD"
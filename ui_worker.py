@@ -0,0 +1,111 @@
+# ui_worker.py
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundRunner:
+    """
+    Runs blocking calls (database queries, file I/O) on a thread pool and
+    hands their results back to the Tk thread.
+
+    Worker threads never touch Tk: finished jobs are queued and drained by
+    an `after()` poll on the Tk thread, which only runs while jobs are
+    pending. Jobs are submitted under a key; submitting again under the same
+    key supersedes the previous job, whose result is then dropped.
+    """
+    POLL_MS = 16  # one frame at 60fps
+
+    def __init__(self, widget, max_workers=4, name="hackzilla-worker"):
+        self.widget = widget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._done = queue.Queue()
+        self._lock = threading.Lock()
+        self._latest = {}   # key -> (generation, future)
+        self._generation = 0
+        self._pending = 0
+        self._polling = False
+        self._closed = False
+
+    def submit(self, key, fn, on_success, on_error=None, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` in the background. `on_success(result)` or
+        `on_error(exc)` is then called on the Tk thread, unless a newer job
+        was submitted under the same `key` or the job was cancelled.
+        A `key` of None marks a fire-and-forget job that is never superseded.
+        """
+        return self.watch(key, lambda: self._executor.submit(fn, *args, **kwargs), on_success, on_error)
+
+    def watch(self, key, future, on_success, on_error=None):
+        """
+        Like `submit()`, for work already running elsewhere (e.g. a coroutine
+        scheduled on the HTTP engine loop). `future` may also be a callable
+        returning the future, which is then started under the runner's lock.
+        """
+        if key is None:
+            key = object()
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous[1].cancel()
+            if callable(future):
+                future = future()
+            self._latest[key] = (generation, future)
+            self._pending += 1
+
+        future.add_done_callback(
+            lambda f: self._done.put((key, generation, f, on_success, on_error))
+        )
+        self._ensure_polling()
+        return future
+
+    def cancel(self, key):
+        """Drop the job running under `key`; its callbacks will not fire."""
+        with self._lock:
+            entry = self._latest.pop(key, None)
+        if entry is not None:
+            entry[1].cancel()
+
+    def is_busy(self, key=None):
+        with self._lock:
+            if key is None:
+                return self._pending > 0
+            return key in self._latest
+
+    def _ensure_polling(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.widget.after(self.POLL_MS, self._drain)
+
+    def _drain(self):
+        self._polling = False
+        while True:
+            try:
+                key, generation, future, on_success, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._pending -= 1
+                latest = self._latest.get(key)
+                current = latest is not None and latest[0] == generation
+                if current:
+                    del self._latest[key]
+            if not current or future.cancelled() or self._closed:
+                continue
+            exc = future.exception()
+            if exc is None:
+                on_success(future.result())
+            elif on_error is not None:
+                on_error(exc)
+        if self._pending > 0:
+            self._ensure_polling()
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            for _, future in self._latest.values():
+                future.cancel()
+            self._latest.clear()
+        self._executor.shutdown(wait=False)
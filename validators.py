@@ -0,0 +1,275 @@
+# validators.py
+import datetime
+import decimal
+import json
+import re
+import uuid
+
+# Bits per integer type name; SQLite stores every INTEGER in 64 bits
+_INTEGER_BITS = {
+    "tinyint": 8, "smallint": 16, "int2": 16, "smallserial": 16, "mediumint": 24,
+    "int": 32, "integer": 32, "int4": 32, "serial": 32,
+    "bigint": 64, "int8": 64, "bigserial": 64,
+}
+_BOOLEAN_TYPES = {"boolean", "bool"}
+_NUMERIC_TYPES = {"numeric", "decimal"}
+_FLOAT_TYPES = {"real", "float", "float4", "float8", "double", "double precision"}
+_DATETIME_TYPES = {"timestamp", "timestamptz", "timestamp without time zone",
+                   "timestamp with time zone", "datetime"}
+_TIME_TYPES = {"time", "timetz", "time without time zone", "time with time zone"}
+_STRING_TYPES = {"varchar", "character varying", "char", "character", "bpchar",
+                 "nvarchar", "nchar", "text", "string", "clob"}
+_JSON_TYPES = {"json", "jsonb"}
+
+_BOOLEANS = {"true": True, "t": True, "yes": True, "y": True, "1": True, "on": True,
+             "false": False, "f": False, "no": False, "n": False, "0": False, "off": False}
+_INTEGER = re.compile(r"[+-]?\d+")
+_ARGS = re.compile(r"\((.*)\)")
+_ENUM_LABEL = re.compile(r"'((?:[^']|'')*)'")
+
+
+def parse_type(data_type):
+    """
+    Split a declared type into (base name, [arguments]), e.g.
+    "NUMERIC(10, 2)" -> ("numeric", ["10", "2"]) and
+    "timestamp(3) with time zone" -> ("timestamp with time zone", ["3"]).
+    """
+    text = (data_type or "").strip().lower()
+    match = _ARGS.search(text)
+    args = [a.strip() for a in match.group(1).split(",")] if match else []
+    return " ".join(_ARGS.sub(" ", text).replace("unsigned", " ").replace("[]", " ").split()), args
+
+
+def _int_arg(args, index):
+    try:
+        return int(args[index])
+    except (IndexError, ValueError):
+        return None
+
+
+def _integer(bits, unsigned=False):
+    if unsigned:
+        low, high = 0, (1 << bits) - 1
+    else:
+        low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+
+    def check(text):
+        if not _INTEGER.fullmatch(text):
+            raise ValueError("must be an integer")
+        value = int(text)
+        if not low <= value <= high:
+            raise ValueError(f"must be between {low} and {high}")
+        return value
+    return check
+
+
+def _boolean(text):
+    try:
+        return _BOOLEANS[text.lower()]
+    except KeyError:
+        raise ValueError("must be a boolean")
+
+
+def _numeric(precision, scale):
+    whole = precision - (scale or 0) if precision else None
+
+    def check(text):
+        try:
+            value = decimal.Decimal(text)
+        except decimal.InvalidOperation:
+            raise ValueError("must be a number")
+        if not value.is_finite():
+            raise ValueError("must be a number")
+        _, digits, exponent = value.as_tuple()
+        if scale is not None and -exponent > scale:
+            raise ValueError(f"must have at most {scale} decimal places")
+        if whole is not None and len(digits) + exponent > whole and value != 0:
+            raise ValueError(f"must have at most {whole} digits before the decimal point")
+        return value
+    check.numeric = True
+    return check
+
+
+def _float(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError("must be a number")
+
+
+def _date(text):
+    # Spreadsheet dates often carry a midnight time part
+    if len(text) > 10 and text[10] in " T":
+        text = text[:10]
+    try:
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        raise ValueError("must be YYYY-MM-DD")
+
+
+def _datetime(text):
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError("must be YYYY-MM-DD HH:MM[:SS]")
+
+
+def _time(text):
+    try:
+        return datetime.time.fromisoformat(text)
+    except ValueError:
+        raise ValueError("must be HH:MM[:SS]")
+
+
+def _uuid(text):
+    try:
+        return str(uuid.UUID(text))
+    except ValueError:
+        raise ValueError("must be a UUID")
+
+
+def _string(max_length):
+    if not max_length:
+        return str
+
+    def check(text):
+        if len(text) > max_length:
+            raise ValueError(f"must be at most {max_length} characters")
+        return text
+    return check
+
+
+def _json(text):
+    try:
+        json.loads(text)
+    except ValueError:
+        raise ValueError("must be valid JSON")
+    return text
+
+
+def _enum(labels):
+    allowed = frozenset(labels)
+    message = "must be one of: " + ", ".join(labels)
+
+    def check(text):
+        if text not in allowed:
+            raise ValueError(message)
+        return text
+    return check
+
+
+def compile_column(data_type, max_length=None, precision=None, scale=None, dialect=None, enums=None):
+    """
+    Build the checker for one column: a function taking the (stripped,
+    non-empty) input text and returning the value to bind, or raising
+    ValueError with a short reason. Unknown types pass text through.
+    `enums` maps user-defined enum type names to their labels.
+    """
+    check = _compile(data_type, max_length, precision, scale, dialect, enums)
+    if dialect == "sqlite":
+        # sqlite3 can't bind Decimal, and stores dates and times as ISO text
+        if check in (_date, _time):
+            return lambda text: check(text).isoformat()
+        if check is _datetime:
+            return lambda text: check(text).isoformat(sep=" ")
+        if getattr(check, "numeric", False):
+            return lambda text: float(check(text))
+    return check
+
+
+def _compile(data_type, max_length, precision, scale, dialect, enums):
+    base, args = parse_type(data_type)
+    if base == "enum":
+        return _enum([m.replace("''", "'") for m in _ENUM_LABEL.findall(data_type)])
+    if enums:
+        labels = enums.get(base.strip('"')) or enums.get(base.split(".")[-1].strip('"'))
+        if labels:
+            return _enum(list(labels))
+    if base in _INTEGER_BITS:
+        if dialect == "sqlite":
+            return _integer(64)
+        # MySQL reports "int(10) unsigned" in column_type; parse_type() drops the flag
+        return _integer(_INTEGER_BITS[base], unsigned="unsigned" in data_type.lower())
+    if base in _BOOLEAN_TYPES:
+        return _boolean
+    if base in _NUMERIC_TYPES:
+        if precision is None:
+            precision, scale = _int_arg(args, 0), _int_arg(args, 1)
+        return _numeric(precision, scale if scale is not None else (0 if precision else None))
+    if base in _FLOAT_TYPES:
+        return _float
+    if base == "date":
+        return _date
+    if base in _DATETIME_TYPES:
+        return _datetime
+    if base in _TIME_TYPES:
+        return _time
+    if base == "uuid":
+        return _uuid
+    if base in _JSON_TYPES:
+        return _json
+    if base in _STRING_TYPES:
+        return _string(max_length or _int_arg(args, 0))
+    if dialect not in (None, "sqlite"):
+        return str
+    # SQLite accepts any declared type; follow its affinity rules
+    if "int" in base:
+        return _integer(64)
+    if any(k in base for k in ("char", "clob", "text")):
+        return _string(max_length or _int_arg(args, 0))
+    if any(k in base for k in ("real", "floa", "doub")):
+        return _float
+    return str
+
+
+class TableValidator:
+    """
+    A table's column checks, compiled once from its schema so validating a
+    form or an import batch needs no database calls. `checkers` maps each
+    column to its checker (see `compile_column()`); `required` holds the
+    NOT NULL columns that aren't part of the primary key (a key column is
+    usually filled in by the database).
+    """
+    def __init__(self, columns, dialect=None, enums=None):
+        self.checkers = {}
+        self.required = set()
+        for column in columns:
+            self.checkers[column.name] = compile_column(
+                column.data_type, column.max_length, column.precision, column.scale, dialect, enums)
+            if not column.nullable and not column.primary_key:
+                self.required.add(column.name)
+
+    @classmethod
+    def from_pairs(cls, pairs, dialect=None, enums=None):
+        """From (name, data_type) pairs or bare names; constraints are unknown."""
+        validator = cls((), dialect, enums)
+        for column in pairs:
+            name, data_type = (column, None) if isinstance(column, str) else column
+            validator.checkers[name] = compile_column(data_type, dialect=dialect, enums=enums)
+        return validator
+
+    def convert(self, name, text):
+        """The value to bind for `text`; empty text is None. Raises ValueError."""
+        if not text:
+            if name in self.required:
+                raise ValueError("is required")
+            return None
+        return self.checkers.get(name, str)(text)
+
+    def validate(self, values, require=False):
+        """
+        {column: reason} for a dict of input texts. Empty inputs are skipped
+        unless `require`, in which case NOT NULL columns must be filled.
+        """
+        errors = {}
+        checkers = self.checkers
+        for name, text in values.items():
+            if not text:
+                if require and name in self.required:
+                    errors[name] = "is required"
+                continue
+            try:
+                checkers.get(name, str)(text)
+            except ValueError as e:
+                errors[name] = str(e)
+        return errors